@@ -52,25 +52,33 @@ def _find_mcdc_pairs(conditions, truth_table_results):
     # Testa todas as condições com os valores da tabela verdade, retorna o conjunto
     # mínimo onde a saída é alterada pelos valores, por exemplo a condição a or b or c
     # tem 8 combinações possíveis, mas o retorno seria 4 casos
+    # Cada linha vira uma máscara de bits (bit i = valor de conditions[i]) e é indexada
+    # por ela, assim o único candidato a par de uma linha para a condição i é a
+    # máscara com o bit i invertido, achado com um lookup em vez de varrer a tabela
+    bits = {cond: 1 << i for i, cond in enumerate(conditions)}
+    rows = []
+    index = {}
+    for asg, res in truth_table_results:
+        mask = 0
+        for cond, bit in bits.items():
+            if asg[cond]:
+                mask |= bit
+        rows.append((mask, asg, res))
+        # guarda a primeira linha de cada (máscara, resultado), como a varredura antiga
+        index.setdefault((mask, res), asg)
     # Para cada condição, capture apenas o primeiro par que a isola
     minimal_pairs = {}
     covered = set()
     for cond in conditions:
-        for asg1, res1 in truth_table_results:
-            for asg2, res2 in truth_table_results:
-                # resultados diferentes (muda a decisão)
-                if res1 == res2:
-                    continue
-                # esta condição varia
-                if asg1[cond] == asg2[cond]:
-                    continue
-                # todas as outras fixas
-                if all(asg1[c] == asg2[c] for c in conditions if c != cond):
-                    print(f"Par encontrado para {cond}: {asg1} res = {res1} e {asg2} res = {res2}")
-                    minimal_pairs[cond] = (asg1, asg2)
-                    covered.add(cond)
-                    break
-            if cond in minimal_pairs:
+        bit = bits[cond]
+        for mask, asg1, res1 in rows:
+            # mesma linha com só esta condição variando e resultado diferente
+            asg2 = index.get((mask ^ bit, not res1))
+            if asg2 is not None:
+                res2 = not res1
+                print(f"Par encontrado para {cond}: {asg1} res = {res1} e {asg2} res = {res2}")
+                minimal_pairs[cond] = (asg1, asg2)
+                covered.add(cond)
                 break
     # Agora colhe exatamente 2 casos por condição
     unique_cases = {
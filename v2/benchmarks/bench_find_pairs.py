@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Mede o tempo do _find_mcdc_pairs indexado para decisões de 4 a 20 condições."""
+import ast
+import argparse
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from mcdc_tool import CompiledDecision, _find_mcdc_pairs
+
+
+def _chain_decision(n):
+    """Monta uma cadeia no estilo de test_cadeia_quatro.py: c0 and c1 or c2 and c3 ..."""
+    names = [f"c{i:02d}" for i in range(n)]
+    terms = [" and ".join(names[i:i + 2]) for i in range(0, n, 2)]
+    return ast.parse(" or ".join(terms), mode="eval").body
+
+
+def _truth_table(decision, max_rows, rng):
+    """Tabela completa até max_rows linhas; acima disso, uma amostra de vetores distintos."""
+    conditions = decision.conditions
+    n = len(conditions)
+    if (1 << n) <= max_rows:
+        rows = itertools.product([True, False], repeat=n)
+    else:
+        picked = rng.sample(range(1 << n), max_rows)
+        rows = ([bool(r >> i & 1) for i in range(n)] for r in picked)
+    table = []
+    for vals in rows:
+        asg = dict(zip(conditions, vals))
+        table.append((asg, decision.evaluate(vals)))
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min", type=int, default=4, help="menor número de condições")
+    parser.add_argument("--max", type=int, default=20, help="maior número de condições")
+    parser.add_argument("--step", type=int, default=2, help="passo entre tamanhos")
+    parser.add_argument("--max-rows", type=int, default=1 << 20,
+                        help="linhas da tabela acima das quais se usa amostragem (Padrão: tabela "
+                             "completa até 20 condições)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'conds':>5} {'linhas':>8} {'tempo (s)':>10} {'cobertas':>9}  tabela")
+    for n in range(args.min, args.max + 1, args.step):
+        decision = CompiledDecision(_chain_decision(n))
+        conditions = decision.conditions
+        table = _truth_table(decision, args.max_rows, rng)
+        start = time.perf_counter()
+        _, covered = _find_mcdc_pairs(conditions, table)
+        elapsed = time.perf_counter() - start
+        # com amostra os pares achados e o tempo não se comparam com os da tabela completa
+        kind = "amostra" if (1 << n) > args.max_rows else "completa"
+        print(f"{n:>5} {len(table):>8} {elapsed:>10.4f} {len(covered):>9}  {kind}")
+
+
+if __name__ == "__main__":
+    main()
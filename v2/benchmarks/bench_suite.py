@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""Suíte de benchmarks do gerador, da instrumentação e da verificação MC/DC.
+
+Mede, com decisões sintéticas (cadeias como test_cadeia_seis.py e aninhamentos como
+test_alinhamento_profundo.py) e com as cargas de placar.py e programa.py:
+  truth_table.*  montagem da tabela verdade em bitset e do BDD
+  pairs.*        _find_mcdc_pairs sobre a tabela (amostrada acima de --max-rows, e
+                 então a métrica termina em .sampled)
+  generate.*     relatório do gerador para um módulo com as decisões aninhadas
+  runtime.*      carga nativa x instrumentada (e a razão entre elas)
+  recorder.*     memória do recorder por vetor distinto gravado
+  report.*       relatório do verificador depois da carga instrumentada
+Os tempos são o melhor de --repeat execuções, em segundos; memória em bytes.
+
+Com --save os resultados vão para um json (com o commit e a versão do Python), e
+com --compare um resultado anterior é comparado com o atual: métricas que pioraram
+mais que --threshold são listadas e o processo sai com código 1.
+"""
+import argparse
+import ast
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+V2 = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(V2 / "lib"))
+import mcdc_recorder
+from bench_find_pairs import _chain_decision, _truth_table
+from mcdc_import_hook import InstrumentingLoader
+from mcdc_tool import CompiledDecision, _find_mcdc_pairs, generate_mcdc_tests_from_file
+from mcdc_verify_from_observed import generate_report_from_observed
+
+
+def _best(function, repeat):
+    """Menor tempo de 'repeat' execuções de function()."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _nested_decision(depth):
+    """Aninhamento no estilo de test_alinhamento_profundo.py: a and (b or (c and (d or ...)))."""
+    names = [f"c{i:02d}" for i in range(depth)]
+    text = names[-1]
+    for i in range(depth - 2, -1, -1):
+        op = " and " if i % 2 == 0 else " or "
+        text = f"{names[i]}{op}({text})"
+    return ast.parse(text, mode="eval").body
+
+
+def bench_truth_tables(sizes, repeat, results):
+    for n in sizes:
+        for shape, build in (("chain", _chain_decision), ("nested", _nested_decision)):
+            decision = CompiledDecision(build(n))
+            if n <= 20:
+                results[f"truth_table.bitset.{shape}{n}"] = _best(decision.truth_table, repeat)
+            results[f"truth_table.bdd.{shape}{n}"] = _best(decision.bdd, repeat)
+
+
+def bench_pairs(sizes, max_rows, repeat, results):
+    rng = random.Random(0)
+    for n in sizes:
+        decision = CompiledDecision(_chain_decision(n))
+        table = _truth_table(decision, max_rows, rng)
+        # uma amostra não se compara com a tabela completa de outra execução
+        key = f"pairs.chain{n}.sampled" if (1 << n) > max_rows else f"pairs.chain{n}"
+        results[key] = _best(lambda: _find_mcdc_pairs(decision.conditions, table), repeat)
+
+
+def bench_generate(sizes, repeat, workdir, results):
+    # um módulo com uma função por tamanho, cada uma com uma decisão aninhada
+    lines = []
+    for n in sizes:
+        args = ", ".join(f"c{i:02d}" for i in range(n))
+        lines += [f"def decision{n}({args}):",
+                  f"    if {ast.unparse(_nested_decision(n))}:",
+                  "        return True",
+                  "    return False", ""]
+    module = workdir / "nested.py"
+    module.write_text("\n".join(lines), encoding="utf-8")
+    report = workdir / "nested.txt"
+    results["generate.nested"] = _best(
+        lambda: generate_mcdc_tests_from_file(module, report, quiet=True), repeat)
+
+
+def _load(path, instrumented):
+    name = f"bench_{path.stem}_{'instr' if instrumented else 'native'}"
+    if instrumented:
+        spec = importlib.util.spec_from_loader(name, InstrumentingLoader(name, str(path), path.name))
+    else:
+        spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _programa_workload(module, scale):
+    for _ in range(scale):
+        for ano in range(0, 10002):
+            try:
+                module.eh_bissexto(ano)
+            except ValueError:
+                pass
+
+
+def _placar_workload(module, scale):
+    rng = random.Random(0)
+    for _ in range(200 * scale):
+        placar = module.Placar()
+        for posicao in range(1, placar.POSICOES + 1):
+            placar.add(posicao, [rng.randint(1, 6) for _ in range(5)])
+        str(placar)
+        placar.getScore()
+
+
+def bench_runtime(scale, repeat, workdir, results):
+    workloads = {"programa": _programa_workload, "placar": _placar_workload}
+    for name, workload in workloads.items():
+        path = V2 / f"{name}.py"
+        native, instrumented = _load(path, False), _load(path, True)
+        mcdc_recorder.clear()
+        results[f"runtime.{name}.native"] = _best(lambda: workload(native, scale), repeat)
+        results[f"runtime.{name}.instrumented"] = _best(lambda: workload(instrumented, scale), repeat)
+        results[f"runtime.{name}.overhead"] = (results[f"runtime.{name}.instrumented"]
+                                               / results[f"runtime.{name}.native"])
+        if name == "placar":
+            # o relatório do verificador sai das observações que a carga deixou
+            report = workdir / "placar.txt"
+            results["report.placar"] = _best(
+                lambda: generate_report_from_observed(str(path), report, path.name), repeat)
+        mcdc_recorder.clear()
+
+
+def bench_recorder(conditions, vectors, results):
+    # decisão sintética com 'vectors' vetores distintos; sem saturação, para que
+    # todos sejam guardados, e o pico de memória dividido pelo número de vetores
+    rng = random.Random(0)
+    keys = tuple(f"c{i:02d}" for i in range(conditions))
+    full = (1 << conditions) - 1
+    calls = [(rng.getrandbits(conditions), rng.random() < 0.5) for _ in range(vectors)]
+    saturation, mcdc_recorder.SATURATION = mcdc_recorder.SATURATION, False
+    mcdc_recorder.clear()
+    tracemalloc.start()
+    try:
+        for values, result in calls:
+            mcdc_recorder.record_call("bench:recorder", keys, result, full, values)
+        distinct = len(mcdc_recorder.get_observed()["bench:recorder"][1])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        mcdc_recorder.SATURATION = saturation
+        mcdc_recorder.clear()
+    results["recorder.peak_bytes"] = peak
+    results["recorder.bytes_per_vector"] = peak / distinct
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=V2, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(previous, current, threshold):
+    """Imprime a comparação e retorna as métricas que pioraram mais que threshold."""
+    worse = []
+    print(f"\n{'métrica':<36} {'antes':>12} {'agora':>12} {'razão':>7}")
+    for key in sorted(current):
+        if key not in previous or not previous[key]:
+            continue
+        # tudo é tempo, memória ou razão de tempos: maior é pior
+        ratio = current[key] / previous[key]
+        flag = ""
+        if ratio > 1 + threshold:
+            worse.append(key)
+            flag = "  <- piorou"
+        print(f"{key:<36} {previous[key]:>12.6g} {current[key]:>12.6g} {ratio:>7.2f}{flag}")
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min", type=int, default=4, help="menor número de condições das decisões sintéticas")
+    parser.add_argument("--max", type=int, default=24, help="maior número de condições das decisões sintéticas")
+    parser.add_argument("--step", type=int, default=4, help="passo entre tamanhos")
+    parser.add_argument("--max-rows", type=int, default=1 << 16,
+                        help="linhas da tabela do _find_mcdc_pairs acima das quais se usa amostragem")
+    parser.add_argument("--repeat", type=int, default=3, help="execuções de cada medida (fica a menor)")
+    parser.add_argument("--scale", type=int, default=1, help="multiplicador das cargas de placar e programa")
+    parser.add_argument("--recorder-conditions", type=int, default=12,
+                        help="condições da decisão sintética da medida de memória")
+    parser.add_argument("--recorder-calls", type=int, default=20000,
+                        help="chamadas do record_call na medida de memória")
+    parser.add_argument("--save", help="grava os resultados neste json")
+    parser.add_argument("--compare", help="json de uma execução anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="piora relativa tolerada na comparação (Padrão: 0.25)")
+    args = parser.parse_args()
+
+    sizes = list(range(args.min, args.max + 1, args.step))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        # o recorder das cargas instrumentadas grava o log na pasta temporária
+        os.environ["MCDC_OBSERVED"] = str(workdir / mcdc_recorder.LOG_FILE)
+        steps = [
+            ("tabela verdade", lambda: bench_truth_tables(sizes, args.repeat, results)),
+            ("pares MC/DC", lambda: bench_pairs(sizes, args.max_rows, args.repeat, results)),
+            ("gerador", lambda: bench_generate(sizes, args.repeat, workdir, results)),
+            ("cargas nativas x instrumentadas", lambda: bench_runtime(args.scale, args.repeat, workdir, results)),
+            ("memória do recorder", lambda: bench_recorder(args.recorder_conditions, args.recorder_calls, results)),
+        ]
+        for label, step in steps:
+            start = time.perf_counter()
+            step()
+            print(f"{label}: {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        mcdc_recorder._close_log()
+
+    for key, value in results.items():
+        print(f"{key:<36} {value:>12.6g}")
+
+    if args.save:
+        data = {"commit": _commit(), "python": platform.python_version(), "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "results": results}
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(data, indent=2), encoding="utf-8")
+        print(f"Resultados gravados em: {args.save}")
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(f"Comparando com {previous.get('commit') or args.compare} (Python {previous.get('python')})")
+        worse = compare(previous["results"], results, args.threshold)
+        if worse:
+            print(f"{len(worse)} métricas pioraram mais de {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,144 @@
 import ast
 import astor
 from pathlib import Path
+from mcdc_tool import CompiledDecision, _decision_id, _decision_sites
 
 # recorder module to collect assignments and results
 RECORDER_IMPORT = "import mcdc_recorder\n"
 
+# part of the instrumentation cache key: bump it whenever the generated probes
+# change, so cached code objects from older instrumenters are not reused
+INSTRUMENTER_VERSION = 3
+
+
+def add_recorder_import(tree: ast.Module) -> ast.Module:
+    """Insere o import do recorder no AST, depois da docstring e dos __future__ imports."""
+    # só colar RECORDER_IMPORT no começo do texto quebra módulos com
+    # 'from __future__ import ...', que precisa ser a primeira instrução
+    body = tree.body
+    pos = 0
+    if (body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)):
+        pos = 1
+    while pos < len(body) and isinstance(body[pos], ast.ImportFrom) and body[pos].module == '__future__':
+        pos += 1
+    body[pos:pos] = ast.parse(RECORDER_IMPORT).body
+    return tree
 
 class Instrumenter(ast.NodeTransformer):
-    def visit_If(self, node):
-        # 1. Extract atomic conditions text and AST nodes
-        cond_nodes = []
-        def gather(n):
-            if isinstance(n, ast.BoolOp):
-                for v in n.values:
-                    gather(v)
-            elif isinstance(n, ast.UnaryOp) and isinstance(n.op, ast.Not):
-                gather(n.operand)
-            elif isinstance(n, ast.Compare) or isinstance(n, ast.Name):
-                cond_nodes.append(n)
-        gather(node.test)
-
-        # 2. Build assignments dict AST
-        keys = [ast.Constant(value=ast.unparse(c)) for c in cond_nodes]
-        values = [c for c in cond_nodes]
-        assign_dict = ast.Assign(
-            targets=[ast.Name(id='_mcdc_assignments', ctx=ast.Store())],
-            value=ast.Dict(keys=keys, values=values)
-        )
-        # 3. Call recorder before the if
-        call = ast.Expr(
-            value=ast.Call(
-                func=ast.Attribute(value=ast.Name(id='mcdc_recorder', ctx=ast.Load()),
-                                   attr='record_call', ctx=ast.Load()),
-                args=[ast.Name(id='_mcdc_assignments', ctx=ast.Load()),
-                      ast.Call(func=ast.Name(id='bool', ctx=ast.Load()),
-                               args=[node.test], keywords=[])],
-                keywords=[]
-            )
+    def __init__(self, filename='', decisions=None, profile=False):
+        super().__init__()
+        # goes into every decision id; must match what the verifier is given
+        self.filename = filename
+        # ids of the decisions to instrument (None = all of them); the monitoring
+        # collector only asks for the ones it cannot follow in the bytecode
+        self.decisions = decisions
+        # profiling probes: the recorder call also gets a clock reading taken
+        # before the test runs, to split the time between the test and the recorder
+        self.profile = profile
+        # id(test expression) -> (decision id, condition keys, {id(condition): bit})
+        self._sites = {}
+        # each decision gets its own temporaries, so a decision evaluated inside
+        # another one's condition (e.g. a call) never clobbers the outer masks
+        self._decision_count = 0
+
+    def _probe(self, cond, bit, names):
+        """Wraps a condition so it records itself when (and only if) it is evaluated."""
+        value, evaluated, values = names
+        load = lambda name: ast.Name(id=name, ctx=ast.Load())
+        store = lambda name: ast.Name(id=name, ctx=ast.Store())
+        set_bit = lambda name: ast.NamedExpr(
+            target=store(name),
+            value=ast.BinOp(left=load(name), op=ast.BitOr(), right=ast.Constant(value=bit)),
         )
-        # 4. Insert import and instrumentation
-        return [
-            assign_dict,
-            call,
-            self.generic_visit(node)
-        ]
+        # value if ((value := cond) or True) and (evaluated |= bit) and
+        #          ((values |= bit) if value else True) else value
+        # every clause is truthy, so the expression yields the condition's own value,
+        # evaluated exactly once, without any call or allocation
+        guard = ast.BoolOp(op=ast.And(), values=[
+            ast.BoolOp(op=ast.Or(), values=[
+                ast.NamedExpr(target=store(value), value=cond),
+                ast.Constant(value=True),
+            ]),
+            set_bit(evaluated),
+            ast.IfExp(test=load(value), body=set_bit(values), orelse=ast.Constant(value=True)),
+        ])
+        return ast.IfExp(test=guard, body=load(value), orelse=load(value))
+
+    def visit_Module(self, node):
+        # ids and condition bits come from the original tree, before any rewrite:
+        # a decision nested in another one's condition (x if c else y inside an if)
+        # is instrumented first and would change the outer condition's text
+        self._sites = {}
+        for kind, site, test in _decision_sites(node):
+            decision = CompiledDecision(test)
+            if not decision.conditions:
+                continue
+            decision_id = _decision_id(site, self.filename, test)
+            bits = {leaf: 1 << i for leaf, i in decision.leaf_index.items()}
+            # how many distinct vectors the short-circuit allows: the recorder
+            # saturates the decision once a test has shown all of them
+            possible = decision.short_circuit_vectors()
+            possible = None if possible is None else len(possible)
+            self._sites[id(test)] = (decision_id, decision.conditions, bits, possible)
+        return self.generic_visit(node)
+
+    def visit(self, node):
+        # every decision site is a test expression (if/while/assert/x if c else y,
+        # comprehension filter or boolean assignment); it is replaced after its
+        # children, so nested decisions are already instrumented inside it
+        site = self._sites.get(id(node))
+        node = super().visit(node)
+        if site is None or (self.decisions is not None and site[0] not in self.decisions):
+            return node
+        return self._instrument(node, *site)
+
+    def _instrument(self, test, decision_id, keys, bits, possible):
+        # 1. Replace each condition in place by its probe, keeping the original
+        #    and/or/not structure, so Python's own short-circuit decides what runs
+        n = self._decision_count
+        self._decision_count += 1
+        names = (f"_mcdc_x{n}", f"_mcdc_e{n}", f"_mcdc_t{n}")
+        def rewrite(t):
+            if isinstance(t, ast.BoolOp):
+                return ast.BoolOp(op=t.op, values=[rewrite(v) for v in t.values])
+            if isinstance(t, ast.UnaryOp) and isinstance(t.op, ast.Not):
+                return ast.UnaryOp(op=t.op, operand=rewrite(t.operand))
+            if id(t) in bits:
+                return self._probe(t, bits[id(t)], names)
+            return t
+        probed = rewrite(test)
+
+        # 2. The recorder call becomes the test itself:
+        #    record_call(id, keys, (e := 0) or (t := 0) or <probed test>, e, t, possible)
+        #    the masks are reset, the test runs once, and only then e/t are read;
+        #    record_call hands back the test's own value (not just a bool), which
+        #    keeps 'x = a or default' intact. No dict or list is built per call, so
+        #    while loops and comprehension filters stay cheap
+        #    (profiling: profile_call(id, keys, clock(), <same test>, e, t, possible))
+        _, evaluated, values = names
+        reset_and_run = ast.BoolOp(op=ast.Or(), values=[
+            ast.NamedExpr(target=ast.Name(id=evaluated, ctx=ast.Store()), value=ast.Constant(value=0)),
+            ast.NamedExpr(target=ast.Name(id=values, ctx=ast.Store()), value=ast.Constant(value=0)),
+            probed,
+        ])
+        recorder = lambda attr: ast.Attribute(value=ast.Name(id='mcdc_recorder', ctx=ast.Load()),
+                                              attr=attr, ctx=ast.Load())
+        args = [ast.Constant(value=decision_id),
+                ast.Tuple(elts=[ast.Constant(value=k) for k in keys], ctx=ast.Load()),
+                reset_and_run,
+                ast.Name(id=evaluated, ctx=ast.Load()),
+                ast.Name(id=values, ctx=ast.Load()),
+                ast.Constant(value=possible)]
+        if self.profile:
+            args.insert(2, ast.Call(func=recorder('clock'), args=[], keywords=[]))
+        call = ast.Call(func=recorder('profile_call' if self.profile else 'record_call'),
+                        args=args, keywords=[])
+        return ast.copy_location(call, test)
 
     def parse_and_instrument(self, src_path: Path) -> ast.Module:
         """Lê, parseia e instrumenta o AST do arquivo em src_path."""
+        self.filename = self.filename or src_path.name
         code = src_path.read_text(encoding='utf-8')
         tree = ast.parse(code)
         new_tree = self.visit(tree)
@@ -55,7 +147,7 @@ class Instrumenter(ast.NodeTransformer):
     
     def write_out(self, tree: ast.Module, dst_path: Path):
         """Serializa o AST instrumentado e escreve no caminho dst_path."""
-        src = RECORDER_IMPORT + astor.to_source(tree)
+        src = astor.to_source(add_recorder_import(tree))
         dst_path.write_text(src, encoding='utf-8')
 
 if __name__ == '__main__':
@@ -67,12 +159,12 @@ if __name__ == '__main__':
 
     src = Path(args.input)
     tree = ast.parse(src.read_text())
-    instr = Instrumenter()
+    instr = Instrumenter(src.name)
     new_tree = instr.visit(tree)
     ast.fix_missing_locations(new_tree)
 
     # prepend recorder import
-    code = RECORDER_IMPORT + astor.to_source(new_tree)
+    code = astor.to_source(add_recorder_import(new_tree))
 
     out_path = Path(args.output_dir) / src.name
     out_path.write_text(code)
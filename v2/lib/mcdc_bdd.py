@@ -0,0 +1,148 @@
+# BDD reduzido e ordenado (ROBDD) usado pelo backend simbólico do mcdc_tool, para
+# decisões com condições demais para enumerar a tabela verdade (2^n linhas).
+# Os nós são inteiros: 0 e 1 são os terminais e o resto indexa a lista _nodes, onde
+# cada nó guarda (nível, filho low, filho high). O nível é a posição da variável na
+# ordem do BDD, e order[nível] diz qual condição (índice na lista ordenada de
+# condições) ele representa. As linhas devolvidas seguem a convenção do mcdc_tool:
+# a condição i vale True quando o bit (n-1-i) da linha é 0.
+#
+# A ordem das variáveis decide o tamanho do BDD: a ordem alfabética das condições
+# pode separar condições relacionadas e explodir o diagrama, por isso o mcdc_tool
+# usa a ordem em que elas aparecem na decisão.
+
+
+class BDD:
+    """Tabela única de nós com as operações necessárias para achar pares MC/DC."""
+
+    def __init__(self, order):
+        self.n = n = len(order)
+        self.order = list(order)
+        self._level = {cond: level for level, cond in enumerate(self.order)}
+        # terminais usam n como nível, para ficarem sempre "abaixo" de qualquer nó
+        self._nodes = [(n, 0, 0), (n, 1, 1)]
+        self._unique = {}
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def _mk(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self._unique.get(key)
+        if node is None:
+            node = len(self._nodes)
+            self._nodes.append(key)
+            self._unique[key] = node
+        return node
+
+    def var(self, i):
+        """Nó da condição i sozinha."""
+        return self._mk(self._level[i], 0, 1)
+
+    def _bit(self, level):
+        return 1 << (self.n - 1 - self.order[level])
+
+    def _apply(self, op, u, v):
+        # casos terminais de cada operação
+        if op == "and":
+            if u == 0 or v == 0:
+                return 0
+            if u == 1 or u == v:
+                return v
+            if v == 1:
+                return u
+        elif op == "or":
+            if u == 1 or v == 1:
+                return 1
+            if u == 0 or u == v:
+                return v
+            if v == 0:
+                return u
+        else:  # xor
+            if u == v:
+                return 0
+            if u == 0:
+                return v
+            if v == 0:
+                return u
+        if u > v:
+            u, v = v, u  # as três operações são comutativas
+        key = (op, u, v)
+        result = self._cache.get(key)
+        if result is not None:
+            return result
+        level_u, low_u, high_u = self._nodes[u]
+        level_v, low_v, high_v = self._nodes[v]
+        level = min(level_u, level_v)
+        if level_u != level:
+            low_u = high_u = u
+        if level_v != level:
+            low_v = high_v = v
+        result = self._mk(level, self._apply(op, low_u, low_v), self._apply(op, high_u, high_v))
+        self._cache[key] = result
+        return result
+
+    def conj(self, u, v):
+        return self._apply("and", u, v)
+
+    def disj(self, u, v):
+        return self._apply("or", u, v)
+
+    def xor(self, u, v):
+        return self._apply("xor", u, v)
+
+    def neg(self, u):
+        return self._apply("xor", u, 1)
+
+    def restrict(self, u, i, value):
+        """Fixa a condição i em value (True/False) no BDD de raiz u."""
+        target = self._level[i]
+        cache = {}
+
+        def walk(node):
+            level, low, high = self._nodes[node]
+            if level > target:
+                return node
+            if level == target:
+                return high if value else low
+            if node not in cache:
+                cache[node] = self._mk(level, walk(low), walk(high))
+            return cache[node]
+
+        return walk(u)
+
+    def first_row(self, u):
+        """Primeira linha, na ordem das variáveis do BDD, em que u é verdadeiro, ou None."""
+        # Preferir o filho high (condição True) em cada nível dá a primeira atribuição
+        # na ordem do BDD; condições que não aparecem no caminho ficam True (bit 0).
+        # Se a ordem do BDD for a alfabética, é a mesma linha que o backend bitset acha
+        if u == 0:
+            return None
+        row = 0
+        while u != 1:
+            level, low, high = self._nodes[u]
+            if high != 0:
+                u = high
+            else:
+                row |= self._bit(level)
+                u = low
+        return row
+
+    def evaluate(self, u, row):
+        """Resultado da função de raiz u na linha 'row' da tabela."""
+        while u > 1:
+            level, low, high = self._nodes[u]
+            u = low if row & self._bit(level) else high
+        return bool(u)
+
+    def independence_pair(self, u, i):
+        """Primeiro par de linhas que isola a condição i, ou None se ela não tem par."""
+        # A diferença booleana f|i=True xor f|i=False marca as atribuições das outras
+        # condições em que mudar só a condição i muda o resultado da decisão
+        difference = self.xor(self.restrict(u, i, True), self.restrict(u, i, False))
+        row = self.first_row(difference)
+        if row is None:
+            return None
+        return row, row | (1 << (self.n - 1 - i))
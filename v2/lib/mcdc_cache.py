@@ -0,0 +1,96 @@
+import hashlib
+import importlib.util
+import marshal
+import os
+from pathlib import Path
+
+from instrumenter import INSTRUMENTER_VERSION
+
+# Cache em disco dos code objects instrumentados, no formato do marshal (como o corpo
+# de um .pyc). A chave junta o hash do fonte, a versão do instrumenter, a versão do
+# bytecode do Python (MAGIC_NUMBER) e o que vai dentro do code object além do fonte:
+# o caminho do arquivo (co_filename), o nome usado nos ids das decisões e o nível de
+# otimização. Módulos que não mudaram carregam o bytecode instrumentado direto, sem
+# parse nem instrumentação.
+#
+# Cada entrada é um arquivo <chave>.mcdcc. Leituras atualizam o mtime, então a
+# remoção por tamanho descarta primeiro as entradas usadas há mais tempo.
+
+CACHE_SUFFIX = ".mcdcc"
+# tamanho máximo padrão da pasta do cache, em bytes
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Pasta padrão do cache: $XDG_CACHE_HOME/mcdc ou ~/.cache/mcdc."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "mcdc"
+
+
+class InstrumentationCache:
+    """Code objects instrumentados em disco, com remoção por tamanho."""
+
+    def __init__(self, directory=None, max_bytes=CACHE_MAX_BYTES):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key(self, source, path, decision_filename, optimize=-1):
+        digest = hashlib.sha256()
+        for part in (str(INSTRUMENTER_VERSION), importlib.util.MAGIC_NUMBER.hex(),
+                     str(path), decision_filename, str(optimize)):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        digest.update(source)
+        return digest.hexdigest()
+
+    def _entry(self, key):
+        return self.directory / (key + CACHE_SUFFIX)
+
+    def load(self, key):
+        """Code object da chave, ou None se não está no cache (ou está corrompido)."""
+        entry = self._entry(key)
+        try:
+            code = marshal.loads(entry.read_bytes())
+            os.utime(entry)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return code
+
+    def store(self, key, code):
+        """Grava o code object e, se a pasta passou do limite, remove as entradas mais antigas."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entry = self._entry(key)
+            # grava num temporário e renomeia: processos de teste em paralelo podem
+            # gravar a mesma entrada, e ninguém deve ler um arquivo pela metade
+            tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(marshal.dumps(code))
+            os.replace(tmp, entry)
+        except OSError:
+            return  # cache é só otimização: sem permissão ou sem espaço, segue sem ele
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in self.directory.glob("*" + CACHE_SUFFIX):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # removida por outro processo
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for entry in self.directory.glob("*" + CACHE_SUFFIX):
+            try:
+                entry.unlink()
+            except OSError:
+                pass
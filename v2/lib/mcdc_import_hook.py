@@ -0,0 +1,314 @@
+import ast
+import glob
+import importlib.abc
+import importlib.machinery
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import mcdc_monitor
+import mcdc_recorder
+from instrumenter import Instrumenter, add_recorder_import
+from mcdc_cache import CACHE_MAX_BYTES, InstrumentationCache, default_cache_dir
+from mcdc_report_writer import FORMATS
+from mcdc_verify_from_observed import write_reports
+
+# INSTRUMENTAÇÃO NA IMPORTAÇÃO: em vez de gerar o código instrumentado com astor e
+# gravar cópias em instrumented/, um finder no começo do sys.meta_path intercepta os
+# módulos-alvo e o loader compila o AST instrumentado direto para bytecode. O código
+# compilado mantém o caminho e as linhas do arquivo original, então tracebacks e
+# imports relativos se comportam como no programa sem instrumentação.
+#
+# Usado como plugin do pytest (pytest -p mcdc_import_hook), instala o finder sozinho
+# a partir do ambiente:
+#   MCDC_MODULES  nomes dos módulos a instrumentar, separados por os.pathsep
+#   MCDC_ROOT     pasta de onde sai o caminho relativo usado nos ids das decisões
+#   MCDC_CACHE    pasta do cache de code objects instrumentados (ver mcdc_cache.py);
+#                 vazia desliga o cache
+#   MCDC_CACHE_MAX_BYTES  tamanho máximo do cache
+#   MCDC_COLLECTOR  'ast' (padrão, sondas no código) ou 'monitor' (sys.monitoring,
+#                 Python 3.12+; ver mcdc_monitor.py). O modo monitor não usa o cache:
+#                 o mapeamento dos saltos precisa do AST de qualquer forma
+#   MCDC_PROFILE  '1' instrumenta com as sondas de perfil (ver mcdc_recorder.profile_call)
+#   MCDC_DURATIONS  json onde o plugin grava a duração de cada teste (um arquivo por
+#                 worker, com o mesmo sufixo dos shards do log); vale também sem
+#                 MCDC_MODULES, para medir os testes sem instrumentação
+# Como plugin, também diz ao recorder qual teste está rodando, para que cada
+# observação fique atribuída ao node id do teste que a produziu.
+#
+# PLUGIN COMPLETO (pytest -p mcdc_import_hook --mcdc=modulo): sem o run_and_verify,
+# o próprio pytest instala o finder, coleta as observações no seu processo e grava o
+# relatório no fim da sessão, sem subprocesso extra nem releitura do log. --mcdc
+# aceita nomes de módulo ou pacote (importáveis a partir da pasta da execução ou do
+# sys.path) e caminhos de arquivo, pasta ou glob, e pode ser repetido. Com
+# pytest-xdist, cada worker instrumenta e grava o seu shard do log, e o processo
+# principal junta os shards antes do relatório.
+
+
+class InstrumentingLoader(importlib.machinery.SourceFileLoader):
+    """Loader de arquivo-fonte que instrumenta o AST antes de compilar."""
+
+    def __init__(self, fullname, path, decision_filename, cache=None, collector='ast', profile=False):
+        super().__init__(fullname, path)
+        self.decision_filename = decision_filename
+        self.cache = cache
+        self.collector = collector
+        self.profile = profile
+
+    def source_to_code(self, data, path, *, _optimize=-1):
+        if self.collector == 'monitor':
+            return self._monitored_code(data, path, _optimize)
+        tree = ast.parse(data, filename=path)
+        tree = Instrumenter(self.decision_filename, profile=self.profile).visit(tree)
+        add_recorder_import(tree)
+        ast.fix_missing_locations(tree)
+        return compile(tree, path, 'exec', dont_inherit=True, optimize=_optimize)
+
+    def _monitored_code(self, data, path, optimize):
+        # compila sem sondas e mapeia os saltos; as decisões que não dá para seguir
+        # pelo bytecode são instrumentadas pelo AST e o módulo é compilado de novo
+        tree = ast.parse(data, filename=path)
+        code = compile(tree, path, 'exec', dont_inherit=True, optimize=optimize)
+        sites = mcdc_monitor.decision_sites(tree, self.decision_filename)
+        table, unsupported = mcdc_monitor.analyze(code, sites)
+        if unsupported:
+            tree = Instrumenter(self.decision_filename, unsupported).visit(ast.parse(data, filename=path))
+            add_recorder_import(tree)
+            ast.fix_missing_locations(tree)
+            code = compile(tree, path, 'exec', dont_inherit=True, optimize=optimize)
+            table, _ = mcdc_monitor.analyze(
+                code, [site for site in sites if site.decision_id not in unsupported])
+        mcdc_monitor.watch(table)
+        return code
+
+    def get_code(self, fullname):
+        # ignora o __pycache__: o .pyc de lá é do código sem instrumentação, e o
+        # código instrumentado não deve ser gravado no lugar dele
+        path = self.get_filename(fullname)
+        data = self.get_data(path)
+        # as sondas de perfil não entram na chave do cache, então o perfil não usa o cache
+        if self.cache is None or self.collector == 'monitor' or self.profile:
+            return self.source_to_code(data, path)
+        key = self.cache.key(data, path, self.decision_filename)
+        code = self.cache.load(key)
+        if code is None:
+            code = self.source_to_code(data, path)
+            self.cache.store(key, code)
+        return code
+
+
+class InstrumentingFinder(importlib.abc.MetaPathFinder):
+    """Entrega o InstrumentingLoader para os módulos-alvo e deixa o resto passar."""
+
+    def __init__(self, modules, root, cache=None, collector='ast', profile=False):
+        self.modules = set(modules)
+        self.root = Path(root).resolve()
+        self.cache = cache
+        self.collector = collector
+        self.profile = profile
+        if collector == 'monitor':
+            mcdc_monitor.start()
+
+    def _decision_filename(self, origin):
+        origin = Path(origin).resolve()
+        try:
+            return origin.relative_to(self.root).as_posix()
+        except ValueError:
+            return origin.name
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname not in self.modules:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if spec is None or not isinstance(spec.loader, importlib.machinery.SourceFileLoader):
+            return None
+        spec.loader = InstrumentingLoader(fullname, spec.origin, self._decision_filename(spec.origin),
+                                          self.cache, self.collector, self.profile)
+        return spec
+
+
+def module_name(rel):
+    """Nome de importação de um módulo a partir do caminho relativo à raiz."""
+    parts = rel[:-len(".py")].split("/")
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def pytest_runtest_logstart(nodeid, location):
+    mcdc_recorder.set_test(nodeid)
+
+
+def pytest_runtest_logfinish(nodeid, location):
+    mcdc_recorder.set_test('')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("mcdc", "cobertura MC/DC")
+    group.addoption("--mcdc", action="append", default=[], metavar="MODULO",
+                    help="Módulo, pacote, arquivo, pasta ou glob a instrumentar (pode repetir)")
+    group.addoption("--mcdc-report", default="mcdc_report.txt",
+                    help="Relatório MC/DC gravado no fim da sessão (Padrão: mcdc_report.txt)")
+    group.addoption("--mcdc-format", choices=FORMATS, default="text",
+                    help="Formato do relatório: text, jsonl ou xml (Padrão: text)")
+    group.addoption("--mcdc-collector", choices=["ast", "monitor"], default="ast",
+                    help="Coleta por sondas no AST ou por sys.monitoring (Python 3.12+) (Padrão: ast)")
+    group.addoption("--mcdc-no-cache", action="store_true",
+                    help="Não usa o cache de código instrumentado")
+    group.addoption("--mcdc-minimal-tests", default=None, metavar="ARQUIVO",
+                    help="Grava um subconjunto mínimo de testes com a mesma cobertura MC/DC da suíte")
+
+
+def collect_modules(program):
+    """Resolve o alvo (arquivo, pasta ou glob) em (raiz, [módulos]).
+
+    A raiz é a pasta a partir da qual o layout é preservado em instrumented/: sobe
+    enquanto houver __init__.py, para que 'import pacote.modulo' continue valendo.
+    """
+    path = Path(program)
+    if path.is_dir():
+        root = path.resolve()
+        modules = [p.resolve() for p in sorted(path.rglob("*.py")) if "__pycache__" not in p.parts]
+    elif glob.has_magic(program):
+        modules = [Path(p).resolve() for p in sorted(glob.glob(program, recursive=True)) if p.endswith(".py")]
+        if not modules:
+            raise SystemExit(f"Nenhum módulo .py casa com '{program}'")
+        root = Path(os.path.commonpath([m.parent for m in modules]))
+    else:
+        # arquivo único: vai direto para instrumented/, como sempre foi
+        return path.resolve().parent, [path.resolve()]
+    while (root / "__init__.py").exists():
+        root = root.parent
+    return root, modules
+
+
+def _find_target(name, search):
+    """Spec do módulo 'name' (com pontos) sem importá-lo, ou None."""
+    spec = None
+    for part in name.split("."):
+        spec = importlib.machinery.PathFinder.find_spec(part, search)
+        if spec is None:
+            return None
+        search = spec.submodule_search_locations
+    return spec
+
+
+def _resolve_targets(targets, search):
+    """Resolve os alvos do --mcdc em (raiz comum, {arquivo: nome do módulo})."""
+    roots, modules = [], {}
+    for target in targets:
+        spec = None
+        if not target.endswith(".py") and not Path(target).exists():
+            spec = _find_target(target, search)
+        if spec is not None and spec.origin:
+            # a raiz é a pasta de onde o nome do módulo é importável
+            origin = Path(spec.origin).resolve()
+            package = spec.submodule_search_locations is not None
+            root = origin.parents[target.count(".") + (1 if package else 0)]
+            paths = sorted(origin.parent.rglob("*.py")) if package else [origin]
+            paths = [p.resolve() for p in paths if "__pycache__" not in p.parts]
+        elif Path(target).exists() or glob.has_magic(target):
+            root, paths = collect_modules(target)
+        else:
+            raise ValueError(f"--mcdc: módulo ou caminho não encontrado: {target}")
+        roots.append(root)
+        for path in paths:
+            modules[path] = module_name(path.relative_to(root).as_posix())
+    return Path(os.path.commonpath(roots)), modules
+
+
+_session = None  # (raiz, {arquivo: módulo}, pasta temporária do log ou None) do --mcdc
+
+
+def pytest_configure(config):
+    global _session
+    targets = config.getoption("mcdc", default=None)
+    if not targets:
+        return
+    import pytest
+    search = [str(config.rootpath), str(config.invocation_params.dir), *sys.path]
+    try:
+        root, modules = _resolve_targets(targets, search)
+    except (ValueError, SystemExit) as e:
+        raise pytest.UsageError(str(e))
+    collector = config.getoption("mcdc_collector")
+    if collector == "monitor" and sys.version_info < (3, 12):
+        raise pytest.UsageError("--mcdc-collector monitor precisa do Python 3.12 ou mais novo")
+    workdir = None
+    if not hasattr(config, "workerinput") and not os.environ.get("MCDC_OBSERVED"):
+        # o log (e os shards dos workers do xdist, que herdam o ambiente) fica numa
+        # pasta temporária, apagada no fim
+        workdir = tempfile.mkdtemp(prefix="mcdc-")
+        os.environ["MCDC_OBSERVED"] = str(Path(workdir) / mcdc_recorder.LOG_FILE)
+    cache = None if config.getoption("mcdc_no_cache") else InstrumentationCache(default_cache_dir())
+    install(set(modules.values()), root, cache, collector)
+    _session = (root, modules, workdir)
+
+
+def _finish_session(config):
+    root, modules, workdir = _session
+    mcdc_recorder.flush()  # o que ficou pendente vai para o log (shards do xdist)
+    if hasattr(config, "workerinput"):
+        return  # worker do xdist: o processo principal junta os shards
+    base = Path(os.environ["MCDC_OBSERVED"])
+    # as observações deste processo já estão no recorder; faltam só as dos workers
+    for path in mcdc_recorder.shard_paths(base):
+        if path != base:
+            mcdc_recorder.load_log(path)
+    rels = {path: path.relative_to(root).as_posix() for path in modules}
+    write_reports(sorted(modules), rels, config.getoption("mcdc_report"), config.getoption("mcdc_format"))
+    if config.getoption("mcdc_minimal_tests"):
+        from mcdc_incremental import load_by_test
+        from mcdc_test_subset import write_subset_report
+        write_subset_report(*load_by_test(base), config.getoption("mcdc_minimal_tests"))
+    if workdir is not None:
+        mcdc_recorder._close_log()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+_durations = {}  # node id -> segundos (setup + chamada + teardown)
+
+
+def pytest_runtest_logreport(report):
+    if os.environ.get("MCDC_DURATIONS"):
+        _durations[report.nodeid] = _durations.get(report.nodeid, 0.0) + report.duration
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if _session is not None:
+        _finish_session(session.config)
+    if not os.environ.get("MCDC_DURATIONS") or not _durations:
+        return
+    path = Path(os.environ["MCDC_DURATIONS"])
+    worker = os.environ.get("MCDC_WORKER") or os.environ.get("PYTEST_XDIST_WORKER")
+    if worker:
+        path = path.with_name(f"{path.stem}.{worker}{path.suffix}")
+    path.write_text(json.dumps(_durations), encoding="utf-8")
+
+
+def load_durations(base):
+    """Durações gravadas por MCDC_DURATIONS em base e nos arquivos dos workers."""
+    base = Path(base)
+    durations = {}
+    for path in sorted(base.parent.glob(f"{base.stem}*{base.suffix}")):
+        durations.update(json.loads(path.read_text(encoding="utf-8")))
+    return durations
+
+
+def install(modules, root, cache=None, collector='ast', profile=False):
+    """Coloca o finder no começo do sys.meta_path e o retorna."""
+    finder = InstrumentingFinder(modules, root, cache, collector, profile)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+if os.environ.get("MCDC_MODULES"):
+    _cache = None
+    if os.environ.get("MCDC_CACHE"):
+        _cache = InstrumentationCache(os.environ["MCDC_CACHE"],
+                                      int(os.environ.get("MCDC_CACHE_MAX_BYTES", CACHE_MAX_BYTES)))
+    install(os.environ["MCDC_MODULES"].split(os.pathsep), os.environ.get("MCDC_ROOT", os.getcwd()), _cache,
+            os.environ.get("MCDC_COLLECTOR", "ast"), os.environ.get("MCDC_PROFILE") == "1")
@@ -0,0 +1,157 @@
+import ast
+import hashlib
+import json
+from pathlib import Path
+
+import mcdc_recorder
+from mcdc_tool import _decision_id, _decision_sites
+
+# VERIFICAÇÃO INCREMENTAL: o banco (um json) guarda, da última execução,
+#   scopes     escopo -> hash do AST (sem posições) da função/classe/módulo
+#   decisions  id da decisão -> escopo onde ela está
+#   test_files arquivo de teste -> hash do conteúdo
+#   tests      node id -> {id da decisão: {vetor: execuções}} observados por ele
+#   conditions id da decisão -> condições, na ordem dos bits dos vetores
+# Um teste precisa rodar de novo se é novo, se o arquivo dele mudou, ou se passou
+# por uma decisão que sumiu (o id leva linha, coluna e o texto da condição) ou que
+# está num escopo cujo AST mudou. Os outros reaproveitam as observações do banco.
+#
+# O escopo é a função (ou classe, ou o módulo) mais interna em volta da decisão, e
+# o AST dele cobre também o corpo: mudar o que roda dentro de um if reexecuta os
+# testes que passaram por ele. Mudanças fora dos escopos com decisões (um helper
+# sem if chamado pelo código testado, conftest.py) não são detectadas; nesses casos
+# rode sem --incremental, o que também reescreve o banco.
+DB_VERSION = 1
+COLLECTION = ''  # "teste" das observações feitas na coleta (imports)
+
+
+def _fingerprint(node):
+    return hashlib.sha1(ast.dump(node, include_attributes=False).encode('utf-8')).hexdigest()
+
+
+def module_scopes(tree, filename):
+    """Retorna ({escopo: hash do AST}, {id da decisão: escopo}) de um módulo."""
+    scopes = {f"{filename}:<module>": _fingerprint(tree)}
+    decisions = {}
+    sites = {id(node): _decision_id(node, filename, test) for _, node, test in _decision_sites(tree)}
+
+    def visit(node, scope, qualname):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                name = f"{qualname}.{child.name}" if qualname else child.name
+                child_scope = f"{filename}:{name}"
+                # duas definições com o mesmo nome (ex.: dentro de um if) dividem o
+                # escopo, então o hash de uma não pode apagar o da outra
+                scopes[child_scope] = hashlib.sha1(
+                    (scopes.get(child_scope, '') + _fingerprint(child)).encode('utf-8')
+                ).hexdigest()
+                visit(child, child_scope, name)
+                continue
+            if id(child) in sites:
+                decisions[sites[id(child)]] = scope
+            visit(child, scope, qualname)
+
+    visit(tree, f"{filename}:<module>", '')
+    return scopes, decisions
+
+
+def test_file_hashes(node_ids, cwd):
+    """Hash de cada arquivo de teste que aparece nos node ids (relativos a cwd)."""
+    files = {test.split("::")[0] for test in node_ids}
+    return {f: hashlib.sha1((Path(cwd) / f).read_bytes()).hexdigest() for f in sorted(files)}
+
+
+def load_by_test(base, skipped=None):
+    """Lê o log base e os shards dos workers separando as observações por teste.
+
+    Retorna ({teste: {id: {vetor: execuções}}}, {id: condições}); 'skipped' recebe
+    as chamadas puladas por saturação (ver mcdc_recorder.iter_log_by_test).
+    """
+    by_test, conditions = {}, {}
+    for path in mcdc_recorder.shard_paths(base):
+        for test, decision_id, conds, vector, count in mcdc_recorder.iter_log_by_test(path, skipped):
+            counts = by_test.setdefault(test, {}).setdefault(decision_id, {})
+            counts[vector] = counts.get(vector, 0) + count
+            conditions[decision_id] = conds
+    return by_test, conditions
+
+
+class IncrementalDB:
+    """Banco de observações por teste para a verificação incremental."""
+
+    def __init__(self, path, key):
+        self.path = Path(path)
+        # key identifica o alvo e a suíte; um banco de outra combinação é descartado
+        self.key = key
+        self.scopes, self.decisions, self.test_files = {}, {}, {}
+        self.tests, self.conditions = {}, {}
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            if data.get('version') == DB_VERSION and data.get('key') == key:
+                conditions = {d: tuple(c) for d, c in data['conditions'].items()}
+                tests = {
+                    test: {d: {int(v): n for v, n in vectors.items()} for d, vectors in observed.items()}
+                    for test, observed in data['tests'].items()
+                }
+                self.scopes, self.decisions = dict(data['scopes']), dict(data['decisions'])
+                self.test_files = dict(data['test_files'])
+                self.conditions, self.tests = conditions, tests
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass  # sem banco, ou ilegível: fica vazio e todos os testes rodam
+
+    def affected_tests(self, node_ids, scopes, decisions, test_files):
+        """Node ids (entre os coletados) que precisam rodar de novo.
+
+        COLLECTION entra no resultado quando as observações da coleta ficaram velhas.
+        """
+        changed_scopes = {s for s, h in self.scopes.items() if scopes.get(s) != h}
+        stale = {d for d, s in self.decisions.items() if d not in decisions or s in changed_scopes}
+        changed_files = {f for f, h in test_files.items() if self.test_files.get(f) != h}
+        affected = []
+        for test in [COLLECTION, *node_ids]:
+            observed = self.tests.get(test)
+            if (observed is None and test != COLLECTION) or test.split("::")[0] in changed_files \
+                    or (observed and not stale.isdisjoint(observed)):
+                affected.append(test)
+        if affected and COLLECTION not in affected:
+            # qualquer execução do pytest refaz a coleta, e com ela essas observações
+            affected.insert(0, COLLECTION)
+        return affected
+
+    def update(self, node_ids, rerun, fresh, fresh_conditions, scopes, decisions, test_files):
+        """Troca as observações dos testes que rodaram pelas novas e esquece os que sumiram."""
+        kept = {t: self.tests[t] for t in [COLLECTION, *node_ids] if t in self.tests and t not in rerun}
+        for test in rerun:
+            kept[test] = fresh.get(test, {})
+        self.tests = kept
+        self.conditions.update(fresh_conditions)
+        live = {d for observed in self.tests.values() for d in observed}
+        self.conditions = {d: c for d, c in self.conditions.items() if d in live}
+        self.scopes, self.decisions, self.test_files = scopes, decisions, test_files
+
+    def observed(self):
+        """Observações de todos os testes somadas: {id: (condições, {vetor: execuções})}."""
+        merged = {}
+        for observed in self.tests.values():
+            for decision_id, vectors in observed.items():
+                counts = merged.setdefault(decision_id, (self.conditions[decision_id], {}))[1]
+                for vector, count in vectors.items():
+                    counts[vector] = counts.get(vector, 0) + count
+        return merged
+
+    def save(self):
+        data = {
+            'version': DB_VERSION,
+            'key': self.key,
+            'scopes': self.scopes,
+            'decisions': self.decisions,
+            'test_files': self.test_files,
+            'conditions': {d: list(c) for d, c in self.conditions.items()},
+            'tests': {
+                test: {d: {str(v): n for v, n in vectors.items()} for d, vectors in observed.items()}
+                for test, observed in self.tests.items()
+            },
+        }
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps(data), encoding='utf-8')
+        tmp.replace(self.path)
@@ -0,0 +1,247 @@
+import random
+import time
+
+# Busca o menor conjunto de linhas da tabela verdade compilada (ver _build_truth_table
+# em mcdc_tool.py) que ainda tem um par de independência para cada condição coberta.
+# A linha r usa a mesma convenção do mcdc_tool: a condição i vale True quando o bit
+# (n-1-i) de r é 0, então o par de r para a condição i é r com esse bit invertido.
+#
+# Limite inferior: os pares escolhidos formam um grafo sobre as linhas, com uma aresta
+# em cada dimensão coberta. Um ciclo no hipercubo usa cada dimensão um número par de
+# vezes, então k arestas de dimensões distintas formam uma floresta e precisam de pelo
+# menos k+1 linhas. É o famoso "N+1 casos" do MC/DC.
+
+# Até esse número de condições o conjunto é buscado de forma exata (branch and bound),
+# acima disso só a heurística gulosa com reaproveitamento de linhas
+EXACT_MAX_CONDITIONS = 10
+
+
+def _outcome(table, row):
+    return (table >> row) & 1
+
+def _isolating_rows(table, columns, n, i):
+    """Bitset das linhas (com a condição i True) cujo par para i muda o resultado."""
+    shift = 1 << (n - 1 - i)
+    return (table ^ (table >> shift)) & columns[i]
+
+def _is_satisfied(chosen, outcomes, shift):
+    """Verifica se as linhas escolhidas já contêm um par para a condição de 'shift'."""
+    for row in chosen:
+        partner = row ^ shift
+        if partner in chosen and outcomes[row] != outcomes[partner]:
+            return True
+    return False
+
+
+class _Outcomes(dict):
+    """Cache preguiçoso do resultado de cada linha, para não deslocar a tabela toda vez."""
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+
+    def __missing__(self, row):
+        value = self[row] = _outcome(self.table, row)
+        return value
+
+
+def _greedy_cover(table, columns, n, targets, outcomes, rng=None):
+    """Escolhe um par por condição, preferindo pares que reaproveitam linhas já escolhidas."""
+    chosen = set()
+    pending = list(targets)
+    if rng is not None:
+        rng.shuffle(pending)
+    for i in pending:
+        shift = 1 << (n - 1 - i)
+        if _is_satisfied(chosen, outcomes, shift):
+            continue
+        # custo 1: uma linha já escolhida cujo par para i muda o resultado; entre as
+        # opções, fica a que também fecha mais pares de outras condições pendentes
+        best, best_gain = None, -1
+        for row in sorted(chosen):
+            partner = row ^ shift
+            if outcomes[row] == outcomes[partner]:
+                continue
+            gain = 0
+            for j in pending:
+                other = partner ^ (1 << (n - 1 - j))
+                if j != i and other in chosen and outcomes[other] != outcomes[partner]:
+                    gain += 1
+            if gain > best_gain:
+                best, best_gain = partner, gain
+        if best is not None:
+            chosen.add(best)
+            continue
+        # custo 2: nenhuma linha serve, pega um par novo (o primeiro, ou a partir de
+        # uma posição aleatória nas tentativas seguintes)
+        rows = _isolating_rows(table, columns, n, i)
+        start = rng.randrange(1 << n) if rng is not None else 0
+        tail = rows >> start
+        if tail:
+            row = start + (tail & -tail).bit_length() - 1
+        else:
+            row = (rows & -rows).bit_length() - 1
+        chosen.update((row, row | shift))
+    return chosen
+
+
+def _exact_cover(table, columns, n, targets, outcomes, lower, best, deadline):
+    """Branch and bound sobre os pares de cada condição; retorna (melhor, terminou)."""
+    candidates = {}
+    for i in targets:
+        shift = 1 << (n - 1 - i)
+        rows = _isolating_rows(table, columns, n, i)
+        candidates[i] = [(r, r | shift) for r in range(1 << n) if (rows >> r) & 1]
+    state = {"best": best, "finished": True}
+
+    def search(chosen):
+        if time.perf_counter() > deadline:
+            state["finished"] = False
+            return
+        pending = [i for i in targets if not _is_satisfied(chosen, outcomes, 1 << (n - 1 - i))]
+        if not pending:
+            if len(chosen) < len(state["best"]):
+                state["best"] = set(chosen)
+            return
+        if max(len(chosen) + 1, lower) >= len(state["best"]):
+            return
+        # ramifica pela condição com menos pares possíveis, tentando antes os
+        # pares que acrescentam menos linhas novas
+        i = min(pending, key=lambda j: len(candidates[j]))
+        for pair in sorted(candidates[i], key=lambda p: len(set(p) - chosen)):
+            search(chosen | set(pair))
+            if len(state["best"]) <= lower or not state["finished"]:
+                return
+
+    search(frozenset())
+    return state["best"], state["finished"]
+
+
+def minimize_mcdc_rows(table, columns, n, time_budget=2.0):
+    """Retorna (linhas, condições cobertas, limite inferior, ótimo comprovado).
+
+    As condições cobertas são índices em 'columns'. Para até EXACT_MAX_CONDITIONS
+    condições a busca é exata dentro de time_budget segundos; acima disso, ou se o
+    tempo acabar, fica o melhor conjunto achado pela heurística gulosa com reinícios.
+    """
+    deadline = time.perf_counter() + time_budget
+    targets = [i for i in range(n) if _isolating_rows(table, columns, n, i)]
+    if not targets:
+        return set(), set(), 0, True
+    lower = len(targets) + 1
+    outcomes = _Outcomes(table)
+
+    best = _greedy_cover(table, columns, n, targets, outcomes)
+    optimal = len(best) == lower
+    if optimal:
+        return best, set(targets), lower, True
+    if n <= EXACT_MAX_CONDITIONS:
+        # a heurística não bateu o limite inferior, então a busca exata decide
+        best, optimal = _exact_cover(table, columns, n, targets, outcomes, lower, best, deadline)
+    else:
+        # grande demais para a busca exata: reinicia a heurística com outras ordens
+        # de condições e outros pares iniciais enquanto houver tempo
+        rng = random.Random(0)
+        while len(best) > lower and time.perf_counter() < deadline:
+            candidate = _greedy_cover(table, columns, n, targets, outcomes, rng)
+            if len(candidate) < len(best):
+                best = candidate
+    return best, set(targets), lower, optimal or len(best) == lower
+
+
+def complete_mcdc_rows(table, columns, n, observed, targets, time_budget=2.0):
+    """Linhas novas que, junto com os vetores observados, dão par às condições 'targets'.
+
+    observed: vetores já vistos como (avaliadas, valores, resultado), com o bit i das
+    máscaras para a condição i (a convenção do recorder). Retorna ([(linha, condições
+    a que ela dá par)], condições sem par possível na decisão). Começa guloso como a
+    _greedy_cover, tirando no fim toda linha que ficou sobrando; até
+    EXACT_MAX_CONDITIONS condições uma busca exata dentro de time_budget segundos
+    troca o resultado pelo menor conjunto, acima disso ele é só uma aproximação.
+    """
+    deadline = time.perf_counter() + time_budget
+    full = (1 << (1 << n)) - 1
+    outcomes = _Outcomes(table)
+    impossible = {i for i in targets if not _isolating_rows(table, columns, n, i)}
+    pending = [i for i in targets if i not in impossible]
+    shifts = {i: 1 << (n - 1 - i) for i in pending}
+    # par com um vetor observado: uma linha igual a ele nas condições avaliadas, menos
+    # em i, e com o resultado oposto. As linhas iguais ao vetor formam um subcubo da
+    # tabela, e inverter i é deslocar o subcubo inteiro de 'shift'
+    with_observed = dict.fromkeys(pending, 0)
+    pending_mask = sum(1 << i for i in pending)
+    for evaluated, values, result in observed:
+        if not evaluated & pending_mask:
+            continue
+        cube = full
+        for j in range(n):
+            if evaluated >> j & 1:
+                cube &= columns[j] if values >> j & 1 else full ^ columns[j]
+        opposite = full ^ table if result else table
+        for i in pending:
+            if evaluated >> i & 1:
+                flipped = cube << shifts[i] if values >> i & 1 else cube >> shifts[i]
+                with_observed[i] |= flipped & opposite
+
+    def pairs(row, rows, i):
+        partner = row ^ shifts[i]
+        return with_observed[i] >> row & 1 or (partner in rows and outcomes[row] != outcomes[partner])
+
+    def covered(i, rows):
+        return any(pairs(row, rows, i) for row in rows)
+
+    chosen = []
+    targets = list(pending)
+    while pending:
+        # interseção das linhas que fecham um par para cada pendente, enquanto ela
+        # não fica vazia: uma linha que serve a várias condições de uma vez
+        best = 0
+        for i in pending:
+            rows = with_observed[i]
+            for row in chosen:
+                if outcomes[row] != outcomes[row ^ shifts[i]]:
+                    rows |= 1 << (row ^ shifts[i])
+            if rows and (not best or best & rows):
+                best = best & rows if best else rows
+        if best:
+            chosen.append((best & -best).bit_length() - 1)
+        else:
+            # nenhuma linha sozinha fecha um par: entra um par novo inteiro
+            rows = _isolating_rows(table, columns, n, pending[0])
+            row = (rows & -rows).bit_length() - 1
+            chosen += [row, row | shifts[pending[0]]]
+        pending = [i for i in pending if not covered(i, chosen)]
+    for row in reversed(list(chosen)):
+        rest = [r for r in chosen if r != row]
+        if all(covered(i, rest) for i in targets):
+            chosen = rest
+    if n <= EXACT_MAX_CONDITIONS and len(chosen) > 1:
+        # cada condição fecha com uma linha que faz par com um vetor observado ou com
+        # um par novo da tabela; branch and bound como a _exact_cover, partindo da
+        # solução gulosa. Com uma linha só não há o que melhorar
+        candidates = {}
+        for i in targets:
+            rows = with_observed[i]
+            isolating = _isolating_rows(table, columns, n, i)
+            candidates[i] = ([(r,) for r in range(1 << n) if rows >> r & 1]
+                             + [(r, r | shifts[i]) for r in range(1 << n) if isolating >> r & 1])
+        state = {"best": chosen}
+
+        def search(rows):
+            if time.perf_counter() > deadline:
+                return
+            missing = [i for i in targets if not covered(i, rows)]
+            if not missing:
+                if len(rows) < len(state["best"]):
+                    state["best"] = sorted(rows)
+                return
+            if len(rows) + 1 >= len(state["best"]):
+                return
+            i = min(missing, key=lambda j: len(candidates[j]))
+            for option in sorted(candidates[i], key=lambda o: len(set(o) - rows)):
+                search(rows | set(option))
+                if len(state["best"]) == 1:
+                    return
+
+        search(frozenset())
+        chosen = state["best"]
+    return [(row, [i for i in targets if pairs(row, chosen, i)]) for row in chosen], impossible
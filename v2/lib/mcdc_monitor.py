@@ -0,0 +1,284 @@
+import ast
+import dis
+import sys
+
+import mcdc_recorder
+from mcdc_tool import CompiledDecision, _decision_id, _decision_sites
+
+# COLETA POR sys.monitoring (PEP 669, Python 3.12+): o módulo é compilado sem
+# instrumentação e cada condição é reconhecida no bytecode pelo salto condicional
+# que o compilador gera para ela. O evento BRANCH diz qual salto foi executado e
+# para onde foi; o destino diz o valor da condição e qual é o próximo passo da
+# decisão (outra condição ou o resultado), então (avaliadas, valores, resultado)
+# sai sem nenhuma sonda no código. Quando todas as decisões de um code object já
+# mostraram todos os vetores que o curto-circuito permite, os eventos desta ferramenta
+# são desligados naquele code object (set_local_events), que passa a rodar sem evento
+# nenhum; enquanto só parte delas saturou, os saltos das saturadas ainda chamam o
+# callback, que retorna na hora.
+#
+# O mapeamento depende da forma do bytecode: decisões que não se encaixam (ex.:
+# comparações encadeadas, que saltam para dentro da própria condição) ficam de fora
+# e o loader as instrumenta pelo AST, como no modo normal (ver mcdc_import_hook).
+# O resultado sai do destino do último salto (dentro do corpo = True), então só if,
+# while e expressões condicionais são seguidos pelo bytecode; assert, filtros de
+# comprehension e atribuições booleanas vão sempre para o AST.
+#
+# Depois da saturação as execuções não são mais contadas: o recorder para de somar
+# execuções daquela decisão. A saturação também vale quando o recorder já vê MC/DC na
+# decisão, e recomeça a cada teste, como a do recorder, para que cada teste ainda
+# grave os seus vetores: na troca de teste só os code objects desligados aqui são
+# religados. sys.monitoring.restart_events() não é usado, pois religaria também os
+# eventos desligados por outras ferramentas (coverage.py, profilers) no processo.
+
+# instruções que só levam adiante ao procurar o destino real de um salto
+_PASS_THROUGH = {'NOP', 'NOT_TAKEN', 'JUMP', 'JUMP_FORWARD', 'JUMP_BACKWARD',
+                 'JUMP_NO_INTERRUPT', 'JUMP_BACKWARD_NO_INTERRUPT'}
+
+
+def _span(node):
+    return (node.lineno, node.end_lineno, node.col_offset, node.end_col_offset)
+
+
+class _Site:
+    """Uma decisão com o grafo de curto-circuito das suas folhas.
+
+    Folha é cada condição (com um bit em 'keys', como no Instrumenter) ou uma
+    constante no meio de and/or/not, que não tem bit.
+    Passo é ('cond', folha) ou ('out', resultado).
+    """
+
+    def __init__(self, kind, node, test, filename):
+        self.decision_id = _decision_id(node, filename, test)
+        self.node = node
+        decision = CompiledDecision(test)
+        self.keys = tuple(decision.conditions)
+        self._leaf_index = decision.leaf_index
+        self.leaves, self.bits, self.succ = [], [], []
+        self.first = self._wire(test, ('out', True), ('out', False))[1]
+        self._body = None
+        if kind in ('if', 'while'):
+            body = node.body
+            self._body = ((body[0].lineno, body[0].col_offset), (body[-1].end_lineno, body[-1].end_col_offset))
+        elif kind == 'ifexp':
+            self._body = ((node.body.lineno, node.body.col_offset), (node.body.end_lineno, node.body.end_col_offset))
+        self.possible = decision.short_circuit_vectors()
+        self.vector_count = None if self.possible is None else len(self.possible)
+        self.seen = set()
+        self.saturated = False
+        self.states = {}  # id do frame -> [avaliadas, valores] da execução em curso
+
+    def _wire(self, e, on_true, on_false):
+        """Liga as folhas de 'e' aos passos seguintes; retorna o passo inicial de 'e'."""
+        if isinstance(e, ast.BoolOp):
+            step = None
+            for v in reversed(e.values):
+                if step is None:
+                    step = self._wire(v, on_true, on_false)
+                elif isinstance(e.op, ast.And):
+                    step = self._wire(v, step, on_false)
+                else:
+                    step = self._wire(v, on_true, step)
+            return step
+        if isinstance(e, ast.UnaryOp) and isinstance(e.op, ast.Not):
+            return self._wire(e.operand, on_false, on_true)
+        self.leaves.append(e)
+        index = self._leaf_index.get(id(e))
+        self.bits.append(0 if index is None else 1 << index)
+        self.succ.append({True: on_true, False: on_false})
+        return ('cond', len(self.leaves) - 1)
+
+    def step_at(self, instructions, offset):
+        """Passo da decisão que começa na instrução 'offset' do bytecode."""
+        ins = instructions.get(offset)
+        while ins is not None and ins.opname in _PASS_THROUGH:
+            target = ins.argval if 'JUMP' in ins.opname else None
+            ins = instructions.get(target) if target is not None else instructions.get(('next', ins.offset))
+        if ins is None or ins.positions is None or ins.positions.lineno is None:
+            return None
+        pos = ins.positions
+        for index, leaf in enumerate(self.leaves):
+            if (leaf.lineno, leaf.col_offset) <= (pos.lineno, pos.col_offset) \
+                    and (pos.end_lineno, pos.end_col_offset) <= (leaf.end_lineno, leaf.end_col_offset):
+                return ('cond', index)
+        start, end = self._body
+        return ('out', start <= (pos.lineno, pos.col_offset) <= end)
+
+
+def decision_sites(tree, filename):
+    """As decisões do módulo que o verificador também conhece (com condições)."""
+    sites = [_Site(kind, node, test, filename) for kind, node, test in _decision_sites(tree)]
+    return [site for site in sites if site.keys]
+
+
+def _code_objects(code):
+    yield code
+    for const in code.co_consts:
+        if isinstance(const, type(code)):
+            yield from _code_objects(const)
+
+
+def analyze(code, sites):
+    """Casa os saltos condicionais do bytecode com as folhas das decisões.
+
+    Retorna ([(code, {offset do salto: (site, folha, {destino: valor})})], ids das
+    decisões que não deu para mapear). Lista e não dict: code objects se comparam
+    por valor, e duas funções idênticas não podem dividir a mesma entrada.
+    """
+    by_span = {}
+    broken = {site for site in sites if site._body is None}
+    for site in sites:
+        if site in broken:
+            continue
+        for index, leaf in enumerate(site.leaves):
+            by_span[_span(leaf)] = (site, index)
+    mapped = {site: set() for site in sites}
+    table = []
+    for co in _code_objects(code):
+        listing = list(dis.get_instructions(co))
+        instructions = {ins.offset: ins for ins in listing}
+        for ins, following in zip(listing, listing[1:]):
+            instructions[('next', ins.offset)] = following
+        branches = {}
+        for ins, following in zip(listing, listing[1:]):
+            if not ins.opname.startswith('POP_JUMP_IF') or ins.positions is None:
+                continue
+            pos = ins.positions
+            hit = by_span.get((pos.lineno, pos.end_lineno, pos.col_offset, pos.end_col_offset))
+            if hit is None:
+                continue
+            site, index = hit
+            taken = site.step_at(instructions, ins.argval)
+            fallthrough = site.step_at(instructions, following.offset)
+            succ = site.succ[index]
+            if taken == fallthrough or {taken, fallthrough} != {succ[True], succ[False]}:
+                broken.add(site)
+                continue
+            value = succ[True] == taken
+            branches[ins.offset] = (site, index, {ins.argval: value, following.offset: not value})
+            mapped[site].add(index)
+        if branches:
+            table.append((co, branches))
+    unsupported = {site.decision_id for site in sites
+                   if site in broken or len(mapped[site]) < len(site.leaves)}
+    table = [
+        (co, {off: entry for off, entry in branches.items() if entry[0].decision_id not in unsupported})
+        for co, branches in table
+    ]
+    return [(co, branches) for co, branches in table if branches], unsupported
+
+
+# --- coleta ---
+
+_branches = {}   # id(code) -> {offset: (site, folha, {destino: valor})}
+_watched = []    # mantém os code objects vivos enquanto os ids estão em _branches
+_sites = set()
+_code_sites = {}  # id(code) -> decisões mapeadas nele
+_site_codes = {}  # decisão -> code objects com saltos dela
+_disabled = {}    # id(code) -> code objects desligados até a próxima troca de teste
+_tool = None
+
+
+def _on_branch(code, offset, dest):
+    branches = _branches.get(id(code))
+    entry = branches.get(offset) if branches is not None else None
+    if entry is None:
+        return sys.monitoring.DISABLE  # salto fora das decisões: nunca mais interessa
+    if entry[0].saturated:
+        return None
+    site, leaf, values = entry
+    value = values.get(dest)
+    if value is None:
+        return None
+    frame = id(sys._getframe(1))
+    if leaf == site.first:
+        state = [0, 0]
+    else:
+        state = site.states.get(frame)
+        if state is None:
+            return None  # execução que começou antes do monitoramento
+    bit = site.bits[leaf]
+    state[0] |= bit
+    if value:
+        state[1] |= bit
+    kind, target = site.succ[leaf][value]
+    if kind == 'cond':
+        site.states[frame] = state
+        return None
+    site.states.pop(frame, None)
+    mcdc_recorder.record_call(site.decision_id, site.keys, target, state[0], state[1], site.vector_count)
+    if site.possible is not None:
+        site.seen.add((state[0], state[1], target))
+    if mcdc_recorder.is_saturated(site.decision_id) or site.seen == site.possible:
+        site.saturated = True
+        _switch_off(site)
+    return None
+
+
+def _switch_off(site):
+    # desliga os code objects em que todas as decisões já saturaram
+    for code in _site_codes[site]:
+        if id(code) not in _disabled and all(s.saturated for s in _code_sites[id(code)]):
+            sys.monitoring.set_local_events(_tool, code, 0)
+            _disabled[id(code)] = code
+
+
+def _restart():
+    # troca de teste: religa o que foi desligado e esquece o que o teste anterior viu
+    for site in _sites:
+        site.saturated = False
+        site.seen.clear()
+        site.states.clear()
+    for code in _disabled.values():
+        sys.monitoring.set_local_events(_tool, code, _event_mask())
+    _disabled.clear()
+
+
+def start():
+    """Reserva um id de ferramenta do sys.monitoring e registra o callback de BRANCH."""
+    global _tool
+    if sys.version_info < (3, 12):
+        raise RuntimeError("a coleta por sys.monitoring precisa do Python 3.12 ou mais novo")
+    if _tool is not None:
+        return
+    monitoring = sys.monitoring
+    # DEBUGGER_ID, COVERAGE_ID e PROFILER_ID ficam para as ferramentas a que foram
+    # reservados: tomar o COVERAGE_ID quebraria o coverage.py (COVERAGE_CORE=sysmon,
+    # pytest-cov) rodando junto
+    for tool in (3, 4, monitoring.OPTIMIZER_ID):
+        if monitoring.get_tool(tool) is None:
+            monitoring.use_tool_id(tool, "mcdc")
+            break
+    else:
+        raise RuntimeError("nenhum id de ferramenta do sys.monitoring livre")
+    for event in _branch_events():
+        monitoring.register_callback(tool, event, _on_branch)
+    mcdc_recorder._test_listeners.append(_restart)
+    _tool = tool
+
+
+def _branch_events():
+    events = sys.monitoring.events
+    # 3.14 separa BRANCH em BRANCH_LEFT/BRANCH_RIGHT, com o mesmo callback
+    if hasattr(events, 'BRANCH_LEFT'):
+        return [events.BRANCH_LEFT, events.BRANCH_RIGHT]
+    return [events.BRANCH]
+
+
+def _event_mask():
+    mask = 0
+    for event in _branch_events():
+        mask |= event
+    return mask
+
+
+def watch(table):
+    """Liga os eventos de desvio nos code objects mapeados por analyze()."""
+    for code, branches in table:
+        _branches[id(code)] = branches
+        sites = {entry[0] for entry in branches.values()}
+        _sites.update(sites)
+        _code_sites[id(code)] = sites
+        for site in sites:
+            _site_codes.setdefault(site, []).append(code)
+        _watched.append(code)
+        sys.monitoring.set_local_events(_tool, code, _event_mask())
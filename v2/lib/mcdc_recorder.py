@@ -1,20 +1,463 @@
-import atexit, json
+import atexit, os, struct, time
 from pathlib import Path
 
-_observed = []
+# Para cada decisão (pelo id estável que o instrumentador gera) guarda só os vetores
+# distintos já vistos, empacotados num int, e quantas vezes cada um ocorreu.
+# Layout do vetor para n condições: bit 0 = resultado, bits 1..n = valores das
+# condições, bits n+1..2n = quais condições foram avaliadas. A memória cresce com
+# o número de vetores distintos, não com o número de execuções.
+_observed = {}
+# textos das condições de cada decisão, na ordem dos bits do vetor
+_conditions = {}
 
-def record_call(assignments, result):
-    _observed.append((assignments.copy(), result))
+# LOG BINÁRIO: as observações vão sendo anexadas em LOG_FILE (ou no caminho da
+# variável de ambiente MCDC_OBSERVED) durante a execução, em vez de um json.dumps
+# de tudo no fim. Formato: cabeçalho LOG_MAGIC e depois registros
+#   <tipo: B> <tamanho do conteúdo: I> <conteúdo>
+# tipo 1 (decisão): <len: H> id, <n: H>, n x (<len: H> texto da condição)
+# tipo 2 (vetor):   <índice da decisão: I> <execuções: Q> <vetor: int little-endian>
+# tipo 3 (teste):   node id do teste (utf-8) a que os vetores seguintes pertencem
+# tipo 6 (teste):   <índice do teste: I>, para um teste que já teve registro tipo 3
+# tipo 4 (puladas): <índice da decisão: I> <chamadas: Q> puladas por saturação
+# tipo 5 (perfil):  <índice da decisão: I> <chamadas: Q> <ns no teste: Q> <ns no recorder: Q>
+# O índice da decisão é a ordem em que os registros tipo 1 aparecem no arquivo (e o
+# do teste a dos registros tipo 3), e
+# as execuções são incrementos (o leitor soma). Cada vetor novo é escrito e o
+# arquivo descarregado na hora, então um crash só perde contagens, nunca vetores;
+# as contagens pendentes são gravadas a cada FLUSH_INTERVAL segundos e no fim.
+LOG_FILE = 'observed.mcdc'
+LOG_MAGIC = b'MCDC\x01'
+FLUSH_INTERVAL = 1.0
+_RECORD = struct.Struct('<BI')
+_VECTOR = struct.Struct('<IQ')
+_PROFILE_RECORD = struct.Struct('<IQQQ')
+_TEST_INDEX = struct.Struct('<I')
+_DECISION, _VECTOR_COUNT, _TEST, _SKIPPED, _PROFILE, _TEST_REF = 1, 2, 3, 4, 5, 6
+
+_log = None
+_log_index = {}     # id da decisão -> índice no log
+_test_index = {}    # node id do teste -> índice no log
+_written = {}       # (id, vetor) -> execuções já gravadas
+_last_flush = 0.0
+# ATRIBUIÇÃO POR TESTE: o plugin do pytest avisa qual teste está rodando (set_test).
+# Não custa nada no record_call: na troca de teste as contagens pendentes são
+# descarregadas e um registro tipo 3 marca o teste dos vetores que vêm depois dele.
+# O node id vai para o log uma vez só; quando o teste volta (ex.: o '' entre dois
+# testes), basta o índice dele num registro tipo 6.
+# Observações fora de um teste (imports na coleta) ficam com o teste ''
+_current_test = ''
+_logged_test = ''
+_test_listeners = []   # chamados a cada troca de teste (ex.: o coletor sys.monitoring)
+
+# SATURAÇÃO: depois que uma decisão já mostrou no teste atual todos os vetores que o
+# curto-circuito dela permite (no máximo 2^n; 'possible', que o instrumentador e o
+# coletor sys.monitoring tiram de CompiledDecision.short_circuit_vectors), record_call vira um caminho rápido que só conta a chamada pulada: não
+# há vetor novo a perder. O estado é por teste e recomeça em set_test, para que cada
+# teste grave cada vetor distinto que ele produz (a atribuição por teste depende
+# disso); execuções puladas não entram nas contagens do log.
+# Com MCDC_SATURATION=1 (opcional) a decisão satura também assim que tem MC/DC no
+# teste (todas as condições com par). É mais rápido, mas os vetores novos que o teste
+# produz depois disso não são gravados, e os "Casos Observados" do relatório passam
+# a depender da ordem dos testes.
+SATURATION = os.environ.get('MCDC_SATURATION', '0') == '1'
+_saturated = {}        # id -> chamadas puladas no teste atual
+_test_vectors = {}     # id -> vetores vistos no teste atual
+_test_covered = {}     # id -> bits das condições com par MC/DC no teste atual
+_skipped = {}          # id -> chamadas puladas nos testes anteriores
+
+# AMOSTRAGEM das repetições, para decisões quentes que não saturam: a primeira
+# ocorrência de cada vetor em cada teste é sempre gravada (nenhum vetor distinto se
+# perde, nem a atribuição por teste); das repetições, só uma a cada SAMPLE_EVERY
+# (MCDC_SAMPLE_EVERY) ou uma a cada SAMPLE_INTERVAL segundos (MCDC_SAMPLE_INTERVAL)
+# por decisão é contada, levando o peso das repetições puladas desde a anterior.
+# O total de execuções de cada decisão se mantém (menos as repetições puladas depois
+# da última amostra de cada teste); a divisão dele entre os vetores repetidos vira
+# uma estimativa.
+SAMPLE_EVERY = int(os.environ.get('MCDC_SAMPLE_EVERY', '1'))
+SAMPLE_INTERVAL = float(os.environ.get('MCDC_SAMPLE_INTERVAL', '0'))
+_unsampled = {}        # id -> repetições puladas desde a última amostra
+_next_sample = {}      # id -> instante (perf_counter) da próxima amostra
+
+# PERFIL (run_and_verify --profile): o instrumentador troca record_call por
+# profile_call, que recebe também uma leitura do relógio feita antes do teste da
+# decisão rodar. Por decisão ficam as chamadas (inclusive as puladas por saturação),
+# o tempo do teste (condições com as sondas de bits) e o tempo dentro do recorder;
+# vão para o log como incrementos tipo 5 a cada descarga.
+clock = time.perf_counter_ns
+_profile = {}          # id -> [chamadas, ns no teste, ns no recorder] ainda não gravados
+
+# EXECUÇÃO PARALELA: cada processo de teste grava o seu próprio shard do log, com o
+# id do worker no nome (observed.<worker>.mcdc). O id vem de MCDC_WORKER (workers
+# do run_and_verify) ou de PYTEST_XDIST_WORKER (pytest-xdist); um processo criado
+# por fork ganha também o pid, para não escrever no arquivo do pai
+_fork_suffix = ''
+
+def _log_path():
+    path = Path(os.environ.get('MCDC_OBSERVED', LOG_FILE))
+    worker = os.environ.get('MCDC_WORKER') or os.environ.get('PYTEST_XDIST_WORKER')
+    worker = '.'.join(part for part in (worker, _fork_suffix) if part)
+    if worker:
+        path = path.with_name(f"{path.stem}.{worker}{path.suffix}")
+    return path
+
+def _reset_after_fork():
+    # o filho herda o arquivo e as contagens do pai; esquece os dois e recomeça
+    # num shard próprio (o buffer do arquivo herdado está sempre vazio, pois toda
+    # escrita termina em flush)
+    global _log, _fork_suffix, _logged_test
+    _log = None
+    _logged_test = ''
+    _fork_suffix = f"pid{os.getpid()}"
+    _observed.clear()
+    _conditions.clear()
+    _log_index.clear()
+    _test_index.clear()
+    _written.clear()
+    _reset_saturation()
+    _skipped.clear()
+    _profile.clear()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def record_call(decision_id, conditions, result, evaluated, values, possible=None):
+    """Grava uma execução da decisão e devolve o resultado intacto para o if.
+
+    conditions são os textos das condições (em ordem); o bit i de 'evaluated' diz se
+    a condição i chegou a ser avaliada (o curto-circuito pode pular) e o bit i de
+    'values' o valor dela. Condições não avaliadas ficam como None (masking MC/DC).
+    possible é quantos vetores distintos a decisão pode produzir (None = 2^n).
+    """
+    skipped = _saturated.get(decision_id)
+    if skipped is not None:
+        _saturated[decision_id] = skipped + 1
+        return result
+    n = len(conditions)
+    vector = ((evaluated << n | values) << 1) | (1 if result else 0)
+    seen = _test_vectors.get(decision_id)
+    if seen is None:
+        seen = _test_vectors[decision_id] = set()
+    elif vector in seen:
+        # repetição no teste atual: nada de novo para o MC/DC, só a contagem
+        weight = 1
+        if SAMPLE_EVERY > 1 or SAMPLE_INTERVAL:
+            weight = _unsampled.get(decision_id, 0) + 1
+            if SAMPLE_INTERVAL:
+                # o relógio só é lido a cada 32 repetições, para não custar mais que a contagem
+                if weight & 31 or time.perf_counter() < _next_sample.get(decision_id, 0.0):
+                    _unsampled[decision_id] = weight
+                    return result
+                _next_sample[decision_id] = time.perf_counter() + SAMPLE_INTERVAL
+            elif weight < SAMPLE_EVERY:
+                _unsampled[decision_id] = weight
+                return result
+            _unsampled[decision_id] = 0
+        _observed[decision_id][vector] += weight
+        return result
+    counts = _observed.get(decision_id)
+    if counts is None:
+        counts = _observed[decision_id] = {}
+        _conditions[decision_id] = conditions
+    count = counts.get(vector)
+    if count is None:
+        counts[vector] = 1
+        _log_new_vector(decision_id, vector)
+    else:
+        counts[vector] = count + 1
+    if possible is None:
+        possible = 1 << n
+    if SATURATION:
+        _track_coverage(decision_id, n, seen, vector, possible)
+    else:
+        # o MC/DC por teste só serve para saturar; sem ele, satura só com todos os vetores
+        seen.add(vector)
+        if len(seen) >= possible:
+            _saturated[decision_id] = 0
+    return result
+
+def profile_call(decision_id, conditions, start, result, evaluated, values, possible=None):
+    """record_call com medição: start é clock() lido antes do teste da decisão."""
+    tested = clock()
+    result = record_call(decision_id, conditions, result, evaluated, values, possible)
+    entry = _profile.get(decision_id)
+    if entry is None:
+        entry = _profile[decision_id] = [0, 0, 0]
+    entry[0] += 1
+    entry[1] += tested - start
+    entry[2] += clock() - tested
+    return result
+
+def pair_bits(n, vector, others):
+    """Bits das condições que 'vector' isola junto com algum dos 'others' (masking MC/DC).
+
+    Mesma regra do _find_mcdc_pairs, sobre vetores empacotados: resultados diferentes
+    e, nas condições avaliadas pelos dois vetores, só uma muda de valor.
+    """
+    covered = 0
+    outcome, values = vector & 1, vector >> 1
+    evaluated = values >> n
+    for other in others:
+        if other & 1 == outcome:
+            continue
+        other_values = other >> 1
+        diff = (values ^ other_values) & evaluated & (other_values >> n)
+        if diff and not diff & (diff - 1):
+            covered |= diff
+    return covered
+
+def _track_coverage(decision_id, n, seen, vector, possible):
+    """Atualiza o MC/DC do teste atual com um vetor novo e marca a saturação."""
+    covered = _test_covered.get(decision_id, 0)
+    covered |= pair_bits(n, vector, seen)
+    seen.add(vector)
+    _test_covered[decision_id] = covered
+    if covered == (1 << n) - 1 or len(seen) >= possible:
+        _saturated[decision_id] = 0
+
+def _reset_saturation():
+    _move_skipped()
+    _saturated.clear()
+    _test_vectors.clear()
+    _test_covered.clear()
+    _unsampled.clear()
+    _next_sample.clear()
+
+def _move_skipped():
+    """Passa as chamadas puladas do teste atual para _skipped (e para o log, se aberto)."""
+    for decision_id, skipped in _saturated.items():
+        if not skipped:
+            continue
+        _skipped[decision_id] = _skipped.get(decision_id, 0) + skipped
+        _saturated[decision_id] = 0
+        if _log is not None:
+            index = _log_index.get(decision_id)
+            if index is None:
+                index = _log_decision(decision_id)
+            _write_record(_SKIPPED, _VECTOR.pack(index, skipped))
+
+def is_saturated(decision_id):
+    return decision_id in _saturated
+
+def get_skipped():
+    """Chamadas puladas por decisão saturada: {id da decisão: chamadas}."""
+    skipped = dict(_skipped)
+    for decision_id, count in _saturated.items():
+        skipped[decision_id] = skipped.get(decision_id, 0) + count
+    return {decision_id: count for decision_id, count in skipped.items() if count}
+
+def set_test(test_id):
+    """Passa a atribuir as próximas observações ao teste 'test_id' ('' = nenhum)."""
+    global _current_test
+    if test_id == _current_test:
+        return
+    flush()  # o que foi contado até aqui é do teste anterior
+    _reset_saturation()
+    _current_test = test_id
+    for listener in _test_listeners:
+        listener()
+
+def decode_vector(conditions, vector):
+    """Desempacota um vetor gravado em (assignments, resultado)."""
+    n = len(conditions)
+    values = vector >> 1
+    evaluated = values >> n
+    assignments = {
+        c: bool(values >> i & 1) if evaluated >> i & 1 else None
+        for i, c in enumerate(conditions)
+    }
+    return assignments, bool(vector & 1)
 
 def get_observed():
-    return list(_observed)
+    """Forma compacta: {id da decisão: (condições, {vetor empacotado: execuções})}."""
+    return {
+        decision_id: (_conditions[decision_id], dict(counts))
+        for decision_id, counts in _observed.items()
+    }
+
+def clear():
+    _observed.clear()
+    _conditions.clear()
+    _reset_saturation()
+    _skipped.clear()
+    _profile.clear()
+
+def _merge(decision_id, conditions, vector, count):
+    counts = _observed.get(decision_id)
+    if counts is None:
+        counts = _observed[decision_id] = {}
+        _conditions[decision_id] = tuple(conditions)
+    counts[vector] = counts.get(vector, 0) + count
+
+# --- escrita do log ---
+
+def _write_record(kind, payload):
+    _log.write(_RECORD.pack(kind, len(payload)))
+    _log.write(payload)
+
+def _log_decision(decision_id):
+    index = _log_index[decision_id] = len(_log_index)
+    parts = [struct.pack('<H', len(decision_id.encode('utf-8'))), decision_id.encode('utf-8'),
+             struct.pack('<H', len(_conditions[decision_id]))]
+    for cond in _conditions[decision_id]:
+        text = cond.encode('utf-8')
+        parts.append(struct.pack('<H', len(text)))
+        parts.append(text)
+    _write_record(_DECISION, b''.join(parts))
+    return index
+
+def _log_vector(decision_id, vector, count):
+    global _logged_test
+    if _logged_test != _current_test:
+        test_index = _test_index.get(_current_test)
+        if test_index is None:
+            _test_index[_current_test] = len(_test_index)
+            _write_record(_TEST, _current_test.encode('utf-8'))
+        else:
+            _write_record(_TEST_REF, _TEST_INDEX.pack(test_index))
+        _logged_test = _current_test
+    index = _log_index.get(decision_id)
+    if index is None:
+        index = _log_decision(decision_id)
+    data = vector.to_bytes((vector.bit_length() + 7) // 8 or 1, 'little')
+    _write_record(_VECTOR_COUNT, _VECTOR.pack(index, count) + data)
+    _written[(decision_id, vector)] = _written.get((decision_id, vector), 0) + count
+
+def _log_new_vector(decision_id, vector):
+    global _log, _last_flush
+    if _log is None:
+        # abre só na primeira observação: quem apenas lê (o verificador) não cria log
+        _log = open(_log_path(), 'wb')
+        _log.write(LOG_MAGIC)
+    _log_vector(decision_id, vector, 1)
+    now = time.monotonic()
+    if now - _last_flush >= FLUSH_INTERVAL:
+        _last_flush = now
+        flush()
+    else:
+        _log.flush()
+
+def flush():
+    """Grava no log as execuções contadas desde a última descarga."""
+    if _log is None:
+        return
+    for decision_id, counts in list(_observed.items()):
+        for vector, count in list(counts.items()):
+            pending = count - _written.get((decision_id, vector), 0)
+            if pending > 0:
+                _log_vector(decision_id, vector, pending)
+    for decision_id, (calls, test_ns, recorder_ns) in _profile.items():
+        if calls:
+            index = _log_index.get(decision_id)
+            if index is None:
+                index = _log_decision(decision_id)
+            _write_record(_PROFILE, _PROFILE_RECORD.pack(index, calls, test_ns, recorder_ns))
+    _profile.clear()
+    _log.flush()
+
+# --- leitura do log ---
+
+def iter_log(path):
+    """Lê o log registro a registro, gerando (id, condições, vetor, execuções).
+
+    Nunca carrega o arquivo inteiro; um registro final truncado (processo morto no
+    meio da escrita) é ignorado.
+    """
+    for _, decision_id, conditions, vector, count in iter_log_by_test(path):
+        yield decision_id, conditions, vector, count
+
+def iter_log_by_test(path, skipped=None, profile=None):
+    """Como iter_log, mas gerando (teste, id, condições, vetor, execuções).
+
+    Se 'skipped' for um dict, recebe as chamadas puladas por saturação de cada decisão;
+    se 'profile' for um dict, recebe {id: [chamadas, ns no teste, ns no recorder]}.
+    """
+    decisions = []
+    tests = []
+    test = ''
+    with open(path, 'rb') as f:
+        if f.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError(f"{path} não é um log de observações MC/DC")
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            kind, size = _RECORD.unpack(header)
+            payload = f.read(size)
+            if len(payload) < size:
+                return
+            if kind == _DECISION:
+                (id_len,) = struct.unpack_from('<H', payload, 0)
+                pos = 2 + id_len
+                decision_id = payload[2:pos].decode('utf-8')
+                (n,) = struct.unpack_from('<H', payload, pos)
+                pos += 2
+                conditions = []
+                for _ in range(n):
+                    (length,) = struct.unpack_from('<H', payload, pos)
+                    pos += 2
+                    conditions.append(payload[pos:pos + length].decode('utf-8'))
+                    pos += length
+                decisions.append((decision_id, tuple(conditions)))
+            elif kind == _VECTOR_COUNT:
+                index, count = _VECTOR.unpack_from(payload, 0)
+                vector = int.from_bytes(payload[_VECTOR.size:], 'little')
+                decision_id, conditions = decisions[index]
+                yield test, decision_id, conditions, vector, count
+            elif kind == _TEST:
+                test = payload.decode('utf-8')
+                tests.append(test)
+            elif kind == _TEST_REF:
+                test = tests[_TEST_INDEX.unpack_from(payload, 0)[0]]
+            elif kind == _SKIPPED and skipped is not None:
+                index, count = _VECTOR.unpack_from(payload, 0)
+                decision_id = decisions[index][0]
+                skipped[decision_id] = skipped.get(decision_id, 0) + count
+            elif kind == _PROFILE and profile is not None:
+                index, *totals = _PROFILE_RECORD.unpack_from(payload, 0)
+                entry = profile.setdefault(decisions[index][0], [0, 0, 0])
+                for i, value in enumerate(totals):
+                    entry[i] += value
+
+def load_log(path):
+    """Soma ao recorder as observações de um log gravado por outro processo."""
+    for _, decision_id, conditions, vector, count in iter_log_by_test(path, _skipped):
+        _merge(decision_id, conditions, vector, count)
+
+def shard_paths(base):
+    """Log base e todos os shards de workers ao lado dele (observed*.mcdc)."""
+    base = Path(base)
+    return sorted(base.parent.glob(f"{base.stem}*{base.suffix}"))
+
+def load_shards(base):
+    """Une no recorder o log base e os shards dos workers; vetores repetidos entre
+    shards viram um só, com as execuções somadas. Retorna os arquivos lidos."""
+    paths = shard_paths(base)
+    for path in paths:
+        load_log(path)
+    return paths
+
+def load_profile(base):
+    """Perfil somado do log base e dos shards: {id: [chamadas, ns no teste, ns no recorder]}."""
+    profile = {}
+    for path in shard_paths(base):
+        for _ in iter_log_by_test(path, profile=profile):
+            pass
+    return profile
 
 @atexit.register
-def _dump_observed():
+def _close_log():
+    global _log, _logged_test
     try:
-        # Grava em observed.json no diretório de trabalho atual
-        Path('observed.json').write_text(
-            json.dumps(_observed), encoding='utf-8'
-        )
+        flush()
+        _move_skipped()
+        if _log is not None:
+            _log.close()
+            _log = None
     except Exception:
-        pass
\ No newline at end of file
+        pass
+    # os índices e as contagens gravadas são do arquivo fechado: um log reaberto
+    # recomeça do zero e regrava tudo, sem referências ao anterior
+    _log_index.clear()
+    _test_index.clear()
+    _written.clear()
+    _logged_test = ''
@@ -0,0 +1,107 @@
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+# SAÍDA DOS RELATÓRIOS: o gerador (mcdc_tool) e o verificador
+# (mcdc_verify_from_observed) entregam cada decisão ao writer assim que ela fica
+# pronta, e o writer grava na hora; nada do relatório fica acumulado em memória.
+# Cada decisão chega de duas formas: as linhas do relatório em texto, como sempre
+# foram, e um registro (dict) com os mesmos dados, usado pelos formatos estruturados:
+#   text   o relatório em português de sempre
+#   jsonl  um objeto JSON por linha: {"type": "decision", ...} por decisão e, no fim,
+#          {"type": "summary", ...} com o resumo do arquivo
+#   xml    JUnit: um <testcase> por decisão (com <failure> quando falta MC/DC),
+#          que os servidores de CI sabem ler
+# O registro tem report ('generation' ou 'verification'), file, line, col, kind,
+# decision, conditions, covered e, conforme o relatório, cases (casos gerados) ou
+# observed (casos observados, com None para condição não avaliada), missing e passed;
+# quando falta MC/DC, o verificador junta suggested (vetores que completariam os
+# pares, com as condições a que cada um dá par) e impossible (condições sem par).
+FORMATS = ("text", "jsonl", "xml")
+EXTENSIONS = {"text": ".txt", "jsonl": ".jsonl", "xml": ".xml"}
+
+
+class TextWriter:
+    """Relatório em texto: as linhas são gravadas separadas por '\\n'."""
+
+    def __init__(self, path, header, end=""):
+        self._file = open(path, "w", encoding="utf-8")
+        self._end = end
+        self._first = True
+        self._write(header)
+
+    def _write(self, lines):
+        for line in lines:
+            if not self._first:
+                self._file.write("\n")
+            self._file.write(line)
+            self._first = False
+
+    def decision(self, record, lines):
+        self._write(lines)
+
+    def close(self, summary):
+        self._file.write(self._end)
+        self._file.close()
+
+
+class JsonLinesWriter:
+    """Um registro JSON por decisão e o resumo na última linha."""
+
+    def __init__(self, path, report, source):
+        self._file = open(path, "w", encoding="utf-8")
+        self._report = report
+        self._source = source
+
+    def decision(self, record, lines):
+        self._file.write(json.dumps({"type": "decision", **record}, ensure_ascii=False) + "\n")
+
+    def close(self, summary):
+        record = {"type": "summary", "report": self._report, "file": self._source, **summary}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.close()
+
+
+class JUnitWriter:
+    """JUnit XML: o arquivo é a suíte e cada decisão um caso de teste.
+
+    Os totais só são conhecidos no fim, então não vão como atributos da <testsuite>
+    (que já foi gravada); os leitores de JUnit contam os <testcase>, e o resumo vai
+    em <system-out>.
+    """
+
+    def __init__(self, path, report, source):
+        self._file = open(path, "w", encoding="utf-8")
+        self._source = source
+        self._file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self._file.write(f'<testsuites name={quoteattr("mcdc-" + report)}>\n')
+        self._file.write(f'  <testsuite name={quoteattr(source)}>\n')
+
+    def decision(self, record, lines):
+        name = quoteattr(f"{record['line']}:{record['col']} {record['decision']}")
+        self._file.write(f'    <testcase classname={quoteattr(self._source)} name={name} '
+                         f'file={quoteattr(self._source)} line="{record["line"]}">\n')
+        missing = [c for c in record["conditions"] if c not in record["covered"]]
+        if missing:
+            message = quoteattr("sem MC/DC para: " + ", ".join(missing))
+            self._file.write(f'      <failure message={message} type="mcdc"/>\n')
+        self._file.write(f'      <system-out>{escape(chr(10).join(lines))}</system-out>\n')
+        self._file.write('    </testcase>\n')
+
+    def close(self, summary):
+        text = " | ".join(f"{key}={value}" for key, value in summary.items())
+        self._file.write(f'    <system-out>{escape(text)}</system-out>\n')
+        self._file.write('  </testsuite>\n</testsuites>\n')
+        self._file.close()
+
+
+def open_writer(path, fmt, report, source, header, end=""):
+    """Abre o writer do formato 'fmt' em path.
+
+    header são as linhas de abertura do relatório em texto, e end o que o texto
+    grava depois da última linha (os formatos estruturados ignoram os dois).
+    """
+    if fmt == "jsonl":
+        return JsonLinesWriter(path, report, source)
+    if fmt == "xml":
+        return JUnitWriter(path, report, source)
+    return TextWriter(path, header, end)
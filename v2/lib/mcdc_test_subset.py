@@ -0,0 +1,135 @@
+from pathlib import Path
+
+import mcdc_incremental
+from mcdc_recorder import decode_vector, pair_bits
+from mcdc_tool import _find_mcdc_pairs
+
+# SUBCONJUNTO MÍNIMO DE TESTES: com as observações separadas por teste (registros
+# tipo 3 do log, ver mcdc_recorder), procura poucos testes que, juntos, ainda cobrem
+# as mesmas condições que a suíte inteira. O par de uma condição pode usar vetores
+# de dois testes diferentes, então a cobertura de um conjunto é calculada sobre a
+# união dos vetores dele, e não somando a cobertura de cada teste.
+#
+# Guloso: a cada passo entra o teste que cobre mais condições novas; quando nenhum
+# teste sozinho cobre nada novo (falta um par que depende de dois testes), entra o
+# que traz mais vetores novos para as decisões ainda incompletas. No fim, testes que
+# ficaram redundantes saem, do último escolhido para o primeiro. As observações da
+# coleta (imports, teste '') entram sempre, pois não há como não rodá-las.
+#
+# A cobertura de cada decisão é mantida junto com a união dos vetores e atualizada
+# só com os vetores que um teste acrescenta (novos x união), parando assim que as
+# condições do alvo estão todas cobertas. O ganho de cada teste numa decisão fica
+# guardado até a união daquela decisão mudar.
+
+
+def extend_coverage(n, vectors, covered, new, wanted=None):
+    """Bits cobertos por vectors | new, partindo dos bits 'covered' de 'vectors'.
+
+    Com 'wanted', para assim que esses bits estão todos cobertos.
+    """
+    new = [v for v in dict.fromkeys(new) if v not in vectors]
+    for i, vector in enumerate(new):
+        if wanted is not None and covered & wanted == wanted:
+            break
+        covered |= pair_bits(n, vector, vectors) | pair_bits(n, vector, new[i + 1:])
+    return covered
+
+
+class _Union:
+    """União dos vetores de um conjunto de testes, com as condições cobertas por decisão."""
+
+    def __init__(self, conditions, target):
+        self.conditions = conditions
+        self.target = target  # {id: bits} que interessam
+        self.vectors, self.covered = {}, {}
+
+    def gain(self, d, new):
+        """Bits cobertos na decisão d se os vetores 'new' entrarem."""
+        return extend_coverage(len(self.conditions[d]), self.vectors.get(d, ()), self.covered.get(d, 0),
+                               new, self.target.get(d, 0))
+
+    def add(self, observed):
+        for d, new in observed.items():
+            self.covered[d] = self.gain(d, new)
+            self.vectors.setdefault(d, set()).update(new)
+
+
+def minimal_test_subset(by_test, conditions):
+    """Retorna (testes escolhidos, em ordem de escolha; {id: bits cobertos pela suíte}).
+
+    by_test: {teste: {id da decisão: {vetor: execuções}}}; conditions: {id: condições}.
+    """
+    collection = by_test.get(mcdc_incremental.COLLECTION, {})
+    tests = {t: observed for t, observed in by_test.items() if t != mcdc_incremental.COLLECTION}
+    # o alvo sai do _find_mcdc_pairs sobre todos os vetores da suíte, que indexa as
+    # linhas em vez de comparar todos os pares
+    everything = {}
+    for observed in by_test.values():
+        for d, v in observed.items():
+            everything.setdefault(d, set()).update(v)
+    target = {}
+    for d, vectors in everything.items():
+        _, covered = _find_mcdc_pairs(conditions[d], [decode_vector(conditions[d], v) for v in vectors])
+        target[d] = sum(1 << i for i, c in enumerate(conditions[d]) if c in covered)
+
+    def missing(d, bits):
+        return bin(target[d] & ~bits).count("1")
+
+    union = _Union(conditions, target)
+    union.add(collection)
+    incomplete = {d for d in target if missing(d, union.covered.get(d, 0))}
+    users = {}  # decisão -> testes que passaram por ela
+    for t, observed in tests.items():
+        for d in observed:
+            users.setdefault(d, set()).add(t)
+    gains = {}  # (teste, decisão) -> (condições que deixa de faltar, vetores novos)
+    chosen = []
+    while incomplete:
+        best, best_key = None, None
+        for t in sorted(set(tests) - set(chosen)):
+            closed = new_vectors = 0
+            for d in incomplete.intersection(tests[t]):
+                gain = gains.get((t, d))
+                if gain is None:
+                    before = union.covered.get(d, 0)
+                    gain = gains[(t, d)] = (missing(d, before) - missing(d, union.gain(d, tests[t][d])),
+                                            len(set(tests[t][d]) - union.vectors.get(d, set())))
+                closed += gain[0]
+                new_vectors += gain[1]
+            key = (-closed, -new_vectors)  # mais condições cobertas, depois mais vetores
+            if (closed or new_vectors) and (best_key is None or key < best_key):
+                best, best_key = t, key
+        if best is None:
+            break  # não deveria acontecer: todos os testes juntos cobrem o alvo
+        chosen.append(best)
+        union.add(tests[best])
+        for d in tests[best]:
+            for t in users[d]:
+                gains.pop((t, d), None)
+        incomplete = {d for d in incomplete if missing(d, union.covered.get(d, 0))}
+    for t in reversed(list(chosen)):
+        # tirar t só muda as decisões por onde ele passou
+        rest = [c for c in chosen if c != t]
+        decisions = set(tests[t]) & set(target)
+        trial = _Union(conditions, target)
+        for observed in [collection] + [tests[c] for c in rest]:
+            trial.add({d: v for d, v in observed.items() if d in decisions})
+        if not any(missing(d, trial.covered.get(d, 0)) for d in decisions):
+            chosen = rest
+    return chosen, target
+
+
+def write_subset_report(by_test, conditions, output):
+    """Grava o relatório do subconjunto mínimo e retorna os testes mantidos."""
+    chosen, target = minimal_test_subset(by_test, conditions)
+    tests = sorted(t for t, observed in by_test.items() if observed and t != mcdc_incremental.COLLECTION)
+    total = sum(bin(bits).count("1") for bits in target.values())
+    lines = ["Subconjunto Mínimo de Testes MC/DC", "="*30 + "\n",
+             f"Testes mantidos: {len(chosen)} de {len(tests)} que passaram por decisões do alvo "
+             f"(as mesmas {total} condições cobertas pela suíte inteira)", ""]
+    lines += [f"  {t}" for t in chosen]
+    lines += ["", "Testes redundantes para o MC/DC:", ""]
+    lines += [f"  {t}" for t in tests if t not in chosen] or ["  (nenhum)"]
+    Path(output).write_text("\n".join(lines) + "\n", encoding='utf-8')
+    print(f"Subconjunto mínimo de testes gerado: {output} ({len(chosen)} de {len(tests)} testes)")
+    return chosen
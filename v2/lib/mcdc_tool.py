@@ -1,50 +1,333 @@
 import ast
-import itertools
+import glob
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 import argparse  # Importa o módulo para argumentos de linha de comando
+from mcdc_minimize import minimize_mcdc_rows
+from mcdc_bdd import BDD
+from mcdc_report_writer import EXTENSIONS, FORMATS, open_writer
+
+# Backend "auto": acima desse número de condições a tabela verdade (2^n bits por
+# condição) fica pesada demais e a decisão é resolvida pelo BDD
+BITSET_MAX_CONDITIONS = 20
+# acima desse número de folhas os vetores que o curto-circuito permite não são
+# enumerados (CompiledDecision.short_circuit_vectors): a decisão nunca satura
+SHORT_CIRCUIT_MAX_LEAVES = 16
 
 # IMPORTANTE: assignments é o dicionário onde as condições atômicas e seus valores
-# são salvos, a condição, que é a chave é atribuída na função _get_conditions_from_node
-# já o valor é passado na chamada de _evaluate_decision, passando True e False para
-# cada condição
-
-def _get_conditions_from_node(node):
-    """Função auxiliar recursiva para extrair condições de um nó do AST."""
-    #Quebra condições em partes menores, no caso:
-    if isinstance(node, ast.BoolOp):# Operador lógico
-        return {c for value in node.values for c in _get_conditions_from_node(value)}
-    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
-        # Se for um 'not', olhamos para o que está sendo negado (o operando)
-        return _get_conditions_from_node(node.operand)
-    elif isinstance(node, ast.Name):# Variável
-        return {node.id}
-    elif isinstance(node, ast.Compare):# Operador Aritmético
-        return {ast.unparse(node)}
-    return set()
-    # set elimina condições duplicadas, por exemplo "if a and b and a" retornaria apenas "a and b"
-    # Depois de atomizar as condições, elas serão adicionadas no dicionário assignments como chave
-
-def _evaluate_decision(node, assignments):
-    """Avalia o resultado de uma decisão (nó do AST) com base nos valores de verdade."""
-    # Substitui as condições pelos seus respectivos valores, disponíveis no dicionário
-    # assignment, testando todas as combinações possíveis, e retornando os resultados
-    # por exemplo: para "if a > 10 and not b", substitui os valores e simula if true and not true
-    # faz esse teste para todas as combinações de valores
-    # ELE NÃO EXECUTA, ELE SIMULA, ele sabe que para um and ser verdadeiro, os
-    # dois valores tem que ser também
-    if isinstance(node, ast.Name):
-        return assignments[node.id]
-    if isinstance(node, ast.Compare):
-        return assignments[ast.unparse(node)]
+# são salvos. As condições (as chaves) saem da CompiledDecision, que as numera, e a
+# decisão é avaliada por índice (CompiledDecision.evaluate, a tabela em bitset ou o
+# BDD); as linhas resultantes voltam para assignments em _row_to_assignment
+
+def _node_text(node):
+    """Texto de um nó (a chave das condições), calculado uma vez e guardado no nó."""
+    # ast.unparse é caro e as mesmas folhas são consultadas a cada linha da tabela,
+    # a cada decisão aninhada e em cada módulo (instrumentador, verificador, gerador).
+    # O texto é o do nó quando foi visto pela primeira vez: o instrumentador reescreve
+    # os filhos depois, e as chaves têm que continuar as do código original
+    text = node.__dict__.get('_mcdc_text')
+    if text is None:
+        text = node._mcdc_text = node.id if isinstance(node, ast.Name) else ast.unparse(node)
+    return text
+
+def _is_condition(node):
+    """Condição atômica: qualquer expressão sem and/or/not que não seja constante."""
+    # além de nomes e comparações, chamadas, atributos e subscrições também são
+    # condições (ex.: 'x if self.taken[i] else y' e 'if Placar.checkFull(dados)')
+    if isinstance(node, (ast.BoolOp, ast.Constant)):
+        return False
+    return not (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not))
+
+def _decision_id(node, filename, test=None):
+    """Identificador estável de uma decisão: arquivo, linha, coluna e hash do teste."""
+    # É o mesmo no instrumentador (que passa para o record_call) e no verificador
+    # (que busca as observações por ele), então dois ifs com o mesmo texto nunca se
+    # misturam, e se o teste mudar de conteúdo o hash muda junto
+    test = node.test if test is None else test
+    digest = hashlib.sha1(_node_text(test).encode('utf-8')).hexdigest()[:8]
+    return f"{filename}:{node.lineno}:{node.col_offset}:{digest}"
+
+
+# DECISÃO COMPILADA: o teste é percorrido uma vez só, e cada folha (condição
+# atômica) ganha o índice inteiro da sua condição. Condições repetidas dividem o
+# índice ('a and b and a' tem três folhas e duas condições). O gerador, o verificador,
+# o instrumentador e o coletor sys.monitoring partem desse objeto, em vez de cada um
+# percorrer e "unparsear" o teste de novo.
+class CompiledDecision:
+    """Teste de uma decisão com as condições numeradas.
+
+    conditions: condições distintas em ordem alfabética (a ordem dos relatórios, das
+    colunas da tabela verdade e dos bits do recorder); leaves: as folhas na ordem em
+    que aparecem; leaf_index: id(folha) -> índice da condição; order: índices na
+    ordem de aparição, sem repetição (a ordem de variáveis do BDD).
+    """
+
+    def __init__(self, test):
+        self.test = test
+        self.text = _node_text(test)
+        self.leaves = []
+        def gather(n):
+            if isinstance(n, ast.BoolOp):
+                for v in n.values:
+                    gather(v)
+            elif isinstance(n, ast.UnaryOp) and isinstance(n.op, ast.Not):
+                gather(n.operand)
+            elif _is_condition(n):
+                self.leaves.append(n)
+        gather(test)
+        self.conditions = sorted({_node_text(n) for n in self.leaves})
+        index = {c: i for i, c in enumerate(self.conditions)}
+        self.leaf_index = {id(n): index[_node_text(n)] for n in self.leaves}
+        self.order = list(dict.fromkeys(self.leaf_index[id(n)] for n in self.leaves))
+        self._function = None
+
+    def evaluate(self, values):
+        """Resultado da decisão com values[i] = valor da condição i."""
+        if self._function is None:
+            self._function = self._compile_function()
+        return self._function(values)
+
+    def _compile_function(self):
+        # troca cada folha por v[i] numa cópia do teste e compila um lambda: avaliar
+        # uma linha vira uma chamada de função, sem percorrer o AST
+        def build(n):
+            if isinstance(n, ast.BoolOp):
+                return ast.BoolOp(op=n.op, values=[build(v) for v in n.values])
+            if isinstance(n, ast.UnaryOp) and isinstance(n.op, ast.Not):
+                return ast.UnaryOp(op=ast.Not(), operand=build(n.operand))
+            if id(n) in self.leaf_index:
+                return ast.Subscript(value=ast.Name(id='v', ctx=ast.Load()),
+                                     slice=ast.Constant(value=self.leaf_index[id(n)]), ctx=ast.Load())
+            return ast.Constant(value=False)  # nem condição nem and/or/not: vale False
+        arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg='v')], kwonlyargs=[],
+                                  kw_defaults=[], defaults=[])
+        body = ast.Call(func=ast.Name(id='bool', ctx=ast.Load()), args=[build(self.test)], keywords=[])
+        expression = ast.fix_missing_locations(ast.Expression(body=ast.Lambda(args=arguments, body=body)))
+        return eval(compile(expression, '<decisão>', 'eval'))
+
+    def short_circuit_vectors(self):
+        """Vetores (avaliadas, valores, resultado) que o curto-circuito pode produzir.
+
+        Os bits seguem os do recorder (bit i = condição i). Um valor fixo no meio de
+        and/or/not (constante, expressão que não é condição) entra com os dois valores
+        e sem bit, então o conjunto pode ter vetores a mais, nunca a menos. Acima de
+        SHORT_CIRCUIT_MAX_LEAVES folhas não enumera e retorna None.
+        """
+        if len(self.leaves) > SHORT_CIRCUIT_MAX_LEAVES:
+            return None
+        def paths(n, evaluated, values):
+            if isinstance(n, ast.BoolOp):
+                stop = not isinstance(n.op, ast.And)  # and para no primeiro False, or no primeiro True
+                def chain(i, evaluated, values):
+                    for e, v, result in paths(n.values[i], evaluated, values):
+                        if result == stop or i == len(n.values) - 1:
+                            yield e, v, result
+                        else:
+                            yield from chain(i + 1, e, v)
+                yield from chain(0, evaluated, values)
+            elif isinstance(n, ast.UnaryOp) and isinstance(n.op, ast.Not):
+                for e, v, result in paths(n.operand, evaluated, values):
+                    yield e, v, not result
+            else:
+                bit = 1 << self.leaf_index[id(n)] if id(n) in self.leaf_index else 0
+                yield evaluated | bit, values | bit, True
+                yield evaluated | bit, values, False
+        return set(paths(self.test, 0, 0))
+
+    def truth_table(self):
+        """(tabela, colunas) em bitset, ver _build_truth_table."""
+        return _build_truth_table(self)
+
+    def bdd(self):
+        """(bdd, raiz), ver _build_decision_bdd."""
+        return _build_decision_bdd(self)
+
+
+# LOCAIS DE DECISÃO: além do if, também são decisões o teste do while, da expressão
+# condicional (x if c else y) e do assert, cada filtro de comprehension e o valor de
+# uma atribuição com expressão booleana (and/or/not). O nó de cada uma dá a posição
+# usada no id; nos filtros e atribuições o nó é a própria expressão.
+#
+# As sondas do instrumentador usam :=, que o Python proíbe no iterável de uma
+# comprehension e em comprehensions direto no corpo de uma classe. Decisões nesses
+# lugares ficam de fora de todo mundo (instrumentador, verificador e gerador), para
+# que os três continuem vendo o mesmo conjunto de decisões.
+_COMPREHENSIONS = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+def _walrus_forbidden(tree):
+    """ids dos nós onde uma expressão de atribuição (:=) seria erro de sintaxe."""
+    forbidden = set()
+
+    def mark(node):
+        forbidden.update(id(n) for n in ast.walk(node))
+
+    def visit(node, in_class):
+        if isinstance(node, _COMPREHENSIONS):
+            if in_class:
+                mark(node)
+                return
+            for generator in node.generators:
+                mark(generator.iter)
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                visit(child, True)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+                visit(child, False)
+            else:
+                visit(child, in_class)
+
+    visit(tree, False)
+    return forbidden
+
+def _is_boolean_expr(node):
+    return isinstance(node, ast.BoolOp) or (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not))
+
+def _decision_sites(tree):
+    """Gera (tipo, nó, teste) de cada decisão do módulo, na ordem do ast.walk."""
+    forbidden = _walrus_forbidden(tree)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.If):
+            site = ('if', node, node.test)
+        elif isinstance(node, ast.While):
+            site = ('while', node, node.test)
+        elif isinstance(node, ast.IfExp):
+            site = ('ifexp', node, node.test)
+        elif isinstance(node, ast.Assert):
+            site = ('assert', node, node.test)
+        elif isinstance(node, ast.comprehension):
+            for cond in node.ifs:
+                if id(cond) not in forbidden:
+                    yield 'filter', cond, cond
+            continue
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)) and _is_boolean_expr(node.value):
+            site = ('assign', node.value, node.value)
+        else:
+            continue
+        if id(site[2]) not in forbidden:
+            yield site
+
+def _decision_label(kind, decision_str):
+    """Como a decisão aparece nos relatórios."""
+    return {
+        'if': f"if {decision_str}",
+        'while': f"while {decision_str}",
+        'assert': f"assert {decision_str}",
+        'ifexp': f"if {decision_str} (expressão condicional)",
+        'filter': f"if {decision_str} (filtro de comprehension)",
+        'assign': f"{decision_str} (atribuição)",
+    }[kind]
+
+
+
+# TABELA VERDADE COMPILADA: em vez de montar uma lista de dicionários com uma linha
+# por combinação, cada linha r da tabela é representada por um inteiro e a tabela
+# inteira vira um único bitset (int do Python), onde o bit r guarda o resultado da
+# decisão para aquela linha. A ordem das linhas é a mesma do itertools.product([True, False])
+# usado antes: a condição i vale True quando o bit (n-1-i) de r é 0
+
+def _condition_columns(n):
+    """Monta o bitset de cada condição (linhas em que ela é True) e a máscara cheia."""
+    size = 1 << n
+    full = (1 << size) - 1
+    columns = []
+    for i in range(n):
+        block = 1 << (n - 1 - i)
+        # bloco de 'block' uns seguido de 'block' zeros, repetido até cobrir a tabela
+        unit = (1 << block) - 1
+        repeat = full // ((1 << (2 * block)) - 1)
+        columns.append(unit * repeat)
+    return columns, full
+
+def _evaluate_decision_bitset(node, leaf_index, columns, full):
+    """Avalia a decisão uma única vez sobre os bitsets, resolvendo todas as linhas de uma vez."""
+    # Mesma lógica do CompiledDecision.evaluate, mas o and vira &, o or vira | e o not vira ^ full;
+    # as folhas vêm da decisão compilada, pelo índice da condição
+    i = leaf_index.get(id(node))
+    if i is not None:
+        return columns[i]
     if isinstance(node, ast.BoolOp):
+        values = [_evaluate_decision_bitset(v, leaf_index, columns, full) for v in node.values]
         if isinstance(node.op, ast.And):
-            return all(_evaluate_decision(v, assignments) for v in node.values)
+            result = full
+            for v in values:
+                result &= v
+            return result
         elif isinstance(node.op, ast.Or):
-            return any(_evaluate_decision(v, assignments) for v in node.values)
+            result = 0
+            for v in values:
+                result |= v
+            return result
     elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
-        # Avalia o operando e inverte o resultado booleano
-        return not _evaluate_decision(node.operand, assignments)
-    return False
+        return full ^ _evaluate_decision_bitset(node.operand, leaf_index, columns, full)
+    return 0
+
+def _build_truth_table(decision):
+    """Compila a decisão em (tabela, colunas): a tabela é o bitset dos resultados."""
+    columns, full = _condition_columns(len(decision.conditions))
+    return _evaluate_decision_bitset(decision.test, decision.leaf_index, columns, full), columns
+
+def _row_to_assignment(conditions, row):
+    """Converte o índice de uma linha da tabela no dicionário condição -> valor."""
+    n = len(conditions)
+    return {c: not (row >> (n - 1 - i)) & 1 for i, c in enumerate(conditions)}
+
+def _find_mcdc_pairs_bitset(conditions, table, columns):
+    """Versão de _find_mcdc_pairs que trabalha direto sobre a tabela compilada."""
+    # O par de uma linha r para a condição i é r com o bit dela invertido, então
+    # (table ^ (table >> shift)) marca as linhas cujo resultado muda junto com a condição.
+    # O bit mais baixo é o mesmo primeiro par que a busca linha a linha encontraria
+    n = len(conditions)
+    minimal_pairs = {}
+    for i, cond in enumerate(conditions):
+        shift = 1 << (n - 1 - i)
+        differs = (table ^ (table >> shift)) & columns[i]
+        if differs:
+            row = (differs & -differs).bit_length() - 1
+            minimal_pairs[cond] = (row, row | shift)
+    unique_rows = {row for pair in minimal_pairs.values() for row in pair}
+    return unique_rows, set(minimal_pairs)
+
+def _build_decision_bdd(decision):
+    """Compila a decisão em um BDD, seguindo os mesmos nós que o CompiledDecision.evaluate."""
+    # ordem do BDD = ordem de aparição das condições na decisão
+    bdd = BDD(decision.order)
+    leaf_index = decision.leaf_index
+
+    def build(n):
+        i = leaf_index.get(id(n))
+        if i is not None:
+            return bdd.var(i)
+        if isinstance(n, ast.BoolOp):
+            values = [build(v) for v in n.values]
+            if isinstance(n.op, ast.And):
+                result = 1
+                for v in values:
+                    result = bdd.conj(result, v)
+                return result
+            elif isinstance(n.op, ast.Or):
+                result = 0
+                for v in values:
+                    result = bdd.disj(result, v)
+                return result
+        elif isinstance(n, ast.UnaryOp) and isinstance(n.op, ast.Not):
+            return bdd.neg(build(n.operand))
+        return 0
+
+    return bdd, build(decision.test)
+
+def _find_mcdc_pairs_bdd(conditions, bdd, root):
+    """Versão de _find_mcdc_pairs_bitset sobre o BDD, sem enumerar a tabela verdade."""
+    minimal_pairs = {}
+    for i, cond in enumerate(conditions):
+        pair = bdd.independence_pair(root, i)
+        if pair is not None:
+            minimal_pairs[cond] = pair
+    unique_rows = {row for pair in minimal_pairs.values() for row in pair}
+    return unique_rows, set(minimal_pairs)
+
 
 
 def _find_mcdc_pairs(conditions, truth_table_results):
@@ -52,24 +335,57 @@ def _find_mcdc_pairs(conditions, truth_table_results):
     # Testa todas as condições com os valores da tabela verdade, retorna o conjunto
     # mínimo onde a saída é alterada pelos valores, por exemplo a condição a or b or c
     # tem 8 combinações possíveis, mas o retorno seria 4 casos
+    # Cada linha vira uma máscara de bits (bit i = valor de conditions[i]) e é indexada
+    # por ela, assim o único candidato a par de uma linha para a condição i é a
+    # máscara com o bit i invertido, achado com um lookup em vez de varrer a tabela.
+    # Casos observados podem ter condições None (não avaliadas por curto-circuito):
+    # elas não precisam bater com o par (masking MC/DC). As linhas são agrupadas pela
+    # máscara das condições avaliadas, e entre dois grupos só se comparam as condições
+    # avaliadas nos dois. Numa tabela completa há um grupo só e o lookup é o de sempre
+    bits = {cond: 1 << i for i, cond in enumerate(conditions)}
+    rows = []
+    groups = {}
+    for asg, res in truth_table_results:
+        known = mask = 0
+        for cond, bit in bits.items():
+            value = asg[cond]
+            if value is None:
+                continue
+            known |= bit
+            if value:
+                mask |= bit
+        rows.append((known, mask, asg, res))
+        groups.setdefault(known, []).append((mask, asg, res))
+    indexes = {}
+
+    def find_partner(known, scope, key):
+        index = indexes.get((known, scope))
+        if index is None:
+            # guarda a primeira linha de cada (máscara, resultado), como a varredura antiga
+            index = indexes[(known, scope)] = {}
+            for mask, asg, res in groups[known]:
+                index.setdefault((mask & scope, res), asg)
+        return index.get(key)
+
     # Para cada condição, capture apenas o primeiro par que a isola
     minimal_pairs = {}
     covered = set()
     for cond in conditions:
-        for asg1, res1 in truth_table_results:
-            for asg2, res2 in truth_table_results:
-                # resultados diferentes (muda a decisão)
-                if res1 == res2:
-                    continue
-                # esta condição varia
-                if asg1[cond] == asg2[cond]:
+        bit = bits[cond]
+        for known1, mask1, asg1, res1 in rows:
+            if not known1 & bit:
+                continue
+            # mesma linha com só esta condição variando e resultado diferente
+            for known2 in groups:
+                if not known2 & bit:
                     continue
-                # todas as outras fixas
-                if all(asg1[c] == asg2[c] for c in conditions if c != cond):
+                scope = known1 & known2
+                asg2 = find_partner(known2, scope, ((mask1 ^ bit) & scope, not res1))
+                if asg2 is not None:
                     minimal_pairs[cond] = (asg1, asg2)
                     covered.add(cond)
                     break
-            if cond in minimal_pairs:
+            if cond in covered:
                 break
     # Agora colhe exatamente 2 casos por condição
     unique_cases = {
@@ -81,25 +397,43 @@ def _find_mcdc_pairs(conditions, truth_table_results):
     return tests, covered
 
 
-def generate_mcdc_tests_from_file(input_py_file: str, output_report_file: str):
-    """Função principal que orquestra a análise do arquivo e a geração do relatório."""
+def generate_mcdc_tests_from_file(input_py_file: str, output_report_file: str,
+                                  minimize: bool = False, time_budget: float = 2.0,
+                                  backend: str = "auto", quiet: bool = False,
+                                  report_format: str = "text"):
+    """Função principal que orquestra a análise do arquivo e a geração do relatório.
+
+    Retorna o resumo do arquivo ({decisions, conditions, covered, cases}), ou None se
+    ele não pôde ser lido; quiet=True não imprime nada no terminal (modo em lote).
+    report_format escolhe a saída: "text", "jsonl" ou "xml" (ver mcdc_report_writer);
+    cada decisão é gravada assim que fica pronta.
+
+    Com minimize=True, troca o primeiro par de cada condição pelo menor conjunto de
+    casos que cobre todas elas (ver mcdc_minimize), gastando até time_budget segundos
+    por decisão, e informa no relatório o tamanho obtido e o limite inferior.
+
+    backend escolhe como a decisão é resolvida: "bitset" (tabela verdade compilada),
+    "bdd" (diagrama de decisão, sem enumerar 2^n linhas) ou "auto", que usa o BDD
+    acima de BITSET_MAX_CONDITIONS condições. A minimização só roda no bitset.
+    """
     #Percorre o arquivo de entrada, transformando-o em uma árvore de sintaxe
     try:
         code = Path(input_py_file).read_text(encoding='utf-8')
         tree = ast.parse(code)
     except (FileNotFoundError, SyntaxError, UnicodeDecodeError) as e:
-        print(f"Erro ao ler ou analisar o arquivo '{input_py_file}': {e}")
-        return
+        if not quiet:
+            print(f"Erro ao ler ou analisar o arquivo '{input_py_file}': {e}")
+        return None
 
     #Percorre a árvore descartando tudo que não for condicional,
-    #então chama _get_conditions_from_node para cada condição
-    report_lines = ["Relatório de Testes MC/DC", "=" * 30 + "\n"]
-    for node in ast.walk(tree):
-        if not isinstance(node, ast.If):
-            continue
+    #então compila cada decisão (condições numeradas, ver CompiledDecision)
+    writer = open_writer(output_report_file, report_format, "generation", str(input_py_file),
+                         ["Relatório de Testes MC/DC", "=" * 30 + "\n"])
+    summary = {"decisions": 0, "conditions": 0, "covered": 0, "cases": 0}
+    for kind, node, test in _decision_sites(tree):
         try:
-            decision_str = ast.unparse(node.test)
-            conditions = sorted(_get_conditions_from_node(node.test))
+            decision = CompiledDecision(test)
+            decision_str, conditions = decision.text, decision.conditions
         except Exception:
             # Pula nós que não podem ser descompilados, caso ocorra
             continue
@@ -107,34 +441,175 @@ def generate_mcdc_tests_from_file(input_py_file: str, output_report_file: str):
         #Esse monstro aqui estrutura bonitinho o arquivo do relatório
         if not conditions:
             continue
-        report_lines.append(f"Decisão: if {decision_str}")
+        report_lines = [f"Decisão: {_decision_label(kind, decision_str)}"]
         report_lines.append(f"Condições: {', '.join(conditions)}\n")
-        truth_values = list(itertools.product([True, False], repeat=len(conditions)))
-        truth_table_results = []
-        truth_table_results = [
-            (dict(zip(conditions, vals)), _evaluate_decision(node.test, dict(zip(conditions, vals))))
-            for vals in truth_values
-        ]
-        # baseado na tabela verdade obtida, busca a independência das condições
-        # e retorna somente o conjunto de casos independentes
-        mcdc_test_cases, covered_conditions = _find_mcdc_pairs(conditions, truth_table_results)
-        if not mcdc_test_cases:
+        record = {"report": "generation", "file": str(input_py_file), "line": node.lineno,
+                  "col": node.col_offset, "kind": kind, "decision": decision_str,
+                  "conditions": conditions, "cases": []}
+        use_bdd = backend == "bdd" or (
+            backend == "auto" and len(conditions) > BITSET_MAX_CONDITIONS
+        )
+        if use_bdd:
+            # resolve a decisão simbolicamente: o custo depende do tamanho do BDD
+            bdd, root = decision.bdd()
+            mcdc_rows, covered_conditions = _find_mcdc_pairs_bdd(conditions, bdd, root)
+            outcome_of = lambda row: bdd.evaluate(root, row)
+            lower_bound, status = len(covered_conditions) + 1, "bdd, sem minimização"
+        else:
+            # compila a decisão uma vez só e resolve a tabela verdade inteira em bitset
+            table, columns = decision.truth_table()
+            outcome_of = lambda row: bool((table >> row) & 1)
+            # baseado na tabela verdade obtida, busca a independência das condições
+            # e retorna somente o conjunto de casos independentes
+            if minimize:
+                mcdc_rows, covered_idx, lower_bound, optimal = minimize_mcdc_rows(
+                    table, columns, len(conditions), time_budget
+                )
+                covered_conditions = {conditions[i] for i in covered_idx}
+                status = "ótimo" if optimal else "heurístico"
+            else:
+                mcdc_rows, covered_conditions = _find_mcdc_pairs_bitset(conditions, table, columns)
+        summary["decisions"] += 1
+        summary["conditions"] += len(conditions)
+        summary["covered"] += len(covered_conditions)
+        summary["cases"] += len(mcdc_rows)
+        if not mcdc_rows:
             report_lines.append("Não foi possível gerar pares MC/DC para esta decisão.\n")
         else:
             # Aqui continua montando o relatório
             report_lines.append("Casos de Teste MC/DC:")
             report_lines.append("-" * 20)
-            mcdc_test_cases.sort(key=lambda x: [x[c] for c in conditions])
-            for i, test_case in enumerate(mcdc_test_cases):
-                outcome = _evaluate_decision(node.test, test_case)
+            # ordem decrescente de linha == ordem crescente dos valores (False antes de True)
+            for i, row in enumerate(sorted(mcdc_rows, reverse=True)):
+                test_case = _row_to_assignment(conditions, row)
+                outcome = outcome_of(row)
                 # imprimir sempre em ordem alfabética de condições
                 values_str = " | ".join(f"{c}={str(test_case[c]):<5}" for c in conditions)
                 report_lines.append(f"Teste {i+1}: {values_str} | Resultado: {outcome}")
+                record["cases"].append({"values": test_case, "outcome": outcome})
+            if minimize:
+                report_lines.append(
+                    f"\nCasos gerados: {len(mcdc_rows)} | Limite inferior: {lower_bound} ({status})"
+                )
+                record["lower_bound"], record["search"] = lower_bound, status
         report_lines.append("\n" + "=" * 30 + "\n")
+        record["covered"] = sorted(covered_conditions)
+        writer.decision(record, report_lines)
 
     #Escreve o relatório no arquivo de saída e monstra o nome no terminal
-    Path(output_report_file).write_text("\n".join(report_lines), encoding='utf-8')
-    print(f"Relatório de testes MC/DC gerado com sucesso em: {output_report_file}")
+    writer.close(summary)
+    if not quiet:
+        print(f"Relatório de testes MC/DC gerado com sucesso em: {output_report_file}")
+    return summary
+
+
+# MODO EM LOTE: muitos arquivos num processo só (e num pool de processos), em vez de
+# um 'python mcdc_tool.py' por arquivo pagando a partida do interpretador a cada vez.
+# Cada worker grava o relatório do seu arquivo em outdir/<caminho relativo>.txt (ou
+# .jsonl/.xml, conforme o formato), e o
+# resumo com os totais e o tempo de cada arquivo vai para outdir/SUMMARY_NAME.
+SUMMARY_NAME = "resumo_mcdc.txt"
+
+
+def _expand_inputs(inputs):
+    """Resolve arquivos, pastas e globs em (raiz comum, [arquivos .py]) sem repetição."""
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            found = [p for p in sorted(path.rglob("*.py")) if "__pycache__" not in p.parts]
+        elif glob.has_magic(item):
+            found = [Path(p) for p in sorted(glob.glob(item, recursive=True)) if p.endswith(".py")]
+        else:
+            found = [path]
+        files.extend(p.resolve() for p in found)
+    files = list(dict.fromkeys(files))
+    if not files:
+        return None, []
+    root = Path(os.path.commonpath([f.parent for f in files]))
+    return root, files
+
+
+def _generate_timed(input_py_file, output_report_file, minimize, time_budget, backend, report_format):
+    """Roda o gerador para um arquivo nos processos do pool; retorna (resumo, segundos)."""
+    Path(output_report_file).parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    summary = generate_mcdc_tests_from_file(input_py_file, output_report_file, minimize,
+                                            time_budget, backend, True, report_format)
+    return summary, time.perf_counter() - start
+
+
+def _batch_error(rel, error):
+    print(f"Erro ao gerar o relatório de '{rel}': {type(error).__name__}: {error}")
+    return None, 0.0
+
+
+def generate_mcdc_tests_batch(inputs, outdir, minimize=False, time_budget=2.0, backend="auto", jobs=None,
+                              report_format="text"):
+    """Gera os relatórios de vários arquivos (arquivos, pastas ou globs) em paralelo.
+
+    Retorna {caminho relativo: (resumo ou None, segundos)} e grava o resumo agregado
+    em outdir/SUMMARY_NAME. jobs é o número de processos (padrão: número de CPUs);
+    com jobs=1 tudo roda no próprio processo.
+    """
+    root, files = _expand_inputs(inputs)
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    rels = {f: f.relative_to(root).as_posix() for f in files}
+    reports = {f: outdir / (rels[f] + EXTENSIONS[report_format]) for f in files}
+    options = (minimize, time_budget, backend, report_format)
+    results = {}
+    start = time.perf_counter()
+    # um arquivo que derruba o gerador (ex.: bytes nulos, aninhamento fundo demais para
+    # a recursão) fica com erro no resumo, sem interromper o resto do lote
+    if jobs == 1 or len(files) <= 1:
+        for f in files:
+            try:
+                results[rels[f]] = _generate_timed(f, reports[f], *options)
+            except Exception as e:
+                results[rels[f]] = _batch_error(rels[f], e)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(_generate_timed, f, reports[f], *options): rels[f]
+                for f in files
+            }
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = _batch_error(futures[future], e)
+    elapsed = time.perf_counter() - start
+    _write_batch_summary(results, elapsed, outdir / SUMMARY_NAME)
+    return results
+
+
+def _write_batch_summary(results, elapsed, summary_file):
+    """Resumo do lote: uma linha por arquivo (com o tempo dele) e os totais."""
+    lines = ["Resumo dos Relatórios de Testes MC/DC", "=" * 30 + "\n"]
+    total = {"decisions": 0, "conditions": 0, "covered": 0, "cases": 0}
+    failed = 0
+    for rel in sorted(results):
+        summary, seconds = results[rel]
+        if summary is None:
+            failed += 1
+            lines.append(f"{rel}: erro ao ler ou analisar o arquivo ({seconds:.3f}s)")
+            continue
+        for key in total:
+            total[key] += summary[key]
+        lines.append(
+            f"{rel}: {summary['decisions']} decisões | {summary['covered']}/{summary['conditions']} "
+            f"condições com par MC/DC | {summary['cases']} casos ({seconds:.3f}s)"
+        )
+    lines.append("\n" + "=" * 30 + "\n")
+    lines.append(
+        f"Total: {len(results)} arquivos ({failed} com erro) | {total['decisions']} decisões | "
+        f"{total['covered']}/{total['conditions']} condições com par MC/DC | {total['cases']} casos"
+    )
+    lines.append(f"Tempo total: {elapsed:.3f}s")
+    Path(summary_file).write_text("\n".join(lines) + "\n", encoding='utf-8')
+    print("\n".join(lines[-2:]))
+    print(f"Resumo do lote gerado em: {summary_file}")
 
 
 # --- BLOCO PRINCIPAL ---
@@ -144,10 +619,12 @@ if __name__ == '__main__':
         description="Gera testes MC/DC para declarações 'if' em um arquivo Python."
     )
 
-    # Argumento obrigatório: o arquivo de entrada
+    # Argumento obrigatório: o arquivo de entrada (ou vários, para o modo em lote)
     parser.add_argument(
         "input_file",
-        help="O caminho para o arquivo .py que será analisado."
+        nargs="+",
+        help="O caminho para o arquivo .py que será analisado. Vários arquivos, pastas ou "
+             "globs (entre aspas) ativam o modo em lote."
     )
 
     # Argumento opcional: o arquivo de saída
@@ -157,8 +634,63 @@ if __name__ == '__main__':
         help="O nome do arquivo de relatório a ser gerado. (Padrão: relatorio_mcdc.txt)"
     )
 
+    # Argumento opcional: busca o menor conjunto de casos em vez do primeiro par
+    parser.add_argument(
+        "-m", "--minimize",
+        action="store_true",
+        help="Busca o menor conjunto de casos de teste que satisfaz MC/DC."
+    )
+
+    # Argumento opcional: tempo máximo da busca do conjunto mínimo
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=2.0,
+        help="Tempo máximo em segundos da busca por decisão com --minimize. (Padrão: 2.0)"
+    )
+
+    # Argumento opcional: como as decisões são resolvidas
+    parser.add_argument(
+        "-b", "--backend",
+        choices=["bitset", "bdd", "auto"],
+        default="auto",
+        help="bitset (tabela verdade), bdd (simbólico, para decisões grandes) ou auto. (Padrão: auto)"
+    )
+
+    # Argumento opcional: formato do relatório
+    parser.add_argument(
+        "-f", "--format",
+        choices=FORMATS,
+        default="text",
+        help="text (relatório em português), jsonl (um JSON por decisão) ou xml (JUnit). (Padrão: text)"
+    )
+
+    # Argumentos do modo em lote
+    parser.add_argument(
+        "-d", "--outdir",
+        default="relatorios_mcdc",
+        help="Pasta dos relatórios no modo em lote, um por arquivo, mais o resumo "
+             f"{SUMMARY_NAME}. (Padrão: relatorios_mcdc)"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Processos do modo em lote. (Padrão: número de CPUs)"
+    )
+
     # Analisa os argumentos fornecidos pelo usuário
     args = parser.parse_args()
 
-    # Chama a função principal com os nomes de arquivo obtidos da linha de comando
-    generate_mcdc_tests_from_file(args.input_file, args.output)
\ No newline at end of file
+    single = args.input_file[0]
+    if len(args.input_file) == 1 and not Path(single).is_dir() and not glob.has_magic(single):
+        # Chama a função principal com os nomes de arquivo obtidos da linha de comando
+        generate_mcdc_tests_from_file(
+            single, args.output, args.minimize, args.time_budget, args.backend,
+            report_format=args.format
+        )
+    else:
+        generate_mcdc_tests_batch(
+            args.input_file, args.outdir, args.minimize, args.time_budget, args.backend, args.jobs,
+            args.format
+        )
\ No newline at end of file
@@ -3,11 +3,61 @@ from pathlib import Path
 import argparse
 import mcdc_recorder
 
-# Reuse functions: _get_conditions_from_node, _evaluate_decision, _find_mcdc_pairs
-from mcdc_tool import _get_conditions_from_node, _evaluate_decision, _find_mcdc_pairs
+# Reuse functions: CompiledDecision, _find_mcdc_pairs, _decision_id
+from mcdc_tool import (BITSET_MAX_CONDITIONS, CompiledDecision, _find_mcdc_pairs, _decision_id,
+                       _decision_sites, _decision_label)
+from mcdc_minimize import complete_mcdc_rows
+from mcdc_report_writer import EXTENSIONS, open_writer
 
 
-def generate_report_from_observed(input_py, output_report):
+def _short_circuit(node, leaf_index, values, evaluated):
+    """Resultado da decisão seguindo o curto-circuito; 'evaluated' recebe as condições avaliadas."""
+    i = leaf_index.get(id(node))
+    if i is not None:
+        evaluated.add(i)
+        return values[i]
+    if isinstance(node, ast.BoolOp):
+        stop = not isinstance(node.op, ast.And)  # and para no primeiro False, or no primeiro True
+        for v in node.values:
+            if _short_circuit(v, leaf_index, values, evaluated) == stop:
+                return stop
+        return not stop
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return not _short_circuit(node.operand, leaf_index, values, evaluated)
+    return False
+
+
+def _suggest_vectors(decision, vectors, missing):
+    """Vetores que faltam observar para fechar o MC/DC das condições 'missing'.
+
+    Retorna ([(assignments, resultado, condições a que o vetor dá par)], condições
+    sem par possível); as condições que o curto-circuito pula ficam como None.
+    """
+    conditions = decision.conditions
+    n = len(conditions)
+    table, columns = decision.truth_table()
+    observed = [((v >> 1) >> n, (v >> 1) & ((1 << n) - 1), v & 1) for v in vectors]
+    targets = [conditions.index(c) for c in sorted(missing)]
+    rows, impossible = complete_mcdc_rows(table, columns, n, observed, targets)
+    suggestions = []
+    for row, pairs in rows:
+        # mesma convenção da tabela: a condição i vale True quando o bit (n-1-i) é 0
+        values = [not (row >> (n - 1 - i)) & 1 for i in range(n)]
+        evaluated = set()
+        outcome = _short_circuit(decision.test, decision.leaf_index, values, evaluated)
+        asg = {c: values[i] if i in evaluated else None for i, c in enumerate(conditions)}
+        suggestions.append((asg, outcome, [conditions[i] for i in pairs]))
+    return suggestions, sorted(conditions[i] for i in impossible)
+
+
+def generate_report_from_observed(input_py, output_report, filename=None, report_format="text"):
+    """Gera o relatório de um módulo e retorna o resumo dele para o relatório agregado.
+
+    filename entra no id das decisões e tem que ser o mesmo passado ao Instrumenter
+    (por padrão, o nome do arquivo). report_format: "text", "jsonl" ou "xml" (ver
+    mcdc_report_writer); cada decisão é gravada assim que é verificada.
+    """
+    filename = filename or Path(input_py).name
     # 1) Extrai AST do arquivo original
     code = Path(input_py).read_text(encoding='utf-8')
     tree = ast.parse(code)
@@ -15,34 +65,32 @@ def generate_report_from_observed(input_py, output_report):
     # 2) Puxa tudo que o recorder gravou
     observed = mcdc_recorder.get_observed()
 
-    report_lines = ["Relatório de Verificação MC/DC", "="*30 + "\n"]
+    writer = open_writer(output_report, report_format, "verification", filename,
+                         ["Relatório de Verificação MC/DC", "="*30 + "\n"], end="\n")
+    summary = {"decisions": 0, "passed": 0, "conditions": 0, "covered": 0}
 
-    for node in ast.walk(tree):
-        if not isinstance(node, ast.If):
-            continue
-        decision_str = ast.unparse(node.test)
-        conditions = sorted(_get_conditions_from_node(node.test))
+    for kind, node, test in _decision_sites(tree):
+        decision = CompiledDecision(test)
+        decision_str, conditions = decision.text, decision.conditions
         if not conditions:
             continue
 
-        # 3) Filtra só as observações que têm o mesmo conjunto de chaves
-        relevant = [
-            (asg, outcome)
-            for (asg, outcome) in observed
-            if set(asg.keys()) == set(conditions)
-        ]
-
-        # 4) Agrupa para remover duplicatas, mantendo a primeira ocorrência
-        unique = {}
-        for asg, outcome in relevant:
-            key = tuple(sorted(asg.items()))  # e.g. (('ano < 1', True), ('ano > 9999', False))
-            if key not in unique:
-                unique[key] = outcome
+        # 3) Pega os vetores distintos gravados para esta decisão pelo id dela,
+        #    já deduplicados pelo recorder, na ordem em que apareceram
+        decision_id = _decision_id(node, filename, test)
+        _, vectors = observed.get(decision_id, ((), {}))
+        unique_cases = [mcdc_recorder.decode_vector(conditions, v) for v in vectors]
 
-        unique_cases = [(dict(k), unique[k]) for k in unique]
+        summary["decisions"] += 1
+        summary["conditions"] += len(conditions)
 
-        report_lines.append(f"Decisão: if {decision_str}")
+        report_lines = [f"Decisão: {_decision_label(kind, decision_str)}"]
+        report_lines.append(f"Local: {filename}:{node.lineno}:{node.col_offset}")
         report_lines.append(f"Condições: {', '.join(conditions)}\n")
+        record = {"report": "verification", "file": filename, "line": node.lineno, "col": node.col_offset,
+                  "kind": kind, "decision": decision_str, "id": decision_id, "conditions": conditions,
+                  "observed": [{"values": asg, "outcome": outcome} for asg, outcome in unique_cases],
+                  "covered": [], "missing": conditions, "passed": False}
 
         if not unique_cases:
             report_lines.append("Nenhum caso observado para esta decisão.\n")
@@ -50,23 +98,81 @@ def generate_report_from_observed(input_py, output_report):
             report_lines.append("Casos Observados (únicos):")
             report_lines.append("-"*20)
             for asg, outcome in unique_cases:
-                vals = " | ".join(f"{c}={asg[c]}" for c in conditions)
+                # condição não avaliada por curto-circuito aparece como '-'
+                vals = " | ".join(f"{c}={'-' if asg[c] is None else asg[c]}" for c in conditions)
                 report_lines.append(f"{vals} | Resultado: {outcome}")
 
-            # 5) Calcule MC/DC só sobre esses casos únicos
+            # 4) Calcule MC/DC só sobre esses casos únicos
             mcdc_cases, covered = _find_mcdc_pairs(conditions, unique_cases)
             missing = set(conditions) - covered
+            summary["covered"] += len(conditions) - len(missing)
+            record.update(covered=sorted(covered), missing=sorted(missing), passed=not missing)
             if not missing:
+                summary["passed"] += 1
                 report_lines.append("\nMC/DC Coverage: PASS\n")
             else:
                 report_lines.append(
                     f"\nMC/DC Coverage: FAIL (faltam: {', '.join(sorted(missing))})\n"
                 )
-                
+                # 5) Sugere os vetores que completariam o MC/DC, pela tabela verdade
+                if len(conditions) > BITSET_MAX_CONDITIONS:
+                    report_lines.append(f"(sem sugestões: mais de {BITSET_MAX_CONDITIONS} condições)\n")
+                else:
+                    suggestions, impossible = _suggest_vectors(decision, vectors, missing)
+                    if suggestions:
+                        report_lines.append(f"Vetores sugeridos para completar o MC/DC ({len(suggestions)}):")
+                        report_lines.append("-"*20)
+                        for asg, outcome, pairs in suggestions:
+                            vals = " | ".join(f"{c}={'-' if asg[c] is None else asg[c]}" for c in conditions)
+                            report_lines.append(f"{vals} | Resultado: {outcome} | par para: {', '.join(pairs)}")
+                        report_lines.append("")
+                    if impossible:
+                        report_lines.append(f"Sem par possível nesta decisão: {', '.join(impossible)}\n")
+                    record.update(suggested=[{"values": asg, "outcome": outcome, "pairs": pairs}
+                                             for asg, outcome, pairs in suggestions],
+                                  impossible=impossible)
 
         report_lines.append("\n" + "="*30 + "\n")
+        writer.decision(record, report_lines)
+
+    # 6) Fecha o relatório
+    writer.close(summary)
+    print(f"Relatório de verificação gerado: {output_report}")
+    return summary
+
+
+def _write_aggregate_report(summaries, output_report):
+    """Relatório com o resumo de cada módulo e o total do pacote."""
+    lines = ["Relatório Agregado de Verificação MC/DC", "="*30 + "\n"]
+    total = {"decisions": 0, "passed": 0, "conditions": 0, "covered": 0}
+    for rel, (summary, module_report) in summaries.items():
+        for key in total:
+            total[key] += summary[key]
+        lines.append(
+            f"{rel}: {summary['passed']}/{summary['decisions']} decisões com MC/DC | "
+            f"{summary['covered']}/{summary['conditions']} condições cobertas ({module_report})"
+        )
+    lines.append("\n" + "="*30 + "\n")
+    lines.append(
+        f"Total: {total['passed']}/{total['decisions']} decisões com MC/DC | "
+        f"{total['covered']}/{total['conditions']} condições cobertas"
+    )
+    Path(output_report).write_text("\n".join(lines) + "\n", encoding='utf-8')
+    print(f"Relatório agregado gerado: {output_report}")
+
 
-    # 6) Escreve o relatório final
-    with open(output_report, "w", encoding="utf-8") as f:
-        print(*report_lines, sep="\n", file=f)    
-    print(f"Relatório de verificação gerado: {output_report}")
\ No newline at end of file
+def write_reports(modules, rels, report, report_format="text"):
+    """Relatórios a partir do que está no recorder: um só para um módulo; para vários,
+    um por módulo (em <relatório>/, com o layout do pacote) e o agregado em 'report'."""
+    # Pode apontar para o arquivo original ou instrumentado; usamos o original para extrair AST
+    if len(modules) == 1:
+        generate_report_from_observed(str(modules[0]), report, rels[modules[0]], report_format)
+        return
+    report_dir = Path(report).with_suffix("")
+    summaries = {}
+    for module in modules:
+        module_report = report_dir / (rels[module] + EXTENSIONS[report_format])
+        module_report.parent.mkdir(parents=True, exist_ok=True)
+        summary = generate_report_from_observed(str(module), module_report, rels[module], report_format)
+        summaries[rels[module]] = (summary, module_report)
+    _write_aggregate_report(summaries, report)
@@ -1,71 +1,285 @@
 #!/usr/bin/env python3
-import ast, astor, runpy, shutil, subprocess, sys, os
+import ast, astor, importlib.util, runpy, shutil, subprocess, sys, os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import argparse
-import json
-from instrumenter import Instrumenter, RECORDER_IMPORT
+from instrumenter import Instrumenter, add_recorder_import
+from mcdc_cache import CACHE_MAX_BYTES, default_cache_dir
+from mcdc_import_hook import collect_modules, load_durations, module_name
+import mcdc_incremental
 import mcdc_recorder
-from mcdc_verify_from_observed import generate_report_from_observed
+from mcdc_report_writer import FORMATS
+from mcdc_test_subset import write_subset_report
+from mcdc_tool import _decision_id, _decision_label, _decision_sites
+from mcdc_verify_from_observed import write_reports
+
+def _instrument_module(src, rel, outdir):
+    """Instrumenta um módulo e grava em outdir/rel; roda nos processos do pool."""
+    tree     = ast.parse(Path(src).read_text(encoding='utf-8'))
+    # o caminho relativo entra nos ids das decisões: dois módulos com o mesmo nome
+    # em pacotes diferentes não se misturam
+    instr    = Instrumenter(rel)
+    new_tree = instr.visit(tree)
+    ast.fix_missing_locations(new_tree)
+    dst = Path(outdir) / rel
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.write_text(astor.to_source(add_recorder_import(new_tree)), encoding='utf-8')
+    return rel
+
+def _write_profile_report(modules, rels, profile, native, instrumented, output):
+    """Relatório do --profile: custo de cada decisão e lentidão de cada teste."""
+    labels = {}
+    for module in modules:
+        tree = ast.parse(module.read_text(encoding='utf-8'))
+        for kind, node, test in _decision_sites(tree):
+            labels[_decision_id(node, rels[module], test)] = _decision_label(kind, ast.unparse(test))
+    lines = ["Perfil da Instrumentação MC/DC", "="*30 + "\n",
+             "Decisões, da mais cara para a mais barata (teste = condições com as sondas de bits;",
+             "recorder = dentro do record_call; os tempos incluem a leitura do relógio):", ""]
+    by_cost = sorted(profile.items(), key=lambda item: item[1][1] + item[1][2], reverse=True)
+    for decision_id, (calls, test_ns, recorder_ns) in by_cost:
+        location = decision_id.rsplit(":", 1)[0]
+        lines.append(
+            f"{location} | {labels.get(decision_id, decision_id)} | execuções: {calls} | "
+            f"teste: {test_ns / 1e6:.3f} ms | recorder: {recorder_ns / 1e6:.3f} ms | "
+            f"por execução: {(test_ns + recorder_ns) / calls / 1e3:.2f} µs"
+        )
+    lines += ["\n" + "="*30 + "\n", "Testes (setup + chamada + teardown):", ""]
+    for test in sorted(instrumented, key=lambda t: instrumented[t] - native.get(t, 0), reverse=True):
+        before = native.get(test)
+        slowdown = f"{instrumented[test] / before:.2f}x" if before else "-"
+        before = f"{before:.4f} s" if before is not None else "-"
+        lines.append(f"{test} | sem instrumentação: {before} | instrumentado: {instrumented[test]:.4f} s | "
+                     f"lentidão: {slowdown}")
+    total_native, total_instrumented = sum(native.values()), sum(instrumented.values())
+    lines.append("\n" + "="*30 + "\n")
+    lines.append(f"Total: sem instrumentação {total_native:.4f} s | instrumentado {total_instrumented:.4f} s"
+                 + (f" | lentidão {total_instrumented / total_native:.2f}x" if total_native else ""))
+    Path(output).write_text("\n".join(lines) + "\n", encoding='utf-8')
+    print(f"Perfil da instrumentação gerado: {output}")
+
+def _collect_node_ids(base_cmd, targets, cwd, env):
+    """Node ids dos testes que o pytest coleta em 'targets'."""
+    collected = subprocess.run(
+        [*base_cmd, *targets, "--collect-only"],
+        cwd=cwd, check=True, env=env, capture_output=True, text=True
+    ).stdout
+    return [line.strip() for line in collected.splitlines() if "::" in line]
+
+def _run_tests_parallel(targets, cwd, env, workers, base_cmd):
+    """Roda a suíte em 'workers' processos, cada um gravando o seu shard de observações."""
+    if importlib.util.find_spec("xdist") is not None:
+        # com pytest-xdist, cada worker já se identifica por PYTEST_XDIST_WORKER
+        subprocess.run([*base_cmd, *targets, "-n", str(workers)], cwd=cwd, check=True, env=env)
+        return
+    # sem xdist: coleta os testes e divide os node ids entre os workers
+    node_ids = _collect_node_ids(base_cmd, targets, cwd, env)
+    shards = [node_ids[k::workers] for k in range(workers) if node_ids[k::workers]]
+    procs = [
+        subprocess.Popen([*base_cmd, *shard], cwd=cwd, env={**env, "MCDC_WORKER": f"w{k}"})
+        for k, shard in enumerate(shards)
+    ]
+    # espera todos antes de acusar a falha: um worker ainda rodando continuaria
+    # gravando o seu shard na pasta de trabalho
+    failed = [proc for proc in procs if proc.wait() != 0]
+    if failed:
+        raise subprocess.CalledProcessError(failed[0].returncode, failed[0].args)
+
+def _run_tests(targets, cwd, env, workers, base_cmd):
+    if workers > 1 and "--collect-only" not in targets:
+        _run_tests_parallel(targets, cwd, env, workers, base_cmd)
+    else:
+        subprocess.run([*base_cmd, *targets], cwd=cwd, check=True, env=env)
+
+def _verify(args, root, modules, test_src, outdir):
+    """Roda os testes com os módulos instrumentados e grava os relatórios (passos 2 a 7)."""
+    rels = {m: m.relative_to(root).as_posix() for m in modules}
+
+    mcdc_recorder.clear()
+    env = os.environ.copy()
+    # log de observações que o recorder do subprocesso vai gravar
+    env["MCDC_OBSERVED"] = str(outdir / mcdc_recorder.LOG_FILE)
+    env["MCDC_SAMPLE_EVERY"] = str(args.sample_every)
+    env["MCDC_SAMPLE_INTERVAL"] = str(args.sample_interval)
+    env["MCDC_SATURATION"] = "1" if args.saturation else "0"
+    base_cmd = ["pytest", "-q", "-s", "--disable-warnings"]
+
+    if args.copy:
+        # 2) Instrumenta os módulos, em paralelo quando são vários, mantendo o layout
+        #    do pacote: os pacotes de topo são copiados inteiros (dados e módulos fora
+        #    do alvo continuam importáveis) e os módulos do alvo são sobrescritos
+        if len(modules) > 1 or Path(args.program).is_dir():
+            for top in sorted({root / rels[m].split("/")[0] for m in modules}):
+                if top.is_dir():
+                    shutil.copytree(top, outdir / top.name, dirs_exist_ok=True,
+                                    ignore=shutil.ignore_patterns("__pycache__"))
+        if len(modules) == 1:
+            _instrument_module(modules[0], rels[modules[0]], outdir)
+        else:
+            with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+                list(pool.map(_instrument_module, modules, [rels[m] for m in modules],
+                              [outdir] * len(modules)))
+
+        # 3) Copia o recorder e os testes para instrumented/
+        shutil.copy(Path(__file__).parent / "mcdc_recorder.py", outdir / "mcdc_recorder.py")
+        if test_src.is_dir():
+            shutil.copytree(test_src, outdir / test_src.name, dirs_exist_ok=True,
+                            ignore=shutil.ignore_patterns("__pycache__"))
+        else:
+            shutil.copy(test_src, outdir / test_src.name)
+        # PYTHONPATH: primeiro instrumented/, depois raiz
+        env["PYTHONPATH"] = str(outdir) + os.pathsep + str(Path(__file__).parent.resolve())
+        cwd = outdir
+    else:
+        # 2-3) Nada é copiado: o plugin mcdc_import_hook instrumenta os módulos-alvo
+        #      em memória quando os testes os importam, direto dos arquivos originais
+        env["MCDC_MODULES"] = os.pathsep.join(module_name(rels[m]) for m in modules)
+        env["MCDC_ROOT"] = str(root)
+        env["MCDC_COLLECTOR"] = args.collector
+        if args.profile:
+            env["MCDC_PROFILE"] = "1"
+        # módulos sem mudança carregam o bytecode instrumentado do cache
+        env["MCDC_CACHE"] = "" if args.no_cache else str(args.cache_dir or default_cache_dir())
+        env["MCDC_CACHE_MAX_BYTES"] = str(args.cache_size * 1024 * 1024)
+        # PYTHONPATH: primeiro a raiz dos módulos originais, depois lib/ (hook e recorder)
+        env["PYTHONPATH"] = str(root) + os.pathsep + str(Path(__file__).parent.resolve())
+        cwd = test_src.parent
+    # o plugin também marca o teste de cada observação (nas cópias, só isso)
+    base_cmd += ["-p", "mcdc_import_hook"]
+
+    targets = [test_src.name]
+    # ambiente sem instrumentação: coleta do incremental e medida base do perfil
+    plain_env = {k: v for k, v in env.items() if k not in ("MCDC_MODULES", "MCDC_PROFILE")}
+    if args.incremental:
+        # 4) Compara as decisões de agora com as do banco e escolhe os testes a rodar;
+        #    a coleta roda sem o plugin, para não instrumentar nem gravar nada
+        db = mcdc_incremental.IncrementalDB(args.db, [rels[m] for m in modules] + [str(test_src)])
+        scopes, decisions = {}, {}
+        for module in modules:
+            tree = ast.parse(module.read_text(encoding='utf-8'))
+            module_scopes, module_decisions = mcdc_incremental.module_scopes(tree, rels[module])
+            scopes.update(module_scopes)
+            decisions.update(module_decisions)
+        node_ids = _collect_node_ids(base_cmd, targets, cwd, plain_env)
+        test_files = mcdc_incremental.test_file_hashes(node_ids, cwd)
+        rerun = db.affected_tests(node_ids, scopes, decisions, test_files)
+        targets = [t for t in rerun if t != mcdc_incremental.COLLECTION]
+        print(f"Incremental: {len(targets)} de {len(node_ids)} testes afetados")
+        if rerun and not targets:
+            # só as observações da coleta ficaram velhas: basta importar de novo
+            targets = [test_src.name, "--collect-only"]
+
+    # 5) Roda pytest via subprocess
+    if args.profile and targets and "--collect-only" not in targets:
+        # os mesmos testes sem instrumentação, para comparar a duração de cada um
+        _run_tests(targets, cwd, {**plain_env, "MCDC_DURATIONS": str(outdir / "native.json")},
+                   args.workers, base_cmd)
+        env["MCDC_DURATIONS"] = str(outdir / "instrumented.json")
+    if targets:  # incremental sem nada alterado: tudo sai do banco
+        _run_tests(targets, cwd, env, args.workers, base_cmd)
+    if args.profile:
+        _write_profile_report(modules, rels, mcdc_recorder.load_profile(outdir / mcdc_recorder.LOG_FILE),
+                              load_durations(outdir / "native.json"), load_durations(outdir / "instrumented.json"),
+                              args.profile)
+
+    if args.incremental:
+        # junta as observações novas, por teste, com as guardadas dos outros testes
+        fresh, fresh_conditions = mcdc_incremental.load_by_test(outdir / mcdc_recorder.LOG_FILE,
+                                                                mcdc_recorder._skipped)
+        db.update(node_ids, rerun, fresh, fresh_conditions, scopes, decisions, test_files)
+        db.save()
+        for decision_id, (conditions, vectors) in db.observed().items():
+            for vector, count in vectors.items():
+                mcdc_recorder._merge(decision_id, conditions, vector, count)
+    # repovoa o recorder do processo principal, unindo o log de cada worker
+    elif not mcdc_recorder.load_shards(outdir / mcdc_recorder.LOG_FILE):
+        print("⚠️  Não achei", mcdc_recorder.LOG_FILE, "em", outdir, file=sys.stderr)
+    skipped = mcdc_recorder.get_skipped()
+    if skipped:
+        print(f"Chamadas puladas em decisões saturadas: {sum(skipped.values())} "
+              f"em {len(skipped)} decisões")
+
+    # 6-7) Gera o relatório MC/DC a partir dos casos observados
+    write_reports(modules, rels, args.report, args.format)
+    if args.minimal_tests:
+        if args.incremental:
+            by_test, conditions = db.tests, db.conditions
+        else:
+            by_test, conditions = mcdc_incremental.load_by_test(outdir / mcdc_recorder.LOG_FILE)
+        write_subset_report(by_test, conditions, args.minimal_tests)
 
 def main():
     parser = argparse.ArgumentParser(
         description="Instrumenta, executa testes e verifica cobertura MC/DC"
     )
-    parser.add_argument("program", help="Arquivo .py a ser instrumentado")
-    parser.add_argument("test_suite", help="Arquivo .py de testes (pytest ou script)")
-    parser.add_argument("-o", "--outdir", default="instrumented", help="Pasta para o código instrumentado")
+    parser.add_argument("program", help="Arquivo .py, pasta de pacote ou glob (entre aspas) a ser instrumentado")
+    parser.add_argument("test_suite", help="Arquivo .py ou pasta de testes (pytest ou script)")
+    parser.add_argument("-o", "--outdir", default="instrumented",
+                        help="Pasta de trabalho (logs de observações e, com --copy, o código instrumentado)")
     parser.add_argument("-r", "--report", default="mcdc_report.txt", help="Relatório de saída")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="text",
+                        help="Formato dos relatórios: text, jsonl (um JSON por decisão) ou xml (JUnit); "
+                             "o agregado de vários módulos é sempre texto (Padrão: text)")
+    parser.add_argument("-n", "--workers", type=int, default=1,
+                        help="Número de processos de teste em paralelo (um shard de observações por worker)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Processos para instrumentar os módulos com --copy (Padrão: número de CPUs)")
+    parser.add_argument("--copy", action="store_true",
+                        help="Grava cópias instrumentadas em --outdir em vez de instrumentar na importação")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Pasta do cache de código instrumentado (Padrão: ~/.cache/mcdc)")
+    parser.add_argument("--cache-size", type=int, default=CACHE_MAX_BYTES // (1024 * 1024),
+                        help="Tamanho máximo do cache em MB; as entradas usadas há mais tempo saem primeiro")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Instrumenta todos os módulos de novo, sem ler nem gravar o cache")
+    parser.add_argument("--collector", choices=["ast", "monitor"], default="ast",
+                        help="Coleta por sondas no AST ou por sys.monitoring (Python 3.12+, quase sem "
+                             "custo depois que cada decisão satura) (Padrão: ast)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Roda só os testes que passaram por decisões alteradas desde a última execução")
+    parser.add_argument("--db", default=".mcdc_incremental.json",
+                        help="Banco de observações por teste usado por --incremental")
+    parser.add_argument("--profile", nargs="?", const="mcdc_profile.txt", default=None,
+                        help="Mede execuções e tempo de cada decisão (no teste e no recorder) e a lentidão de "
+                             "cada teste em relação a uma execução sem instrumentação; grava o perfil no "
+                             "arquivo dado (Padrão: mcdc_profile.txt)")
+    parser.add_argument("--sample-every", type=int, default=1,
+                        help="Conta só uma a cada N repetições de um vetor já visto no teste, por decisão; "
+                             "vetores novos são sempre gravados (Padrão: 1, sem amostragem)")
+    parser.add_argument("--sample-interval", type=float, default=0.0,
+                        help="Conta no máximo uma repetição a cada tantos segundos, por decisão "
+                             "(Padrão: 0, sem amostragem)")
+    parser.add_argument("--saturation", action="store_true",
+                        help="Para de gravar uma decisão assim que ela tem MC/DC no teste (mais rápido, mas os "
+                             "vetores observados depois disso ficam de fora do relatório)")
+    parser.add_argument("--minimal-tests", nargs="?", const="mcdc_tests.txt", default=None,
+                        help="Calcula, pelas observações de cada teste, um subconjunto mínimo de testes com a "
+                             "mesma cobertura MC/DC da suíte e grava no arquivo dado (Padrão: mcdc_tests.txt)")
     args = parser.parse_args()
+    if args.incremental and args.copy:
+        parser.error("--incremental usa a instrumentação na importação; não combina com --copy")
+    if args.collector == "monitor" and (args.copy or sys.version_info < (3, 12)):
+        parser.error("--collector monitor precisa do Python 3.12+ e da instrumentação na importação")
+    if args.profile and (args.copy or args.collector == "monitor"):
+        parser.error("--profile usa as sondas do AST instrumentadas na importação; não combina com "
+                     "--copy nem com --collector monitor")
 
     # 1) Prepara caminhos absolutos
-    program_src = Path(args.program).resolve()
+    root, modules = collect_modules(args.program)
     test_src    = Path(args.test_suite).resolve()
     outdir      = Path(args.outdir).resolve()
     outdir.mkdir(exist_ok=True)
+    # shards de uma execução anterior que falhou no meio não podem entrar neste relatório
+    for stale in mcdc_recorder.shard_paths(outdir / mcdc_recorder.LOG_FILE):
+        stale.unlink()
+    try:
+        _verify(args, root, modules, test_src, outdir)
+    except BaseException:
+        # as cópias instrumentadas e os logs de observação ajudam a entender a falha
+        print(f"⚠️  Pasta de trabalho mantida: {outdir}", file=sys.stderr)
+        raise
+    # 8) Limpa a pasta de trabalho
+    shutil.rmtree(outdir, ignore_errors=True)
 
-    # 2) Instrumenta programa.py
-    src_code = program_src.read_text(encoding='utf-8')
-    tree     = ast.parse(src_code)
-    instr    = Instrumenter()
-    new_tree = instr.visit(tree)
-    ast.fix_missing_locations(new_tree)
-    instrumented_code = RECORDER_IMPORT + astor.to_source(new_tree)
-
-    instr_file = outdir / program_src.name
-    instr_file.write_text(instrumented_code, encoding='utf-8')
-
-    # 3) Copia o recorder e o teste para instrumented/
-    shutil.copy(Path(__file__).parent / "mcdc_recorder.py", outdir / "mcdc_recorder.py")
-    shutil.copy(test_src, outdir / test_src.name)
-
-    # 4) Limpa observed e configura ambiente
-    mcdc_recorder._observed.clear()
-    env = os.environ.copy()
-    # PYTHONPATH: primeiro instrumented/, depois raiz
-    env["PYTHONPATH"] = str(outdir) + os.pathsep + str(Path(__file__).parent.resolve())
-
-    # 5) Roda pytest via subprocess dentro de instrumented/
-    subprocess.run(
-        ["pytest", test_src.name, "-q", "-s", "--disable-warnings"],
-        cwd=outdir,
-        check=True,
-        env=env
-    )
-
-    obs_file = outdir / 'observed.json'
-    if obs_file.exists():
-        data = json.loads(obs_file.read_text(encoding='utf-8'))
-        # repovoa o recorder do processo principal
-        mcdc_recorder._observed = [ (dict(assign), res) for assign,res in data ]
-    else:
-        print("⚠️  Não achei observed.json em", obs_file, file=sys.stderr)
-
-    # 6) Gera o relatório MC/DC a partir dos casos observados
-    # Pode apontar para o arquivo original ou instrumentado; usamos o original para extrair AST
-    generate_report_from_observed(str(program_src), args.report)
-
-    # 8) Limpa a pasta instrumented
-    shutil.rmtree(outdir)
-            
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# os testes importam os módulos de v2/lib direto, como os benchmarks
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+
+import mcdc_recorder  # noqa: E402
+
+# inputs/ são módulos de exemplo para o gerador, não testes
+collect_ignore = ["inputs", "generated"]
+
+# pytester roda o plugin mcdc_import_hook numa sessão do pytest separada
+pytest_plugins = ["pytester"]
+
+
+@pytest.fixture
+def recorder(tmp_path, monkeypatch):
+    """mcdc_recorder limpo, com o log em tmp_path/observed.mcdc (fechado no fim)."""
+    monkeypatch.setenv("MCDC_OBSERVED", str(tmp_path / mcdc_recorder.LOG_FILE))
+    mcdc_recorder._close_log()
+    mcdc_recorder.set_test("")
+    mcdc_recorder.clear()
+    yield mcdc_recorder
+    mcdc_recorder._close_log()
+    mcdc_recorder.set_test("")
+    mcdc_recorder.clear()
@@ -0,0 +1,4 @@
+def decision(a, b, c, d):
+  if a and b or c and d:
+      return True
+  return False
\ No newline at end of file
@@ -0,0 +1,4 @@
+def decision(a, b, c, d, e, f):
+  if (a and (b or (c and d))) or e and not f:
+      return True
+  return False
\ No newline at end of file
@@ -0,0 +1,30 @@
+def laco(itens, limite):
+    i = 0
+    while i < len(itens) and itens[i] < limite:
+        i += 1
+    return i
+
+
+def escolha(a, b):
+    return "a" if a and not b else "b"
+
+
+def confere(x, y):
+    assert x is not None or y
+    return x
+
+
+def filtra(valores, minimo, maximo):
+    return [v for v in valores if v >= minimo and v <= maximo]
+
+
+def padrao(nome, apelido):
+    rotulo = nome or apelido or "anônimo"
+    ativo = bool(nome) and not apelido
+    return rotulo, ativo
+
+
+def aninhada(a, b, c):
+    if a or (b and (c or not a)):
+        return 1
+    return 0
@@ -0,0 +1,4 @@
+def decision(x, y):
+  if not (x > 5 and y < 10):
+      return "OK"
+  return "NOT_OK"
\ No newline at end of file
@@ -0,0 +1,13 @@
+# Módulo do teste do verificador (test_verify.py): a primeira decisão fica com
+# cobertura parcial, a segunda tem uma condição sem par possível.
+
+def classifica(a, b, c):
+    if a and (b or c):
+        return 1
+    return 0
+
+
+def contraditoria(a, b):
+    if (a and not a) or b:
+        return 1
+    return 0
@@ -0,0 +1,96 @@
+# tests/test_backends.py
+import ast
+import itertools
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from mcdc_tool import (CompiledDecision, _find_mcdc_pairs, _find_mcdc_pairs_bdd, _find_mcdc_pairs_bitset,
+                       _row_to_assignment, generate_mcdc_tests_from_file)
+
+# Pasta base dos testes
+BASE = Path(__file__).parent
+INPUT_DIR = BASE / "inputs"
+EXPECTED_DIR = BASE / "expected"
+GENERATED_DIR = BASE / "generated"
+
+GENERATED_DIR.mkdir(exist_ok=True)
+
+
+def random_decision(rng, names, depth):
+    """Texto de uma decisão aleatória com and/or/not e condições repetidas."""
+    if depth == 0 or rng.random() < 0.3:
+        name = rng.choice(names)
+        return f"not {name}" if rng.random() < 0.2 else name
+    op = rng.choice([" and ", " or "])
+    text = op.join(random_decision(rng, names, depth - 1) for _ in range(rng.randint(2, 3)))
+    return f"not ({text})" if rng.random() < 0.15 else f"({text})"
+
+
+def chain_decision(n):
+    """Cadeia no estilo de test_cadeia_quatro.py: c0 and c1 or c2 and c3 ..."""
+    names = [f"c{i:02d}" for i in range(n)]
+    return " or ".join(" and ".join(names[i:i + 2]) for i in range(0, n, 2))
+
+
+def decisions():
+    rng = random.Random(0)
+    texts = [random_decision(rng, [f"c{i}" for i in range(rng.randint(1, 8))], 3) for _ in range(150)]
+    texts += [chain_decision(n) for n in range(1, 13)]
+    texts += ["a and not a", "x > 5 and x > 5 or y", "not (a or b) and c"]
+    return texts
+
+
+@pytest.mark.parametrize("text", decisions())
+def test_engines_agree(text):
+    """Tabela em bitset, BDD e _find_mcdc_pairs sobre a tabela completa cobrem as mesmas condições."""
+    decision = CompiledDecision(ast.parse(text, mode="eval").body)
+    conditions = decision.conditions
+    table, columns = decision.truth_table()
+    bitset_rows, bitset_covered = _find_mcdc_pairs_bitset(conditions, table, columns)
+    bdd, root = decision.bdd()
+    bdd_rows, bdd_covered = _find_mcdc_pairs_bdd(conditions, bdd, root)
+    rows = [(_row_to_assignment(conditions, r), bool(table >> r & 1)) for r in range(1 << len(conditions))]
+    _, covered = _find_mcdc_pairs(conditions, rows)
+
+    assert bitset_covered == bdd_covered == covered
+    # as linhas escolhidas por cada backend bastam, sozinhas, para os pares
+    for chosen in (bitset_rows, bdd_rows):
+        _, covered_by_rows = _find_mcdc_pairs(conditions, [rows[r] for r in sorted(chosen)])
+        assert covered_by_rows == covered
+    # e a tabela bate com a avaliação direta da decisão, linha a linha
+    for r, values in enumerate(itertools.product([True, False], repeat=len(conditions))):
+        assert bool(table >> r & 1) == decision.evaluate(values)
+
+
+def list_test_cases():
+    """Tuplas (nome, input, expected) para cada .py de inputs/ com relatório esperado."""
+    for input_path in sorted(INPUT_DIR.glob("*.py")):
+        expected_path = EXPECTED_DIR / f"{input_path.stem}.txt"
+        if expected_path.exists():
+            yield input_path.stem, input_path, expected_path
+
+
+@pytest.mark.parametrize("name,input_path,expected_path", list(list_test_cases()))
+def test_generator_report(name, input_path, expected_path):
+    """O relatório do gerador é idêntico, byte a byte, ao expected/."""
+    out_path = GENERATED_DIR / f"{name}.txt"
+    generate_mcdc_tests_from_file(input_path, out_path, quiet=True)
+    assert out_path.read_bytes() == expected_path.read_bytes(), \
+        f"Relatório gerado difere do esperado em '{name}' (veja {out_path})"
+
+
+def _covered_by_decision(input_path, backend, out_path):
+    generate_mcdc_tests_from_file(input_path, out_path, backend=backend, quiet=True, report_format="jsonl")
+    records = [json.loads(line) for line in out_path.read_text(encoding="utf-8").splitlines()]
+    return {(r["line"], r["col"]): r["covered"] for r in records if r["type"] == "decision"}
+
+
+@pytest.mark.parametrize("name,input_path,expected_path", list(list_test_cases()))
+def test_backend_bdd_matches_bitset(name, input_path, expected_path):
+    """--backend bdd cobre as mesmas condições que --backend bitset em cada decisão."""
+    bitset = _covered_by_decision(input_path, "bitset", GENERATED_DIR / f"{name}.bitset.jsonl")
+    bdd = _covered_by_decision(input_path, "bdd", GENERATED_DIR / f"{name}.bdd.jsonl")
+    assert bitset and bitset == bdd
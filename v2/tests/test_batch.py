@@ -0,0 +1,31 @@
+# tests/test_batch.py
+import pytest
+
+from mcdc_tool import SUMMARY_NAME, generate_mcdc_tests_batch, generate_mcdc_tests_from_file
+
+GOOD = "def sinal(x):\n    if x > 0 and x < 9:\n        return 1\n    return 0\n"
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_batch_survives_bad_files(tmp_path, capsys, jobs):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "bom.py").write_text(GOOD, encoding="utf-8")
+    (src / "quebrado.py").write_text("def f(:\n    pass\n", encoding="utf-8")
+    # aninhamento fundo demais: derruba o gerador com RecursionError
+    (src / "fundo.py").write_text("if " + "not " * 2500 + "x:\n    pass\n", encoding="utf-8")
+    outdir = tmp_path / "relatorios"
+
+    results = generate_mcdc_tests_batch([str(src)], outdir, jobs=jobs)
+
+    assert sorted(results) == ["bom.py", "fundo.py", "quebrado.py"]
+    assert results["quebrado.py"][0] is None and results["fundo.py"][0] is None
+    assert "Erro ao gerar o relatório de 'fundo.py': RecursionError" in capsys.readouterr().out
+    # o arquivo bom sai como se tivesse sido gerado sozinho
+    alone = tmp_path / "sozinho.txt"
+    generate_mcdc_tests_from_file(src / "bom.py", alone, quiet=True)
+    assert (outdir / "bom.py.txt").read_bytes() == alone.read_bytes()
+    summary = (outdir / SUMMARY_NAME).read_text(encoding="utf-8")
+    assert "bom.py: 1 decisões | 2/2 condições com par MC/DC" in summary
+    assert "quebrado.py: erro ao ler ou analisar o arquivo" in summary
+    assert "Total: 3 arquivos (2 com erro)" in summary
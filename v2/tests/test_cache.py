@@ -0,0 +1,104 @@
+# tests/test_cache.py
+import importlib.util
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import mcdc_cache
+from mcdc_cache import CACHE_SUFFIX, InstrumentationCache
+from mcdc_import_hook import InstrumentingLoader
+
+LIB = Path(__file__).resolve().parent.parent / "lib"
+SOURCE = b"def sinal(x):\n    if x > 0 and x < 9:\n        return 1\n    return 0\n"
+
+
+def test_key_changes_with_what_goes_into_the_code(tmp_path, monkeypatch):
+    cache = InstrumentationCache(tmp_path)
+    key = cache.key(SOURCE, "/p/calc.py", "calc.py")
+    assert cache.key(SOURCE, "/p/calc.py", "calc.py") == key
+    assert cache.key(SOURCE + b"\n", "/p/calc.py", "calc.py") != key
+    assert cache.key(SOURCE, "/p/calc.py", "calc.py", optimize=2) != key
+    assert cache.key(SOURCE, "/q/calc.py", "calc.py") != key
+    assert cache.key(SOURCE, "/p/calc.py", "pacote/calc.py") != key
+    monkeypatch.setattr(mcdc_cache, "INSTRUMENTER_VERSION", mcdc_cache.INSTRUMENTER_VERSION + 1)
+    assert cache.key(SOURCE, "/p/calc.py", "calc.py") != key
+
+
+def load(path, cache, name="calc"):
+    loader = InstrumentingLoader(name, str(path), "calc.py", cache=cache)
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def test_hit_behaves_like_fresh_instrumentation(recorder, tmp_path, monkeypatch):
+    path = tmp_path / "calc.py"
+    path.write_bytes(SOURCE)
+    cache = InstrumentationCache(tmp_path / "cache")
+    fresh = load(path, cache)
+    assert len(list((tmp_path / "cache").glob("*" + CACHE_SUFFIX))) == 1
+    results = [fresh.sinal(x) for x in (5, -1, 10)]
+    observed = recorder.get_observed()
+    recorder.clear()
+
+    # agora o code object tem que sair do cache, sem instrumentar de novo
+    def no_instrumentation(*args, **kwargs):
+        raise AssertionError("instrumentou em vez de usar o cache")
+    monkeypatch.setattr(InstrumentingLoader, "source_to_code", no_instrumentation)
+    cached = load(path, cache)
+    assert [cached.sinal(x) for x in (5, -1, 10)] == results
+    assert recorder.get_observed() == observed
+
+
+def test_changed_source_misses(recorder, tmp_path):
+    path = tmp_path / "calc.py"
+    path.write_bytes(SOURCE)
+    cache = InstrumentationCache(tmp_path / "cache")
+    load(path, cache)
+    path.write_bytes(SOURCE.replace(b"return 1", b"return 2"))
+    assert load(path, cache).sinal(5) == 2
+    assert len(list((tmp_path / "cache").glob("*" + CACHE_SUFFIX))) == 2
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    code = compile("x = 1", "m.py", "exec")
+    cache = InstrumentationCache(tmp_path, max_bytes=10 ** 9)
+    for i, key in enumerate("abc"):
+        cache.store(key, code)
+        os.utime(tmp_path / (key + CACHE_SUFFIX), (1000 + i, 1000 + i))
+    size = (tmp_path / ("a" + CACHE_SUFFIX)).stat().st_size
+    # ler 'a' faz dela a mais recente; com espaço para 3 entradas, 'd' tira a 'b'
+    assert cache.load("a") is not None
+    cache.max_bytes = 3 * size
+    cache.store("d", code)
+    assert sorted(p.stem for p in tmp_path.glob("*" + CACHE_SUFFIX)) == ["a", "c", "d"]
+
+
+@pytest.mark.parametrize("size,entries", [(0, 0), (64, 1)])
+def test_cache_size_option(tmp_path, size, entries):
+    # --cache-size (em MB) chega ao plugin dos testes; com 0 nada fica no cache
+    (tmp_path / "calc.py").write_bytes(SOURCE)
+    (tmp_path / "test_calc.py").write_text("from calc import sinal\n\n\ndef test_sinal():\n"
+                                           "    assert sinal(5) == 1\n", encoding="utf-8")
+    subprocess.run([sys.executable, str(LIB / "run_and_verify.py"), "calc.py", "test_calc.py", "-o", "trabalho",
+                    "--cache-dir", "cache", "--cache-size", str(size)],
+                   cwd=tmp_path, check=True, capture_output=True)
+    assert len(list((tmp_path / "cache").glob("*" + CACHE_SUFFIX))) == entries
+
+
+@pytest.mark.parametrize("content", [b"", b"lixo", b"\xe3" * 40])
+def test_corrupt_entry_is_ignored(recorder, tmp_path, content):
+    path = tmp_path / "calc.py"
+    path.write_bytes(SOURCE)
+    cache = InstrumentationCache(tmp_path / "cache")
+    key = cache.key(SOURCE, str(path), "calc.py")
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / (key + CACHE_SUFFIX)).write_bytes(content)
+    assert cache.load(key) is None
+    # o loader instrumenta de novo e troca a entrada ruim por uma boa
+    assert load(path, cache).sinal(5) == 1
+    assert cache.load(key) is not None
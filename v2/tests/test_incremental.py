@@ -0,0 +1,144 @@
+# tests/test_incremental.py
+import ast
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from mcdc_incremental import COLLECTION, IncrementalDB, load_by_test, module_scopes
+
+RUN_AND_VERIFY = Path(__file__).resolve().parent.parent / "lib" / "run_and_verify.py"
+
+CALC = """\
+def sinal(x):
+    if x > 0 and x < 100:
+        return 1
+    return 0
+
+
+def par(x):
+    if x % 2 == 0 or x == 1:
+        return True
+    return False
+"""
+
+TESTS = """\
+from calc import par, sinal
+
+
+def test_sinal_positivo():
+    assert sinal(5) == 1
+
+
+def test_sinal_negativo():
+    assert sinal(-1) == 0
+
+
+def test_par():
+    assert par(2) and par(1) and not par(3)
+"""
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "calc.py").write_text(CALC, encoding="utf-8")
+    (tmp_path / "test_calc.py").write_text(TESTS, encoding="utf-8")
+    return tmp_path
+
+
+def verify(project, incremental=True):
+    """Roda o run_and_verify e devolve (testes afetados ou None, relatório)."""
+    report = project / ("incremental.txt" if incremental else "completo.txt")
+    cmd = [sys.executable, str(RUN_AND_VERIFY), "calc.py", "test_calc.py", "-o", "trabalho",
+           "-r", str(report), "--no-cache"]
+    if incremental:
+        cmd += ["--incremental", "--db", "banco.json"]
+    out = subprocess.run(cmd, cwd=project, capture_output=True, text=True, check=True).stdout
+    match = re.search(r"Incremental: (\d+) de (\d+) testes afetados", out)
+    affected = (int(match[1]), int(match[2])) if match else None
+    return affected, report.read_text(encoding="utf-8")
+
+
+def edit(project, old, new):
+    path = project / "calc.py"
+    path.write_text(path.read_text(encoding="utf-8").replace(old, new), encoding="utf-8")
+
+
+def test_no_change_reruns_nothing(project):
+    assert verify(project)[0] == (3, 3)  # sem banco: roda tudo
+    affected, report = verify(project)
+    assert affected == (0, 3)
+    assert report == verify(project, incremental=False)[1]
+
+
+def test_edit_inside_function_reruns_its_tests(project):
+    verify(project)
+    # sem mudar o número de linhas: o id das decisões de baixo leva a linha
+    edit(project, "        return 1\n", "        return int(1)\n")
+    affected, report = verify(project)
+    assert affected == (2, 3)  # só os dois testes que passaram por sinal
+    assert report == verify(project, incremental=False)[1]
+
+
+@pytest.mark.parametrize("old,new", [
+    # decisão nova em par
+    ("    return False\n", "    if x < 0 and x > -10:\n        return True\n    return False\n"),
+    # decisão de par removida
+    ("    if x % 2 == 0 or x == 1:\n        return True\n    return False\n", "    return x % 2 == 0 or x == 1\n"),
+])
+def test_added_or_removed_decision(project, old, new):
+    verify(project)
+    edit(project, old, new)
+    affected, report = verify(project)
+    assert affected == (1, 3)
+    assert report == verify(project, incremental=False)[1]
+
+
+@pytest.mark.parametrize("content", ["{não é json", "[]"])
+def test_missing_or_corrupt_db_runs_everything(project, content):
+    verify(project)
+    (project / "banco.json").write_text(content, encoding="utf-8")
+    affected, report = verify(project)
+    assert affected == (3, 3)
+    assert report == verify(project, incremental=False)[1]
+
+
+def test_scope_fingerprints():
+    tree = ast.parse(CALC)
+    scopes, decisions = module_scopes(tree, "calc.py")
+    assert set(scopes) == {"calc.py:<module>", "calc.py:sinal", "calc.py:par"}
+    assert sorted(decisions.values()) == ["calc.py:par", "calc.py:sinal"]
+    # posições não entram no hash: só mover a função não muda o escopo dela
+    moved, _ = module_scopes(ast.parse("\n\n" + CALC), "calc.py")
+    assert moved["calc.py:sinal"] == scopes["calc.py:sinal"]
+    edited, _ = module_scopes(ast.parse(CALC.replace("x < 100", "x < 99")), "calc.py")
+    assert edited["calc.py:sinal"] != scopes["calc.py:sinal"]
+    assert edited["calc.py:par"] == scopes["calc.py:par"]
+
+
+def test_load_by_test(recorder, tmp_path):
+    recorder.record_call("calc.py:2", ("a",), True, 1, 1)
+    recorder.set_test("test_calc.py::test_a")
+    recorder.record_call("calc.py:2", ("a",), False, 1, 0)
+    recorder.record_call("calc.py:2", ("a",), False, 1, 0)
+    recorder.set_test("test_calc.py::test_b")
+    recorder.record_call("calc.py:2", ("a",), True, 1, 1)
+    recorder._close_log()
+    skipped = {}
+    by_test, conditions = load_by_test(tmp_path / recorder.LOG_FILE, skipped)
+    assert by_test == {
+        COLLECTION: {"calc.py:2": {0b111: 1}},
+        "test_calc.py::test_a": {"calc.py:2": {0b100: 2}},
+        "test_calc.py::test_b": {"calc.py:2": {0b111: 1}},
+    }
+    assert conditions == {"calc.py:2": ("a",)}
+
+
+def test_db_from_other_key_is_discarded(tmp_path):
+    db = IncrementalDB(tmp_path / "banco.json", ["calc.py", "test_calc.py"])
+    db.update(["t::a"], [COLLECTION, "t::a"], {"t::a": {"d": {1: 1}}}, {"d": ("a",)}, {}, {}, {})
+    db.save()
+    assert IncrementalDB(tmp_path / "banco.json", ["calc.py", "test_calc.py"]).tests == {COLLECTION: {}, "t::a": {"d": {1: 1}}}
+    assert IncrementalDB(tmp_path / "banco.json", ["outro.py", "test_calc.py"]).tests == {}
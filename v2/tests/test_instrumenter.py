@@ -0,0 +1,192 @@
+# tests/test_instrumenter.py
+import ast
+import itertools
+import textwrap
+
+import pytest
+
+from instrumenter import Instrumenter, add_recorder_import
+from mcdc_recorder import decode_vector
+from mcdc_tool import CompiledDecision, _find_mcdc_pairs
+from mcdc_verify_from_observed import _short_circuit
+
+T, F, N = True, False, None
+
+
+def run(source, filename="modulo.py"):
+    """Instrumenta e executa o código, devolvendo o namespace do módulo."""
+    tree = Instrumenter(filename).visit(ast.parse(textwrap.dedent(source)))
+    ast.fix_missing_locations(tree)
+    namespace = {}
+    exec(compile(add_recorder_import(tree), filename, "exec"), namespace)
+    return namespace
+
+
+def vectors(recorder, *conditions):
+    """Vetores gravados para a decisão de 'conditions': {((valor, ...), resultado)}.
+
+    Os valores seguem a ordem de 'conditions'; None = não avaliada (curto-circuito).
+    """
+    for keys, counts in recorder.get_observed().values():
+        if set(keys) == set(conditions):
+            decoded = [decode_vector(keys, v) for v in counts]
+            return {(tuple(asg[c] for c in conditions), res) for asg, res in decoded}
+    raise AssertionError(f"nenhuma decisão gravada com as condições {conditions}")
+
+
+def test_and_or_not(recorder):
+    ns = run("""
+        def f(a, b, c):
+            if a and not (b or c):
+                return 1
+            return 0
+    """)
+    assert [ns["f"](*args) for args in [(T, F, F), (F, T, T), (T, T, F), (T, F, T)]] == [1, 0, 0, 0]
+    assert vectors(recorder, "a", "b", "c") == {
+        ((T, F, F), T), ((F, N, N), F), ((T, T, N), F), ((T, F, T), F),
+    }
+
+
+def test_short_circuit_guard(recorder):
+    ns = run("""
+        class Ponto:
+            y = 2
+
+        def positivo(x):
+            ok = x is not None and x.y > 0
+            return ok
+    """)
+    # a segunda condição não pode ser avaliada (nem pela sonda) quando x é None
+    assert ns["positivo"](None) is False
+    assert ns["positivo"](ns["Ponto"]()) is True
+    assert vectors(recorder, "x is not None", "x.y > 0") == {((F, N), F), ((T, T), T)}
+
+
+def test_conditions_evaluated_once(recorder):
+    ns = run("""
+        chamadas = []
+
+        def c(valor):
+            chamadas.append(valor)
+            return valor
+
+        def f(a, b):
+            return 1 if c(a) or c(b) else 0
+    """)
+    assert (ns["f"](F, T), ns["f"](T, F)) == (1, 1)
+    assert ns["chamadas"] == [F, T, T]
+    assert vectors(recorder, "c(a)", "c(b)") == {((F, T), T), ((T, N), T)}
+
+
+def test_default_value_or(recorder):
+    ns = run("""
+        def rotulo(nome, padrao):
+            texto = nome or padrao
+            return texto
+    """)
+    # o valor da expressão passa intacto, não vira bool
+    assert ns["rotulo"]("", "anon") == "anon"
+    assert ns["rotulo"]("ana", "anon") == "ana"
+    assert ns["rotulo"](None, 0) == 0
+    assert vectors(recorder, "nome", "padrao") == {((F, T), T), ((T, N), T), ((F, F), F)}
+
+
+def test_while(recorder):
+    ns = run("""
+        def conta(n, limite):
+            i = 0
+            while i < n and i < limite:
+                i += 1
+            return i
+    """)
+    assert (ns["conta"](5, 3), ns["conta"](1, 3)) == (3, 1)
+    assert vectors(recorder, "i < n", "i < limite") == {((T, T), T), ((T, F), F), ((F, N), F)}
+    # cada vetor distinto é gravado uma vez, com as execuções contadas
+    (counts,) = [c for keys, c in recorder.get_observed().values() if "i < n" in keys]
+    assert sum(counts.values()) == 6
+
+
+def test_comprehension_filter(recorder):
+    ns = run("""
+        def pares_positivos(xs):
+            return [x for x in xs if x > 0 and x % 2 == 0]
+    """)
+    assert ns["pares_positivos"]([-2, 1, 4]) == [4]
+    assert vectors(recorder, "x > 0", "x % 2 == 0") == {((F, N), F), ((T, F), F), ((T, T), T)}
+
+
+def test_comprehension_in_class_body(recorder):
+    # ':=' é proibido em comprehension direto no corpo da classe: esse filtro fica
+    # sem sonda, mas o do método continua instrumentado
+    ns = run("""
+        class Tabela:
+            pares = [x for x in range(5) if x % 2 == 0 and x > 0]
+
+            def impares(self):
+                return [y for y in range(5) if y % 2 and y > 1]
+    """)
+    assert ns["Tabela"].pares == [2, 4]
+    assert ns["Tabela"]().impares() == [3]
+    assert not any("x > 0" in keys for keys, _ in recorder.get_observed().values())
+    assert vectors(recorder, "y % 2", "y > 1") == {((F, N), F), ((T, F), F), ((T, T), T)}
+
+
+@pytest.mark.parametrize("rows,covered", [
+    # a and b: (a=F, b não avaliada) isola a contra (a=T, b=T)
+    ([({"a": F, "b": N}, F), ({"a": T, "b": T}, T)], {"a"}),
+    ([({"a": F, "b": N}, F), ({"a": T, "b": T}, T), ({"a": T, "b": F}, F)], {"a", "b"}),
+    # a or b: (a=T, b não avaliada) contra (a=F, b=F)
+    ([({"a": T, "b": N}, T), ({"a": F, "b": F}, F)], {"a"}),
+    # duas condições avaliadas mudando juntas não formam par
+    ([({"a": T, "b": T, "c": N}, T), ({"a": F, "b": F, "c": F}, F)], set()),
+    # None nos dois lados, na mesma condição: ela não conta na comparação
+    ([({"a": T, "b": N, "c": T}, T), ({"a": F, "b": N, "c": T}, F)], {"a"}),
+])
+def test_pairs_with_none_dont_care(rows, covered):
+    conditions = sorted(rows[0][0])
+    tests, found = _find_mcdc_pairs(conditions, rows)
+    assert found == covered
+    # os casos devolvidos são exatamente as linhas dos pares
+    assert {frozenset(t.items()) for t in tests} <= {frozenset(asg.items()) for asg, _ in rows}
+
+
+
+def test_or_saturates_after_its_short_circuit_vectors(recorder):
+    ns = run("""
+        def fora(posicao, limite):
+            if posicao < 1 or posicao > limite:
+                return True
+            return False
+    """)
+    # 'a or b' só produz (T,-), (F,T) e (F,F): 3 vetores, não 2^2
+    for posicao in (0, 11, 5):
+        ns["fora"](posicao, 10)
+    (decision_id,) = recorder.get_observed()
+    assert recorder.is_saturated(decision_id)
+    ns["fora"](0, 10)
+    assert recorder.get_skipped() == {decision_id: 1}
+    # a saturação é por teste: o próximo teste grava de novo
+    recorder.set_test("outro")
+    assert not recorder.is_saturated(decision_id)
+
+
+@pytest.mark.parametrize("text,count", [
+    ("a or b", 3),
+    ("a and b", 3),
+    ("a and (b or c)", 4),
+    ("not a", 2),
+    ("(a or b) and (c or d)", 7),
+    # 'a' avaliada duas vezes: sobra um vetor impossível (a=T com resultado True)
+    ("a and not a", 3),
+])
+def test_short_circuit_vectors(text, count):
+    decision = CompiledDecision(ast.parse(text, mode="eval").body)
+    vectors = decision.short_circuit_vectors()
+    assert len(vectors) == count
+    # nunca falta um vetor que a avaliação de verdade produz
+    n = len(decision.conditions)
+    for row in itertools.product([True, False], repeat=n):
+        evaluated = set()
+        result = _short_circuit(decision.test, decision.leaf_index, row, evaluated)
+        mask = sum(1 << i for i in evaluated)
+        assert (mask, sum(1 << i for i in evaluated if row[i]), result) in vectors
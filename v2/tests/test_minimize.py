@@ -0,0 +1,103 @@
+# tests/test_minimize.py
+import itertools
+import random
+
+import pytest
+
+from mcdc_minimize import _is_satisfied, _Outcomes, complete_mcdc_rows, minimize_mcdc_rows
+
+
+def columns_for(n):
+    """Bitset das linhas com a condição i True (bit n-1-i da linha em 0), como no mcdc_tool."""
+    return [sum(1 << r for r in range(1 << n) if not r >> (n - 1 - i) & 1) for i in range(n)]
+
+
+def tables():
+    """Todas as funções de até 3 condições e funções aleatórias de 4."""
+    for n in range(1, 4):
+        for table in range(1 << (1 << n)):
+            yield n, table
+    rng = random.Random(0)
+    for _ in range(60):
+        yield 4, rng.getrandbits(16)
+
+
+def brute_force(table, n, targets):
+    """Tamanho do menor conjunto de linhas com um par para cada alvo."""
+    outcomes = _Outcomes(table)
+    for size in range(len(targets) + 1, (1 << n) + 1):
+        for rows in itertools.combinations(range(1 << n), size):
+            chosen = set(rows)
+            if all(_is_satisfied(chosen, outcomes, 1 << (n - 1 - i)) for i in targets):
+                return size
+    return 0
+
+
+@pytest.mark.parametrize("n,table", list(tables()))
+def test_minimize_rows(n, table):
+    rows, covered, lower, optimal = minimize_mcdc_rows(table, columns_for(n), n)
+    outcomes = _Outcomes(table)
+    # os alvos são exatamente as condições que têm algum par na tabela
+    targets = [i for i in range(n)
+               if any(outcomes[r] != outcomes[r ^ (1 << (n - 1 - i))] for r in range(1 << n))]
+    assert covered == set(targets)
+    # as linhas devolvidas têm um par de independência para cada alvo
+    assert all(_is_satisfied(rows, outcomes, 1 << (n - 1 - i)) for i in targets)
+    # limite inferior "N+1 casos"
+    if not targets:
+        assert (rows, lower, optimal) == (set(), 0, True)
+        return
+    assert lower == len(covered) + 1
+    assert len(rows) >= lower
+    # "ótimo comprovado" confere com a força bruta (n <= 4 sempre termina no tempo)
+    assert optimal
+    assert len(rows) == brute_force(table, n, targets)
+
+
+def random_observed(rng, table, n):
+    """Vetores observados coerentes com a tabela: as condições fora de 'avaliadas' não
+    mudam o resultado, como num curto-circuito."""
+    observed = []
+    for _ in range(rng.randrange(4)):
+        row = rng.randrange(1 << n)
+        evaluated = rng.getrandbits(n)
+        free = [1 << (n - 1 - i) for i in range(n) if not evaluated >> i & 1]
+        cube = {row}
+        for shift in free:
+            cube |= {r ^ shift for r in cube}
+        if len({_Outcomes(table)[r] for r in cube}) > 1:
+            continue
+        values = sum(1 << i for i in range(n) if not row >> (n - 1 - i) & 1) & evaluated
+        observed.append((evaluated, values, (table >> row) & 1))
+    return observed
+
+
+def pairs_with(row, chosen, observed, outcomes, n, i):
+    """A linha fecha um par para i com outra linha escolhida ou com um vetor observado."""
+    shift = 1 << (n - 1 - i)
+    if row ^ shift in chosen and outcomes[row] != outcomes[row ^ shift]:
+        return True
+    values = sum(1 << j for j in range(n) if not row >> (n - 1 - j) & 1)
+    return any(evaluated >> i & 1 and outcomes[row] != result
+               and (values ^ vector) & evaluated == 1 << i
+               for evaluated, vector, result in observed)
+
+
+@pytest.mark.parametrize("n,table", list(tables()))
+def test_complete_rows(n, table):
+    rng = random.Random(table * 31 + n)
+    observed = random_observed(rng, table, n)
+    outcomes = _Outcomes(table)
+    targets = [i for i in range(n)
+               if any(outcomes[r] != outcomes[r ^ (1 << (n - 1 - i))] for r in range(1 << n))]
+    rows, impossible = complete_mcdc_rows(table, columns_for(n), n, observed, range(n))
+    assert impossible == set(range(n)) - set(targets)
+    chosen = {row for row, _ in rows}
+    for row, covers in rows:
+        assert covers == [i for i in targets if pairs_with(row, chosen, observed, outcomes, n, i)]
+    assert all(any(i in covers for _, covers in rows) for i in targets)
+    # o menor número de linhas novas, pela força bruta
+    size = next(size for size in range((1 << n) + 1) for combo in itertools.combinations(range(1 << n), size)
+                if all(any(pairs_with(r, set(combo), observed, outcomes, n, i) for r in combo)
+                       for i in targets))
+    assert len(rows) == size
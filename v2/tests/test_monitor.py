@@ -0,0 +1,119 @@
+# tests/test_monitor.py
+import ast
+import importlib.util
+import sys
+import textwrap
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 12), reason="sys.monitoring precisa do Python 3.12")
+
+FILENAME = "modulo_alvo.py"
+SOURCE = textwrap.dedent("""
+    def classifica(a, b, c):
+        if a and (b or c):
+            return 1
+        return 0
+
+    def laco(n, limite):
+        i = 0
+        while i < n and i < limite:
+            i += 1
+        return i
+
+    def escolhe(x, y):
+        return 'x' if x or not y else 'y'
+""")
+
+# (teste, função, argumentos): o primeiro teste esgota os 4 vetores de classifica,
+# que satura e tem os eventos desligados; o segundo precisa gravá-los de novo
+CALLS = [
+    ("t1", "classifica", (True, True, False)),
+    ("t1", "classifica", (True, False, True)),
+    ("t1", "classifica", (True, False, False)),
+    ("t1", "classifica", (False, True, True)),
+    ("t1", "classifica", (False, False, False)),
+    ("t1", "laco", (5, 2)),
+    ("t1", "escolhe", (False, True)),
+    ("t2", "classifica", (True, True, False)),
+    ("t2", "classifica", (False, True, False)),
+    ("t2", "laco", (1, 3)),
+    ("t2", "escolhe", (True, False)),
+    ("t2", "escolhe", (False, False)),
+]
+
+
+def load(path, collector):
+    """Importa o módulo em 'path' pelo InstrumentingLoader com o coletor dado."""
+    from mcdc_import_hook import InstrumentingLoader
+    if collector == "monitor":
+        import mcdc_monitor
+        mcdc_monitor.start()
+    loader = InstrumentingLoader(f"modulo_{collector}", str(path), FILENAME, collector=collector)
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def run(recorder, tmp_path, collector):
+    """Roda CALLS com o coletor e devolve {(teste, decisão, vetor)} lido do log."""
+    path = tmp_path / "modulo_alvo.py"
+    path.write_text(SOURCE, encoding="utf-8")
+    log = tmp_path / f"observed.{collector}.mcdc"
+    recorder.set_test("")
+    recorder.clear()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("MCDC_OBSERVED", str(log))
+        module = load(path, collector)
+        for test, name, args in CALLS:
+            if test == "t2" != recorder._current_test and collector == "monitor":
+                # classifica saturou em t1: o code object dela está desligado
+                import mcdc_monitor
+                assert [code.co_name for code in mcdc_monitor._disabled.values()] == ["classifica"]
+            recorder.set_test(test)
+            getattr(module, name)(*args)
+        recorder.set_test("")
+        recorder._close_log()
+    return {(test, d, v) for test, d, _, v, _ in recorder.iter_log_by_test(log)}
+
+
+def test_all_decisions_follow_the_bytecode():
+    import mcdc_monitor
+    tree = ast.parse(SOURCE)
+    sites = mcdc_monitor.decision_sites(tree, FILENAME)
+    table, unsupported = mcdc_monitor.analyze(compile(tree, FILENAME, "exec"), sites)
+    assert unsupported == set()
+    assert {entry[0].decision_id for _, branches in table for entry in branches.values()} == \
+        {site.decision_id for site in sites}
+
+
+def test_monitor_matches_ast(recorder, tmp_path):
+    import mcdc_monitor
+    expected = run(recorder, tmp_path, "ast")
+    observed = run(recorder, tmp_path, "monitor")
+    assert observed == expected
+    # o segundo teste gravou de novo vetores que o primeiro já tinha esgotado
+    assert {d for test, d, _ in observed if test == "t2"} == {d for test, d, _ in observed if test == "t1"}
+    # e a troca de teste religou só o que este coletor tinha desligado
+    assert not mcdc_monitor._disabled
+
+
+def _start_with(taken):
+    """Roda mcdc_monitor.start() num processo novo com os ids 'taken' já em uso."""
+    import subprocess
+    from pathlib import Path
+    lib = Path(__file__).resolve().parent.parent / "lib"
+    code = (f"import sys; sys.path.insert(0, {str(lib)!r})\n"
+            f"for tool in {taken!r}: sys.monitoring.use_tool_id(tool, 'outra')\n"
+            "import mcdc_monitor\n"
+            "try:\n    mcdc_monitor.start()\nexcept RuntimeError as e:\n    print('erro', e)\n"
+            "else:\n    print(mcdc_monitor._tool)\n")
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_start_leaves_reserved_tool_ids():
+    # nunca toma DEBUGGER_ID (0), COVERAGE_ID (1) nem PROFILER_ID (2), mesmo livres
+    assert _start_with(()) == "3"
+    assert _start_with((3, 4)) == str(sys.monitoring.OPTIMIZER_ID)
+    assert _start_with((3, 4, sys.monitoring.OPTIMIZER_ID)).startswith("erro")
@@ -0,0 +1,56 @@
+# tests/test_pytest_plugin.py
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+LIB = Path(__file__).resolve().parent.parent / "lib"
+
+CALC = """\
+def sinal(x):
+    if x > 0 and x < 100:
+        return 1
+    return 0
+
+
+def par(x):
+    if x % 2 == 0 or x == 1:
+        return True
+    return False
+"""
+
+TESTS = """\
+from calc import par, sinal
+
+
+def test_sinal():
+    assert sinal(5) == 1 and sinal(-1) == 0 and sinal(100) == 0
+
+
+def test_par():
+    assert par(2) and not par(3)
+"""
+
+
+@pytest.mark.parametrize("workers", [[], ["-n", "2"]])
+def test_plugin_writes_report(pytester, monkeypatch, workers):
+    if workers:
+        pytest.importorskip("xdist")
+    monkeypatch.setenv("PYTHONPATH", str(LIB))
+    monkeypatch.delenv("MCDC_OBSERVED", raising=False)
+    pytester.makepyfile(calc=CALC, test_calc=TESTS)
+    result = pytester.runpytest_subprocess("-p", "mcdc_import_hook", "--mcdc", "calc", "--mcdc-no-cache",
+                                           "--mcdc-report", "plugin.txt", *workers)
+    result.assert_outcomes(passed=2)
+    report = (pytester.path / "plugin.txt").read_text(encoding="utf-8")
+    # sinal tem os pares de x > 0 e de x < 100; par ainda não tem o de x == 1
+    assert "if x > 0 and x < 100\n" in report and "MC/DC Coverage: PASS" in report
+    assert "MC/DC Coverage: FAIL (faltam: x == 1)" in report
+    # o mesmo relatório que o run_and_verify grava para o mesmo projeto
+    subprocess.run([sys.executable, str(LIB / "run_and_verify.py"), "calc.py", "test_calc.py",
+                    "-o", "trabalho", "-r", "cli.txt", "--no-cache"],
+                   cwd=pytester.path, check=True, capture_output=True)
+    assert report == (pytester.path / "cli.txt").read_text(encoding="utf-8")
+    # o log temporário do plugin não fica para trás
+    assert not list(pytester.path.glob("observed*.mcdc"))
@@ -0,0 +1,108 @@
+# tests/test_recorder_log.py
+from mcdc_recorder import _RECORD, LOG_MAGIC
+
+
+def vector(n, evaluated, values, outcome):
+    """Vetor empacotado como no record_call."""
+    return ((evaluated << n | values) << 1) | outcome
+
+
+def record_kinds(path):
+    """(tipo, fim do registro) de cada registro do log, lidos direto dos cabeçalhos."""
+    data = path.read_bytes()
+    pos, records = len(LOG_MAGIC), []
+    while pos < len(data):
+        kind, size = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size + size
+        records.append((kind, pos))
+    return records
+
+
+def by_test(rows):
+    """Soma as execuções por (teste, decisão, vetor)."""
+    totals = {}
+    for test, decision_id, _, v, count in rows:
+        totals[(test, decision_id, v)] = totals.get((test, decision_id, v), 0) + count
+    return totals
+
+
+def write_sample(recorder):
+    """Grava um log com os seis tipos de registro."""
+    recorder.set_test("t1")
+    for _ in range(3):
+        recorder.record_call("m.py:1", ("a", "b"), True, 0b11, 0b11)
+    recorder.record_call("m.py:1", ("a", "b"), False, 0b01, 0b00)
+    recorder.set_test("t2")
+    recorder.profile_call("m.py:2", ("x",), recorder.clock(), True, 1, 1)
+    # com os 2 vetores possíveis a decisão satura e a terceira chamada é pulada
+    recorder.record_call("m.py:3", ("c",), True, 1, 1)
+    recorder.record_call("m.py:3", ("c",), False, 1, 0)
+    recorder.record_call("m.py:3", ("c",), True, 1, 1)
+    # t1 volta: só o índice dele vai para o log (tipo 6)
+    recorder.set_test("t1")
+    recorder.record_call("m.py:1", ("a", "b"), False, 0b11, 0b01)
+    recorder._close_log()
+
+
+def test_log_round_trip(recorder, tmp_path):
+    path = tmp_path / recorder.LOG_FILE
+    write_sample(recorder)
+    assert {kind for kind, _ in record_kinds(path)} == {1, 2, 3, 4, 5, 6}
+
+    skipped, profile = {}, {}
+    rows = list(recorder.iter_log_by_test(path, skipped, profile))
+    assert {(d, c) for _, d, c, _, _ in rows} == {
+        ("m.py:1", ("a", "b")), ("m.py:2", ("x",)), ("m.py:3", ("c",)),
+    }
+    assert by_test(rows) == {
+        ("t1", "m.py:1", vector(2, 0b11, 0b11, 1)): 3,
+        ("t1", "m.py:1", vector(2, 0b01, 0b00, 0)): 1,
+        ("t1", "m.py:1", vector(2, 0b11, 0b01, 0)): 1,
+        ("t2", "m.py:2", vector(1, 1, 1, 1)): 1,
+        ("t2", "m.py:3", vector(1, 1, 1, 1)): 1,
+        ("t2", "m.py:3", vector(1, 1, 0, 0)): 1,
+    }
+    assert skipped == {"m.py:3": 1}
+    assert list(profile) == ["m.py:2"] and profile["m.py:2"][0] == 1
+
+    # e o load_log devolve ao recorder o mesmo que ele tinha antes de gravar
+    observed = recorder.get_observed()
+    recorder.clear()
+    recorder.load_log(path)
+    assert recorder.get_observed() == observed
+    assert recorder.get_skipped() == {"m.py:3": 1}
+
+
+def test_reopened_log_is_self_contained(recorder, tmp_path):
+    path = tmp_path / recorder.LOG_FILE
+    write_sample(recorder)
+    # uma observação nova depois do fechamento reabre (e sobrescreve) o log: os
+    # índices de decisão e teste não podem apontar para o arquivo anterior
+    recorder.set_test("t3")
+    recorder.record_call("m.py:3", ("c",), False, 0, 0)
+    recorder._close_log()
+    rows = list(recorder.iter_log_by_test(path))
+    totals = {}
+    for _, decision_id, _, v, count in rows:
+        totals[(decision_id, v)] = totals.get((decision_id, v), 0) + count
+    assert totals == {(d, v): c for d, (_, counts) in recorder.get_observed().items() for v, c in counts.items()}
+
+
+def test_truncated_log_keeps_complete_vectors(recorder, tmp_path):
+    path = tmp_path / recorder.LOG_FILE
+    write_sample(recorder)
+    data = path.read_bytes()
+    records = record_kinds(path)
+    full = list(recorder.iter_log(path))
+    truncated = tmp_path / "truncado.mcdc"
+    for cut in range(len(LOG_MAGIC), len(data) + 1):
+        truncated.write_bytes(data[:cut])
+        # os vetores esperados são os dos registros tipo 2 que terminam antes do corte
+        complete = sum(1 for kind, end in records if kind == 2 and end <= cut)
+        expected = {}
+        for decision_id, conditions, v, count in full[:complete]:
+            counts = expected.setdefault(decision_id, (conditions, {}))[1]
+            counts[v] = counts.get(v, 0) + count
+        recorder.clear()
+        recorder.load_log(truncated)
+        assert recorder.get_observed() == expected, f"corte no byte {cut}"
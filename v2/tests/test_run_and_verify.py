@@ -0,0 +1,56 @@
+# tests/test_run_and_verify.py
+import importlib.util
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+import run_and_verify
+
+LIB = Path(__file__).resolve().parent.parent / "lib"
+
+# faz o papel do pytest: lista os node ids no --collect-only; um shard com
+# 'falha' sai na hora com erro, os outros demoram e deixam um arquivo ao terminar
+FAKE_PYTEST = textwrap.dedent("""
+    import sys, time
+    from pathlib import Path
+    args = sys.argv[1:]
+    if "--collect-only" in args:
+        print("t.py::falha\\nt.py::lento")
+        sys.exit(0)
+    if any("falha" in a for a in args):
+        sys.exit(1)
+    time.sleep(0.5)
+    Path("terminou").write_text("ok")
+""")
+
+
+def test_parallel_failure_waits_for_every_worker(tmp_path, monkeypatch):
+    script = tmp_path / "falso_pytest.py"
+    script.write_text(FAKE_PYTEST, encoding="utf-8")
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *a: None if name == "xdist" else find_spec(name, *a))
+    with pytest.raises(subprocess.CalledProcessError):
+        run_and_verify._run_tests_parallel(["t.py"], tmp_path, {}, 2, [sys.executable, str(script)])
+    # a falha só é acusada depois que o worker lento terminou
+    assert (tmp_path / "terminou").exists()
+
+
+@pytest.mark.parametrize("passing", [True, False])
+def test_workdir_kept_only_on_failure(tmp_path, passing):
+    (tmp_path / "calc.py").write_text("def sinal(x):\n    if x > 0 and x < 9:\n        return 1\n    return 0\n",
+                                      encoding="utf-8")
+    (tmp_path / "test_calc.py").write_text(
+        f"from calc import sinal\n\n\ndef test_sinal():\n    assert sinal(5) == {1 if passing else 2}\n",
+        encoding="utf-8")
+    result = subprocess.run([sys.executable, str(LIB / "run_and_verify.py"), "calc.py", "test_calc.py",
+                             "-o", "trabalho", "--copy"], cwd=tmp_path, capture_output=True, text=True)
+    workdir = tmp_path / "trabalho"
+    if passing:
+        assert result.returncode == 0 and not workdir.exists()
+    else:
+        # as cópias instrumentadas e o log ficam para investigar a falha
+        assert result.returncode != 0 and "Pasta de trabalho mantida" in result.stderr
+        assert (workdir / "calc.py").exists() and (workdir / "observed.mcdc").exists()
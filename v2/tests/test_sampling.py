@@ -0,0 +1,60 @@
+# tests/test_sampling.py
+import pytest
+
+D, KEYS = "m.py:1", ("a",)
+TRUE, FALSE = 0b111, 0b100  # vetores empacotados de 'a' avaliada com resultado True/False
+
+
+def call(recorder, value, times=1):
+    for _ in range(times):
+        recorder.record_call(D, KEYS, value, 1, 1 if value else 0)
+
+
+def count(recorder, vector=TRUE):
+    return recorder.get_observed()[D][1].get(vector, 0)
+
+
+@pytest.fixture
+def sampled(recorder, monkeypatch):
+    monkeypatch.setattr(recorder, "SAMPLE_EVERY", 4)
+    recorder.set_test("t1")
+    return recorder
+
+
+def test_sample_every(sampled):
+    call(sampled, True)
+    assert count(sampled) == 1  # a primeira ocorrência conta sempre
+    call(sampled, True, 3)
+    assert count(sampled) == 1
+    call(sampled, True)
+    assert count(sampled) == 5  # a 4ª repetição leva o peso das 3 puladas
+    call(sampled, True, 8)
+    assert count(sampled) == 13
+
+
+def test_new_vector_is_always_logged(sampled, tmp_path):
+    call(sampled, True, 3)
+    call(sampled, False)
+    # o vetor novo já está no log, sem esperar descarga nem amostra
+    logged = {v for _, _, v, _ in sampled.iter_log(tmp_path / sampled.LOG_FILE)}
+    assert logged == {TRUE, FALSE}
+    assert count(sampled, FALSE) == 1
+    # e a amostragem recomeça em cada teste: a primeira ocorrência do vetor no
+    # teste seguinte conta na hora
+    sampled.set_test("t2")
+    call(sampled, True)
+    assert count(sampled) == 2
+
+
+def test_sample_interval_counts_after_interval(recorder, monkeypatch):
+    monkeypatch.setattr(recorder, "SAMPLE_INTERVAL", 1000.0)
+    recorder.set_test("t1")
+    call(recorder, True, 33)
+    assert count(recorder) == 33  # 1ª ocorrência + a 32ª repetição (relógio lido, sem amostra anterior)
+    call(recorder, True, 64)
+    assert count(recorder) == 33  # o intervalo de 1000 s ainda não passou
+    recorder._next_sample[D] = 0.0  # o intervalo passou
+    call(recorder, True, 31)
+    assert count(recorder) == 33  # o relógio só é lido a cada 32 repetições...
+    call(recorder, True)
+    assert count(recorder) == 33 + 96  # ...e a amostra leva as repetições acumuladas
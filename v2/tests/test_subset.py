@@ -0,0 +1,83 @@
+# tests/test_subset.py
+import ast
+import random
+
+import pytest
+
+import mcdc_incremental
+from mcdc_recorder import pair_bits
+from mcdc_tool import CompiledDecision
+from mcdc_test_subset import minimal_test_subset, write_subset_report
+from test_backends import random_decision
+
+
+def covered_bits(n, vectors):
+    """Condições com par entre os vetores, comparando todos com todos (pair_bits)."""
+    vectors = list(vectors)
+    bits = 0
+    for i, vector in enumerate(vectors):
+        bits |= pair_bits(n, vector, vectors[i + 1:])
+    return bits
+
+
+def coverage(by_test, conditions, tests):
+    """{decisão: bits cobertos} pela união dos vetores da coleta e de 'tests'."""
+    union = {}
+    for test in [mcdc_incremental.COLLECTION, *tests]:
+        for d, vectors in by_test.get(test, {}).items():
+            union.setdefault(d, set()).update(vectors)
+    return {d: covered_bits(len(conditions[d]), vectors) for d, vectors in union.items()}
+
+
+def random_suite(seed):
+    """Suíte aleatória: cada teste produz alguns vetores possíveis de algumas decisões."""
+    rng = random.Random(seed)
+    conditions, possible = {}, {}
+    for d in range(rng.randint(1, 5)):
+        decision = CompiledDecision(ast.parse(random_decision(rng, list("abcde"), 2), mode="eval").body)
+        n = len(decision.conditions)
+        conditions[f"d{d}"] = tuple(decision.conditions)
+        possible[f"d{d}"] = sorted(((e << n | v) << 1) | r for e, v, r in decision.short_circuit_vectors())
+    by_test = {}
+    for t in [mcdc_incremental.COLLECTION] + [f"t{i}" for i in range(rng.randint(1, 10))]:
+        observed = {}
+        for d, vectors in possible.items():
+            if rng.random() < 0.6:
+                observed[d] = {v: rng.randint(1, 3) for v in rng.sample(vectors, rng.randint(1, len(vectors)))}
+        if t != mcdc_incremental.COLLECTION or rng.random() < 0.3:
+            by_test[t] = observed
+    return by_test, conditions
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_subset_keeps_suite_coverage(seed):
+    by_test, conditions = random_suite(seed)
+    tests = [t for t in by_test if t != mcdc_incremental.COLLECTION]
+    chosen, target = minimal_test_subset(by_test, conditions)
+    full = coverage(by_test, conditions, tests)
+    # o alvo é o que a suíte inteira cobre, e o subconjunto cobre o mesmo
+    assert {d: bits for d, bits in target.items() if bits} == {d: bits for d, bits in full.items() if bits}
+    kept = coverage(by_test, conditions, chosen)
+    assert all(kept.get(d, 0) & bits == bits for d, bits in target.items())
+    # a poda não deixa teste sobrando, e nenhum teste sai se ainda é necessário
+    assert len(set(chosen)) == len(chosen) and set(chosen) <= set(tests)
+    for t in chosen:
+        without = coverage(by_test, conditions, [c for c in chosen if c != t])
+        assert any(without.get(d, 0) & bits != bits for d, bits in target.items()), f"{t} é redundante"
+
+
+def test_pair_across_two_tests():
+    # o par de 'a' só existe juntando os vetores de t1 e t2: os dois ficam
+    a_true, a_false = 0b111, 0b100  # (a avaliada, a=True, resultado True) e (a=False, False)
+    by_test = {"t1": {"d": {a_true: 1}}, "t2": {"d": {a_false: 1}}, "t3": {"d": {a_true: 5}}}
+    chosen, target = minimal_test_subset(by_test, {"d": ("a",)})
+    assert target == {"d": 1}
+    assert sorted(chosen) in (["t1", "t2"], ["t2", "t3"])
+
+
+def test_subset_report(tmp_path):
+    by_test = {"": {}, "t1": {"d": {0b111: 1, 0b100: 1}}, "t2": {"d": {0b111: 1}}}
+    output = tmp_path / "mcdc_tests.txt"
+    assert write_subset_report(by_test, {"d": ("a",)}, output) == ["t1"]
+    text = output.read_text(encoding="utf-8")
+    assert "Testes mantidos: 1 de 2" in text and "  t2" in text.split("redundantes")[1]
@@ -0,0 +1,78 @@
+# tests/test_verify.py
+import ast
+import json
+from pathlib import Path
+
+from instrumenter import Instrumenter, add_recorder_import
+from mcdc_tool import _find_mcdc_pairs
+from mcdc_verify_from_observed import generate_report_from_observed
+
+BASE = Path(__file__).parent
+INPUT = BASE / "inputs" / "verificacao_parcial.py"
+# sufixo .verify: não é um relatório do gerador (ver test_backends.list_test_cases)
+EXPECTED = BASE / "expected" / "verificacao_parcial.verify.txt"
+GENERATED_DIR = BASE / "generated"
+
+
+def load_module():
+    """Executa inputs/verificacao_parcial.py instrumentado e devolve o namespace."""
+    tree = Instrumenter(INPUT.name).parse_and_instrument(INPUT)
+    namespace = {}
+    exec(compile(add_recorder_import(tree), str(INPUT), "exec"), namespace)
+    return namespace
+
+
+def run_partial(ns):
+    ns["classifica"](True, True, False)
+    ns["classifica"](False, True, True)
+    ns["contraditoria"](True, False)
+    ns["contraditoria"](True, True)
+
+
+def verify(report_format="text"):
+    GENERATED_DIR.mkdir(exist_ok=True)
+    suffix = "txt" if report_format == "text" else report_format
+    output = GENERATED_DIR / f"verificacao_parcial.verify.{suffix}"
+    generate_report_from_observed(INPUT, output, report_format=report_format)
+    return output
+
+
+def decisions(output):
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    return {r["decision"]: r for r in records if r["type"] == "decision"}
+
+
+def test_verify_report_golden(recorder):
+    run_partial(load_module())
+    output = verify()
+    assert output.read_bytes() == EXPECTED.read_bytes(), f"Relatório difere do esperado (veja {output})"
+
+
+def test_suggestions_complete_mcdc(recorder):
+    ns = load_module()
+    run_partial(ns)
+    records = decisions(verify("jsonl"))
+    partial = records["a and (b or c)"]
+    assert not partial["passed"] and partial["missing"] == ["b", "c"]
+    assert partial["impossible"] == []
+
+    observed = [(o["values"], o["outcome"]) for o in partial["observed"]]
+    suggested = [(s["values"], s["outcome"]) for s in partial["suggested"]]
+    # nenhuma sugestão repete um vetor já observado
+    assert not [s for s in suggested if s in observed]
+    # observados + sugeridos fecham o MC/DC da decisão
+    _, covered = _find_mcdc_pairs(partial["conditions"], observed + suggested)
+    assert covered == set(partial["conditions"])
+
+    # e executar as sugestões (condição não avaliada = qualquer valor) dá PASS
+    for values, outcome in suggested:
+        assert ns["classifica"](**{c: bool(v) for c, v in values.items()}) == int(outcome)
+    assert decisions(verify("jsonl"))["a and (b or c)"]["passed"]
+
+
+def test_condition_without_pair_is_impossible(recorder):
+    run_partial(load_module())
+    record = decisions(verify("jsonl"))["a and (not a) or b"]
+    assert record["covered"] == ["b"]
+    assert record["impossible"] == ["a"]
+    assert record["suggested"] == []